@@ -1,6 +1,11 @@
+import bisect
+import concurrent.futures
 import hashlib
-from functools import lru_cache
-from typing import Any
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
 
 from hivemind.dht import DHT
 from hivemind.utils import ValueWithExpiration
@@ -35,29 +40,154 @@ def node_outputs_key(node: HivemindNode) -> str:
     return outputs_key(node.key, node.round_num, node.stage_num)
 
 
-def hash_keys(outputs):
+def hash_keys(outputs, hash_fn=None):
     # Handles older versions of the trainer that did not hash question keys.
+    hash_fn = hash_fn or _md5
     result = {}
     for k, v in outputs.items():
         if len(k) != 32:  # Not perfect, but good enough.
-            k = hashlib.md5(k.encode()).hexdigest()
+            k = hash_fn(k)
         result[k] = v
 
     return result
 
 
-@lru_cache
+def _md5(k: str) -> str:
+    return hashlib.md5(k.encode()).hexdigest()
+
+
+def _approx_size(obj) -> int:
+    """Rough deep size of outputs (containers of strings and numbers), in bytes."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approx_size(k) + _approx_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_approx_size(v) for v in obj)
+    return size
+
+
+class OutputsCache:
+    """
+    Bounded cache of stage outputs keyed by (node key, round, stage). Holds at
+    most `max_entries` entries and about `max_bytes` of outputs, evicting the
+    least recently used first, and only rounds within `round_window` of the
+    latest round seen; advancing the round drops older rounds.
+
+    Question keys are hashed once, when outputs are inserted, and the hashes of
+    unhashed questions are shared by every node's outputs in the window.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 256 * 1024 * 1024, round_window: int = 2):
+        if round_window < 1:
+            raise ValueError("round_window must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.round_window = round_window
+        self._lock = threading.Lock()
+        # (node key, round, stage) -> (outputs, approximate size in bytes)
+        self._entries: OrderedDict[tuple, tuple[dict, int]] = OrderedDict()
+        self._bytes = 0
+        self._key_hashes: dict[str, str] = {}
+        self.current_round = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, node_key: str, r, s) -> dict[str, tuple[float, dict]] | None:
+        with self._lock:
+            entry = self._entries.get((node_key, r, s))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((node_key, r, s))
+            self.hits += 1
+            return entry[0]
+
+    def _hash_key(self, k: str) -> str:
+        if (h := self._key_hashes.get(k)) is None:
+            h = self._key_hashes[k] = _md5(k)
+        return h
+
+    def put(self, node_key: str, r, s, outputs) -> dict[str, tuple[float, dict]]:
+        """Hashes the question keys of `outputs`, caches them and returns the hashed outputs."""
+        with self._lock:
+            outputs = hash_keys(outputs, self._hash_key)
+            if self.current_round is None or r > self.current_round:
+                self._advance_round(r)
+            elif r <= self.current_round - self.round_window:
+                return outputs  # Outside the window; not worth keeping.
+
+            size = _approx_size(outputs)
+            old = self._entries.pop((node_key, r, s), None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[(node_key, r, s)] = (outputs, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+            return outputs
+
+    def advance_round(self, r) -> None:
+        """Marks `r` as the latest round, dropping rounds that fall out of the window."""
+        with self._lock:
+            if self.current_round is None or r > self.current_round:
+                self._advance_round(r)
+
+    def _advance_round(self, r) -> None:
+        self.current_round = r
+        self._drop(lambda round_num: round_num <= r - self.round_window)
+        # Questions differ between rounds.
+        self._key_hashes.clear()
+
+    def invalidate(self, r=None) -> None:
+        """Drops the entries of round `r`, or every entry."""
+        with self._lock:
+            self._drop(lambda round_num: r is None or round_num == r)
+
+    def _drop(self, predicate) -> None:
+        for key in [key for key in self._entries if predicate(key[1])]:
+            self._bytes -= self._entries.pop(key)[1]
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by cached outputs."""
+        with self._lock:
+            return self._bytes
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "round": self.current_round,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by get_outputs; configure or invalidate it through this instance.
+outputs_cache = OutputsCache()
+
+
 def get_outputs(
     dht: DHT, node_key: str, r, s, get_cached_fn=None
 ) -> dict[str, tuple[float, dict]]:  # Q: (timestamp, outputs)
+    if (outputs := outputs_cache.get(node_key, r, s)) is not None:
+        return outputs
+
     # Try provided cache function first.
     if get_cached_fn:
         if outputs := get_cached_fn(r, s):
-            return hash_keys(outputs)
+            return outputs_cache.put(node_key, r, s, outputs)
 
     # Try from DHT next to include peered outputs.
     if outputs := get_dht_value(dht, key=outputs_key(node_key, r, s), latest=False):
-        return hash_keys(outputs)
+        return outputs_cache.put(node_key, r, s, outputs)
 
     raise ValueError(
         f"could not retrieve stage outputs for {node_key} at round {r} stage {s}"
@@ -76,7 +206,146 @@ def get_round_and_stage(
 
 
 def get_dht_value(dht: DHT, **kwargs) -> Any | None:
-    wrapper = dht.get(**kwargs)
+    return unwrap_dht_value(dht.get(**kwargs))
+
+
+def key_family(key: str) -> str:
+    """The kind of a DHT key, without the node, round and stage parts."""
+    for prefix in (OUTPUTS_KEY_PREFIX, LEADERBOARD_KEY_PREFIX, REWARDS_KEY, ROUND_STAGE_NUMBER_KEY):
+        if key.startswith(prefix):
+            return prefix
+    return "other"
+
+
+class LatencyHistogram:
+    """Counts DHT lookup latencies in fixed buckets, per (key family, beam size)."""
+
+    # Upper bounds of the buckets, in seconds; the last bucket is unbounded.
+    BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (key family, beam size) -> [bucket counts..., timeouts]
+        self._counts: dict[tuple[str, Any], list[int]] = {}
+
+    def _row(self, label) -> list[int]:
+        if (row := self._counts.get(label)) is None:
+            row = self._counts[label] = [0] * (len(self.BUCKETS) + 2)
+        return row
+
+    def observe(self, key: str, seconds: float, beam_size=None) -> None:
+        with self._lock:
+            self._row((key_family(key), beam_size))[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+
+    def observe_timeout(self, key: str, beam_size=None) -> None:
+        with self._lock:
+            self._row((key_family(key), beam_size))[-1] += 1
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        """Counts by label ("family" or "family@beam_size") and bucket ("<=0.05", ">10.0", "timeout")."""
+        names = [f"<={b}" for b in self.BUCKETS] + [f">{self.BUCKETS[-1]}", "timeout"]
+        with self._lock:
+            return {
+                family if beam_size is None else f"{family}@{beam_size}": dict(zip(names, row))
+                for (family, beam_size), row in self._counts.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+# Latencies of every lookup made through get_dht_values, and of lookups that
+# callers running their own fetches record here.
+dht_latency = LatencyHistogram()
+
+
+def get_dht_values(
+    dht: DHT,
+    keys: Iterable[str],
+    timeout: float | None = 10,
+    max_concurrency: int | None = None,
+    stats: dict[str, int] | None = None,
+    **kwargs,
+) -> dict[str, Any | None]:
+    """
+    Looks several keys up concurrently, with hivemind's future-returning gets,
+    giving each lookup `timeout` seconds from when it starts. At most
+    `max_concurrency` lookups run at once (all of them if None); the next key
+    starts as soon as one finishes or times out. Returns the unwrapped value
+    of every key that resolved (None if it is not in the DHT); keys that time
+    out or fail are left out. Lookups still running at their timeout finish in
+    the background. Latencies are recorded in `dht_latency`, each lookup once:
+    one that times out is counted as a timeout even if it finishes later. If
+    `stats` is given, its "fetched", "missing", "timedOut" and "failed" counts
+    are incremented.
+
+    Blocks the calling thread, so call it from a thread rather than a coroutine.
+    """
+    keys = iter(dict.fromkeys(keys))
+    beam_size = kwargs.get("beam_size")
+    # Keys whose latency or timeout was recorded.
+    counted = set()
+    lock = threading.Lock()
+
+    def count(key: str) -> bool:
+        with lock:
+            if key in counted:
+                return False
+            counted.add(key)
+            return True
+
+    def observe(future: concurrent.futures.Future, key: str, start: float) -> None:
+        if not future.cancelled() and count(key):
+            dht_latency.observe(key, time.monotonic() - start, beam_size)
+
+    def tally(outcome: str) -> None:
+        if stats is not None:
+            stats[outcome] = stats.get(outcome, 0) + 1
+
+    # future -> (key, start time) of the lookups in flight.
+    in_flight: dict[concurrent.futures.Future, tuple[str, float]] = {}
+
+    def launch() -> None:
+        while max_concurrency is None or len(in_flight) < max_concurrency:
+            if (key := next(keys, None)) is None:
+                return
+            start = time.monotonic()
+            try:
+                future = dht.get(key, return_future=True, **kwargs)
+            except Exception:
+                tally("failed")
+                continue
+            future.add_done_callback(lambda f, key=key, start=start: observe(f, key, start))
+            in_flight[future] = (key, start)
+
+    results = {}
+    launch()
+    while in_flight:
+        wait = None
+        if timeout is not None:
+            # Until the oldest lookup's deadline, or until one finishes.
+            wait = max(min(start for _, start in in_flight.values()) + timeout - time.monotonic(), 0)
+        concurrent.futures.wait(in_flight, timeout=wait, return_when=concurrent.futures.FIRST_COMPLETED)
+        now = time.monotonic()
+        for future, (key, start) in list(in_flight.items()):
+            if future.done():
+                del in_flight[future]
+                if future.cancelled() or future.exception() is not None:
+                    tally("failed")
+                else:
+                    results[key] = unwrap_dht_value(future.result())
+                    tally("missing" if results[key] is None else "fetched")
+            elif timeout is not None and now - start >= timeout:
+                del in_flight[future]
+                if count(key):
+                    dht_latency.observe_timeout(key, beam_size)
+                tally("timedOut")
+        launch()
+    return results
+
+
+def unwrap_dht_value(wrapper: ValueWithExpiration | None) -> Any | None:
     if not wrapper:
         return None
 
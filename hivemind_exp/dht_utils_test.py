@@ -0,0 +1,214 @@
+import time
+from concurrent.futures import Future
+
+import pytest
+from hivemind.utils import ValueWithExpiration
+
+from hivemind_exp import dht_utils
+from hivemind_exp.dht_utils import (
+    LatencyHistogram,
+    OutputsCache,
+    get_dht_values,
+    get_outputs,
+    outputs_key,
+    rewards_key,
+)
+
+HASHED = "0" * 32
+
+
+def outputs(question="q", answer="a"):
+    return {question: (1.0, {"answer": answer})}
+
+
+def test_hashes_question_keys():
+    """Test that unhashed question keys are hashed on insert and hashed ones kept"""
+    cache = OutputsCache()
+    stored = cache.put("node", 1, 0, {**outputs("What is 2+2?"), HASHED: (2.0, {})})
+    assert set(stored) == {dht_utils._md5("What is 2+2?"), HASHED}
+    assert cache.get("node", 1, 0) is stored
+    assert cache.get("node", 1, 1) is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_round_window():
+    """Test that rounds falling out of the window are dropped, and older rounds are not cached"""
+    cache = OutputsCache(round_window=2)
+    cache.put("a", 1, 0, outputs())
+    cache.put("a", 2, 0, outputs())
+    assert len(cache) == 2
+    cache.put("a", 3, 0, outputs())
+    assert cache.get("a", 1, 0) is None
+    assert cache.get("a", 2, 0) is not None
+
+    # Outside the window: returned hashed, but not kept.
+    assert set(cache.put("b", 1, 0, outputs("old"))) == {dht_utils._md5("old")}
+    assert cache.get("b", 1, 0) is None
+
+    cache.advance_round(5)
+    assert len(cache) == 0
+    assert cache.current_round == 5
+
+
+def test_entry_and_byte_bounds():
+    """Test least recently used eviction beyond the entry and byte bounds"""
+    cache = OutputsCache(max_entries=2)
+    cache.put("a", 1, 0, outputs())
+    cache.put("b", 1, 0, outputs())
+    cache.get("a", 1, 0)
+    cache.put("c", 1, 0, outputs())
+    assert cache.get("b", 1, 0) is None
+    assert cache.get("a", 1, 0) is not None
+    assert cache.stats()["evictions"] == 1
+
+    one_entry = dht_utils._approx_size(dht_utils.hash_keys(outputs("x" * 1000)))
+    cache = OutputsCache(max_bytes=int(one_entry * 2.5))
+    for node in "abc":
+        cache.put(node, 1, 0, outputs("x" * 1000))
+    assert len(cache) == 2
+    assert cache.memory_usage() == 2 * one_entry
+    # Replacing an entry does not count it twice.
+    cache.put("c", 1, 0, outputs("x" * 1000))
+    assert cache.memory_usage() == 2 * one_entry
+
+
+def test_invalidate():
+    """Test dropping one round's entries, or all of them"""
+    cache = OutputsCache(round_window=3)
+    for r in (1, 2):
+        for node in "ab":
+            cache.put(node, r, 0, outputs())
+    cache.invalidate(1)
+    assert [cache.get(node, 1, 0) for node in "ab"] == [None, None]
+    assert cache.get("a", 2, 0) is not None
+    cache.invalidate()
+    assert len(cache) == 0
+    assert cache.memory_usage() == 0
+
+
+class FakeDHT:
+    def __init__(self, values):
+        self.values = values
+        self.requests = []
+
+    def get(self, key, latest=False, **kwargs):
+        self.requests.append(key)
+        return self.values.get(key)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = OutputsCache()
+    monkeypatch.setattr(dht_utils, "outputs_cache", cache)
+    return cache
+
+
+def test_get_outputs_reads_through(cache):
+    """Test that get_outputs fetches once, from the local cache function or the DHT"""
+    stored = {HASHED: ValueWithExpiration((1.0, {"answer": "a"}), 100.0)}
+    dht = FakeDHT({outputs_key("node", 1, 0): ValueWithExpiration(stored, 100.0)})
+
+    assert get_outputs(dht, "node", 1, 0) == {HASHED: (1.0, {"answer": "a"})}
+    assert get_outputs(dht, "node", 1, 0) == {HASHED: (1.0, {"answer": "a"})}
+    assert dht.requests == [outputs_key("node", 1, 0)]
+
+    local = get_outputs(dht, "me", 1, 0, get_cached_fn=lambda r, s: outputs("mine"))
+    assert set(local) == {dht_utils._md5("mine")}
+    assert len(dht.requests) == 1
+
+    with pytest.raises(ValueError):
+        get_outputs(dht, "missing", 1, 0)
+    assert cache.stats()["entries"] == 2
+
+
+class FutureDHT:
+    """Answers get(..., return_future=True) at once from `values`, except for `hang`, which is resolved by hand."""
+
+    def __init__(self, values, hang=()):
+        self.values = values
+        self.hang = set(hang)
+        self.pending = {}
+        self.kwargs = []
+
+    def get(self, key, return_future=False, **kwargs):
+        assert return_future
+        self.kwargs.append(kwargs)
+        value = self.values.get(key)
+        if isinstance(value, Exception) and key not in self.hang:
+            raise value
+        future = Future()
+        if key in self.hang:
+            self.pending[key] = future
+        elif key.endswith("broken"):
+            future.set_exception(ConnectionError("unreachable"))
+        else:
+            future.set_result(value)
+        return future
+
+
+@pytest.fixture
+def latency(monkeypatch):
+    latency = LatencyHistogram()
+    monkeypatch.setattr(dht_utils, "dht_latency", latency)
+    return latency
+
+
+def test_get_dht_values(latency):
+    """Test concurrent lookups: values are unwrapped, and failed or timed out keys left out"""
+    rewards = rewards_key(1, 0)
+    dht = FutureDHT(
+        {
+            rewards: ValueWithExpiration({"peer": ValueWithExpiration(1.0, 100.0)}, 100.0),
+            "rl_swarm_rs": ValueWithExpiration((1, 0), 100.0),
+            "raises": ValueError("bad key"),
+        },
+        hang={"slow"},
+    )
+    keys = [rewards, "rl_swarm_rs", "rl_swarm_rs", "missing", "raises", "broken", "slow"]
+    results = get_dht_values(dht, keys, timeout=0.05, beam_size=8)
+    assert results == {rewards: {"peer": 1.0}, "rl_swarm_rs": (1, 0), "missing": None}
+    # Duplicates are looked up once, and keyword arguments are passed on.
+    assert len(dht.kwargs) == 6
+    assert all(kwargs == {"beam_size": 8} for kwargs in dht.kwargs)
+
+    snapshot = latency.snapshot()
+    assert snapshot["rl_swarm_rewards@8"]["<=0.01"] == 1
+    assert snapshot["rl_swarm_rs@8"]["<=0.01"] == 1
+    other = snapshot["other@8"]
+    # "missing" and "broken" finished; "slow" timed out; "raises" never started.
+    assert (sum(other.values()), other["timeout"]) == (3, 1)
+
+
+def test_get_dht_values_times_out_each_key(latency):
+    """Test that each lookup gets its own timeout from when it starts, with at most max_concurrency in flight"""
+    dht = FutureDHT({"fast": ValueWithExpiration(1, 100.0)}, hang={"slow_a", "slow_b"})
+    stats = {}
+    start = time.monotonic()
+    keys = ["slow_a", "slow_b", "fast", "missing", "broken"]
+    results = get_dht_values(dht, keys, timeout=0.05, max_concurrency=1, stats=stats)
+    # "fast" only started once both slow lookups had used up their own timeouts.
+    assert time.monotonic() - start >= 0.1
+    assert results == {"fast": 1, "missing": None}
+    assert stats == {"timedOut": 2, "fetched": 1, "missing": 1, "failed": 1}
+    assert latency.snapshot()["other"]["timeout"] == 2
+
+
+def test_late_result_after_timeout_is_not_counted_again(latency):
+    """Test that a lookup that times out and finishes later is counted once, as a timeout"""
+    dht = FutureDHT({}, hang={"slow"})
+    assert get_dht_values(dht, ["slow"], timeout=0.01) == {}
+    dht.pending["slow"].set_result(ValueWithExpiration("late", 100.0))
+    counts = latency.snapshot()["other"]
+    assert (sum(counts.values()), counts["timeout"]) == (1, 1)
+
+
+def test_latency_buckets():
+    """Test bucket boundaries and labels"""
+    latency = LatencyHistogram()
+    latency.observe(outputs_key("node", 1, 0), 0.01)
+    latency.observe(outputs_key("node", 1, 0), 0.011)
+    latency.observe(outputs_key("node", 1, 0), 60)
+    counts = latency.snapshot()["rl_swarm_outputs"]
+    assert (counts["<=0.01"], counts["<=0.025"], counts[">10.0"]) == (1, 1, 1)
+    latency.reset()
+    assert latency.snapshot() == {}
@@ -0,0 +1,123 @@
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from .kinesis import DateTimeEncoder
+
+
+class Broadcaster:
+    """
+    Fans events out to many streaming clients. Each event is serialized once
+    into a server-sent events frame and appended to a ring buffer of the last
+    `capacity` frames; clients only hold a cursor into it. A client that falls
+    more than `capacity` frames behind is skipped ahead to the oldest buffered
+    frame, or disconnected if `drop_slow_clients` is set, so slow clients never
+    hold memory.
+
+    `publish` may be called from any thread; subscribers run on one event loop.
+    """
+
+    def __init__(self, capacity: int = 1024, heartbeat_seconds: float = 15, drop_slow_clients: bool = False):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.heartbeat_seconds = heartbeat_seconds
+        self.drop_slow_clients = drop_slow_clients
+        self._lock = threading.Lock()
+        self._frames: Deque[bytes] = deque(maxlen=capacity)
+        # Sequence number of the next frame; the buffer holds the ones just before it.
+        self._next_seq = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Resolved, and replaced, whenever a frame is published; all waiting clients share it.
+        self._waiter: Optional[asyncio.Future] = None
+        self._clients = 0
+        self._skipped = 0
+        self._dropped = 0
+
+    def publish(self, event: str, data: Any) -> int:
+        """Appends an event for every client; returns its sequence number."""
+        payload = json.dumps(data, cls=DateTimeEncoder, separators=(",", ":"))
+        with self._lock:
+            seq = self._next_seq
+            self._frames.append(f"id: {seq}\nevent: {event}\ndata: {payload}\n\n".encode())
+            self._next_seq += 1
+            loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake)
+        return seq
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def cursor(self, last_event_id: Optional[str] = None) -> int:
+        """Where a new client starts: after `last_event_id` when resuming, else at the next event."""
+        with self._lock:
+            if last_event_id is not None:
+                try:
+                    return min(int(last_event_id) + 1, self._next_seq)
+                except ValueError:
+                    pass
+            return self._next_seq
+
+    def read(self, cursor: int, max_frames: int = 256) -> Tuple[List[bytes], int, int]:
+        """Returns (frames from `cursor` on, the cursor after them, how many frames were skipped)."""
+        with self._lock:
+            first = self._next_seq - len(self._frames)
+            skipped = max(first - cursor, 0)
+            cursor = max(cursor, first)
+            start = cursor - first
+            frames = list(itertools.islice(self._frames, start, start + max_frames))
+            if skipped:
+                self._skipped += skipped
+            return frames, cursor + len(frames), skipped
+
+    async def wait(self, cursor: int, timeout: Optional[float]) -> bool:
+        """Waits until a frame at or after `cursor` exists; returns False on timeout."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._loop = loop
+            if cursor < self._next_seq:
+                return True
+        if self._waiter is None or self._waiter.done():
+            self._waiter = loop.create_future()
+        try:
+            # Shielded: a timed-out client must not cancel the future the others wait on.
+            await asyncio.wait_for(asyncio.shield(self._waiter), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Yields SSE frames for one client until it disconnects or is dropped."""
+        cursor = self.cursor(last_event_id)
+        self._clients += 1
+        try:
+            yield f"retry: 5000\n: connected at {cursor}\n\n".encode()
+            while True:
+                frames, cursor, skipped = self.read(cursor)
+                if skipped:
+                    if self.drop_slow_clients:
+                        self._dropped += 1
+                        return
+                    yield f": skipped {skipped} events\n\n".encode()
+                if frames:
+                    yield b"".join(frames)
+                elif not await self.wait(cursor, self.heartbeat_seconds):
+                    yield b": keepalive\n\n"
+        finally:
+            self._clients -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": self._clients,
+                "published": self._next_seq,
+                "bufferedFrames": len(self._frames),
+                "bufferedBytes": sum(len(f) for f in self._frames),
+                "skipped": self._skipped,
+                "dropped": self._dropped,
+            }
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+
+from .broadcast import Broadcaster
+from .kinesis import GossipMessageData, LeaderboardEntry, LeaderboardMessage
+from .snapshot import SnapshotStore, leaderboard_delta
+
+TEST_TIME = datetime(2024, 3, 21, 12, 34, 56, tzinfo=timezone.utc)
+
+
+def parse(frame: bytes):
+    fields = dict(line.split(": ", 1) for line in frame.decode().strip().split("\n"))
+    return int(fields["id"]), fields["event"], json.loads(fields["data"])
+
+
+def test_read_from_cursor():
+    broadcaster = Broadcaster()
+    cursor = broadcaster.cursor()
+    broadcaster.publish("gossip", {"n": 0})
+    broadcaster.publish("leaderboard", {"n": 1})
+
+    frames, cursor, skipped = broadcaster.read(cursor)
+    assert [parse(f) for f in frames] == [(0, "gossip", {"n": 0}), (1, "leaderboard", {"n": 1})]
+    assert (cursor, skipped) == (2, 0)
+    assert broadcaster.read(cursor)[0] == []
+    # Resuming after event 0 replays event 1.
+    assert [parse(f)[0] for f in broadcaster.read(broadcaster.cursor("0"))[0]] == [1]
+
+
+def test_slow_reader_skips_ahead():
+    broadcaster = Broadcaster(capacity=4)
+    for i in range(10):
+        broadcaster.publish("gossip", i)
+    frames, cursor, skipped = broadcaster.read(0)
+    assert skipped == 6
+    assert [parse(f)[2] for f in frames] == [6, 7, 8, 9]
+    assert broadcaster.stats()["bufferedFrames"] == 4
+
+
+def test_fan_out_to_many_clients():
+    broadcaster = Broadcaster(heartbeat_seconds=5)
+
+    async def client(received):
+        stream = broadcaster.stream()
+        await stream.__anext__()  # The greeting.
+        received.append(await stream.__anext__())
+        await stream.aclose()
+
+    async def run():
+        received = []
+        clients = [asyncio.ensure_future(client(received)) for _ in range(2000)]
+        await asyncio.sleep(0.05)
+        assert broadcaster.stats()["clients"] == 2000
+        # Published from another thread, like a publisher's executor.
+        threading.Thread(target=broadcaster.publish, args=("gossip", {"hello": 1})).start()
+        await asyncio.wait_for(asyncio.gather(*clients), 5)
+        return received
+
+    received = asyncio.run(run())
+    assert len(received) == 2000
+    # Serialized once: every client got the same frame object.
+    assert all(frame is received[0] for frame in received)
+    assert parse(received[0]) == (0, "gossip", {"hello": 1})
+    assert broadcaster.stats()["clients"] == 0
+
+
+def test_heartbeat_and_drop():
+    broadcaster = Broadcaster(capacity=2, heartbeat_seconds=0.01, drop_slow_clients=True)
+
+    async def run():
+        stream = broadcaster.stream()
+        await stream.__anext__()
+        assert await stream.__anext__() == b": keepalive\n\n"
+        for i in range(5):
+            broadcaster.publish("gossip", i)
+        return [frame async for frame in stream]
+
+    assert asyncio.run(run()) == []
+    assert broadcaster.stats()["dropped"] == 1
+
+
+def test_snapshot_store_streams_deltas():
+    broadcaster = Broadcaster()
+    store = SnapshotStore(broadcaster=broadcaster)
+    message = GossipMessageData(id="a", peerId="p", peerName="P", message="hi", timestamp=TEST_TIME)
+    store.update_gossip([message])
+    store.update_gossip([message])  # Nothing new.
+
+    def leaderboard(*scores):
+        return LeaderboardMessage(
+            round=1,
+            stage=0,
+            timestamp=TEST_TIME,
+            data=[LeaderboardEntry(peerId=p, peerName=p, rank=i + 1, score=s) for i, (p, s) in enumerate(scores)],
+        )
+
+    store.update_leaderboard(leaderboard(("a", 2.0), ("b", 1.0)))
+    store.update_leaderboard(leaderboard(("a", 2.0), ("b", 1.0)))  # Unchanged.
+    store.update_leaderboard(leaderboard(("a", 2.0), ("c", 1.5)))
+
+    events = [parse(f) for f in broadcaster.read(0)[0]]
+    assert [(seq, event) for seq, event, _ in events] == [(0, "gossip"), (1, "leaderboard"), (2, "leaderboard")]
+    assert [m["id"] for m in events[0][2]["data"]] == ["a"]
+    assert events[2][2]["data"] == [{"peerId": "c", "peerName": "c", "rank": 2, "score": 1.5}]
+    assert events[2][2]["removed"] == ["b"]
+    assert events[2][2]["round"] == 1
+
+    assert leaderboard_delta(None, leaderboard(("a", 1.0)))["data"][0]["peerId"] == "a"
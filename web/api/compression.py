@@ -0,0 +1,215 @@
+import argparse
+import lzma
+import struct
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+try:
+    import zstandard
+except ImportError:  # Optional; only needed for the zstd codec.
+    zstandard = None
+
+# Compression envelope for encoded game_tree blobs.
+#
+#   byte 0     0xE0 | codec id
+#   byte 1     flags (bit 0: a preset dictionary was used)
+#   [4 bytes]  big-endian id of the preset dictionary, if flagged
+#   ...        compressed inner blob (v1 or v2)
+#
+# Uncompressed blobs start with 0x00 (v1) or 0x02/0x12 (v2), so the high nibble
+# of the first byte tells enveloped blobs apart.
+
+_ENVELOPE_MAGIC = 0xE0
+_FLAG_DICTIONARY = 0x01
+_DICT_ID = struct.Struct(">I")
+
+CODEC_ZLIB = "zlib"
+CODEC_LZMA = "lzma"
+CODEC_ZSTD = "zstd"
+_CODEC_IDS = {CODEC_ZLIB: 1, CODEC_LZMA: 2, CODEC_ZSTD: 3}
+_CODEC_NAMES = {v: k for k, v in _CODEC_IDS.items()}
+
+# Blobs smaller than this are stored as-is; the envelope would not pay for itself.
+DEFAULT_MIN_SIZE = 512
+# Upper bound on decompressed size, so a hostile peer cannot send a zip bomb.
+DEFAULT_MAX_OUTPUT_SIZE = 64 * 1024 * 1024
+
+# Preset dictionaries known to this process, keyed by dictionary id.
+_DICTIONARIES: Dict[int, bytes] = {}
+
+
+class CompressionError(Exception):
+    """Raised when a blob cannot be compressed or decompressed"""
+
+    pass
+
+
+def dictionary_id(dictionary: bytes) -> int:
+    return zlib.crc32(dictionary)
+
+
+def register_dictionary(dictionary: bytes) -> int:
+    """Makes a preset dictionary available for decompression and returns its id."""
+    dict_id = dictionary_id(dictionary)
+    _DICTIONARIES[dict_id] = dictionary
+    return dict_id
+
+
+def load_dictionary(path: str | Path) -> bytes:
+    """Reads and registers a dictionary written by `train_dictionary`."""
+    dictionary = Path(path).read_bytes()
+    register_dictionary(dictionary)
+    return dictionary
+
+
+def is_compressed(b: bytes | bytearray | memoryview) -> bool:
+    return len(b) > 0 and b[0] & 0xF0 == _ENVELOPE_MAGIC
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise CompressionError("The zstd codec requires the zstandard package")
+
+
+def compress(
+    blob: bytes,
+    codec: str = CODEC_ZLIB,
+    dictionary: bytes | None = None,
+    level: int | None = None,
+    min_size: int = DEFAULT_MIN_SIZE,
+) -> bytes:
+    """
+    Wraps an encoded blob in a compression envelope. Blobs under `min_size`
+    bytes, or that do not shrink, are returned unchanged.
+    """
+    if codec not in _CODEC_IDS:
+        raise CompressionError(f"Unsupported codec: {codec}; supported codecs are {list(_CODEC_IDS)}.")
+    if len(blob) < min_size:
+        return blob
+
+    if codec == CODEC_ZLIB:
+        compressor = zlib.compressobj(
+            level=zlib.Z_DEFAULT_COMPRESSION if level is None else level,
+            **({"zdict": dictionary} if dictionary else {}),
+        )
+        body = compressor.compress(blob) + compressor.flush()
+    elif codec == CODEC_LZMA:
+        if dictionary:
+            raise CompressionError("The lzma codec does not support preset dictionaries")
+        body = lzma.compress(blob, preset=6 if level is None else level)
+    else:
+        _require_zstd()
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        body = zstandard.ZstdCompressor(
+            level=3 if level is None else level, dict_data=dict_data
+        ).compress(blob)
+
+    header = bytearray((_ENVELOPE_MAGIC | _CODEC_IDS[codec], _FLAG_DICTIONARY if dictionary else 0))
+    if dictionary:
+        header += _DICT_ID.pack(dictionary_id(dictionary))
+    if len(header) + len(body) >= len(blob):
+        return blob
+    return bytes(header) + body
+
+
+def decompress(
+    b: bytes | bytearray | memoryview, max_output_size: int = DEFAULT_MAX_OUTPUT_SIZE
+) -> bytes:
+    """Unwraps a compression envelope and returns the inner encoded blob."""
+    view = memoryview(b).cast("B")
+    if not is_compressed(view):
+        raise CompressionError("Blob does not start with a compression envelope")
+
+    codec = _CODEC_NAMES.get(view[0] & 0x0F)
+    if codec is None:
+        raise CompressionError(f"Unsupported codec id: {view[0] & 0x0F}")
+    i = 2
+    dictionary = None
+    if view[1] & _FLAG_DICTIONARY:
+        dict_id, = _DICT_ID.unpack_from(view, i)
+        i += _DICT_ID.size
+        dictionary = _DICTIONARIES.get(dict_id)
+        if dictionary is None:
+            raise CompressionError(f"Unknown preset dictionary: {dict_id:#010x}")
+    body = view[i:]
+
+    try:
+        if codec == CODEC_ZLIB:
+            decompressor = zlib.decompressobj(**({"zdict": dictionary} if dictionary else {}))
+            blob = decompressor.decompress(body, max_output_size)
+            truncated = not decompressor.eof
+        elif codec == CODEC_LZMA:
+            decompressor = lzma.LZMADecompressor()
+            blob = decompressor.decompress(body, max_output_size)
+            truncated = not decompressor.eof
+        else:
+            _require_zstd()
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            blob = zstandard.ZstdDecompressor(dict_data=dict_data).decompress(
+                body, max_output_size=max_output_size
+            )
+            truncated = False
+    except (zlib.error, lzma.LZMAError) as e:
+        raise CompressionError(f"Failed to decompress {codec} blob: {e}")
+    except Exception as e:
+        if zstandard is not None and isinstance(e, zstandard.ZstdError):
+            raise CompressionError(f"Failed to decompress {codec} blob: {e}")
+        raise
+
+    if truncated:
+        raise CompressionError(f"Compressed blob is truncated or exceeds {max_output_size} bytes")
+    return blob
+
+
+def _zlib_dictionary(samples: List[bytes], size: int, gram: int = 24) -> bytes:
+    # Keeps the byte runs that recur across the most samples. zlib matches most
+    # cheaply against the end of the dictionary, so the commonest runs go last.
+    doc_freq = Counter()
+    for sample in samples:
+        doc_freq.update({sample[i : i + gram] for i in range(0, max(len(sample) - gram, 0) + 1, gram // 2)})
+    chunks = []
+    total = 0
+    for chunk, n in doc_freq.most_common():
+        if n < 2 or total + len(chunk) > size:
+            break
+        chunks.append(chunk)
+        total += len(chunk)
+    return b"".join(reversed(chunks))
+
+
+def train_dictionary(
+    samples: Iterable[bytes], size: int = 32 * 1024, codec: str = CODEC_ZLIB
+) -> bytes:
+    """
+    Builds a preset dictionary from sample encoded blobs, e.g. payloads captured
+    from a reasoning-gym swarm. zlib only uses the last 32 KiB of a dictionary.
+    """
+    samples = [bytes(s) for s in samples]
+    if codec == CODEC_ZSTD:
+        _require_zstd()
+        return zstandard.train_dictionary(size, samples).as_bytes()
+    if codec == CODEC_ZLIB:
+        return _zlib_dictionary(samples, min(size, 32 * 1024))
+    raise CompressionError(f"Codec {codec} does not support preset dictionaries")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Train a preset dictionary from sample blobs.")
+    parser.add_argument("samples", nargs="+", help="files each holding one encoded blob")
+    parser.add_argument("-o", "--output", required=True, help="where to write the dictionary")
+    parser.add_argument("--size", type=int, default=32 * 1024, help="dictionary size in bytes")
+    parser.add_argument("--codec", choices=[CODEC_ZLIB, CODEC_ZSTD], default=CODEC_ZLIB)
+    return parser.parse_args()
+
+
+def main(args):
+    samples = [Path(p).read_bytes() for p in args.samples]
+    dictionary = train_dictionary(samples, size=args.size, codec=args.codec)
+    Path(args.output).write_bytes(dictionary)
+    print(f"wrote {len(dictionary)} byte dictionary {dictionary_id(dictionary):#010x} to {args.output}")
+
+
+if __name__ == "__main__":
+    main(parse_arguments())
@@ -0,0 +1,88 @@
+import pytest
+
+from .compression import (
+    CODEC_LZMA,
+    CODEC_ZLIB,
+    CODEC_ZSTD,
+    CompressionError,
+    compress,
+    decompress,
+    is_compressed,
+    register_dictionary,
+    train_dictionary,
+)
+from .game_tree import WIRE_V2, from_bytes, to_bytes
+from .game_tree_test import make_payload_dict
+from .game_tree_view import view
+
+
+def make_blob(n_payloads=20):
+    return to_bytes([make_payload_dict() for _ in range(n_payloads)])
+
+
+@pytest.mark.parametrize("codec", [CODEC_ZLIB, CODEC_LZMA])
+def test_round_trip(codec):
+    """Test compressing and decompressing with the stdlib codecs"""
+    blob = make_blob()
+    compressed = compress(blob, codec=codec)
+    assert is_compressed(compressed)
+    assert len(compressed) < len(blob)
+    assert decompress(compressed) == blob
+
+
+def test_zstd_round_trip():
+    """Test the optional zstd codec"""
+    pytest.importorskip("zstandard")
+    blob = make_blob()
+    assert decompress(compress(blob, codec=CODEC_ZSTD)) == blob
+
+
+def test_small_blobs_are_not_compressed():
+    """Test that blobs under the size threshold skip the envelope"""
+    blob = to_bytes("short")
+    assert compress(blob) == blob
+    assert not is_compressed(blob)
+
+
+@pytest.mark.parametrize("version", [1, WIRE_V2])
+def test_from_bytes_detects_envelope(version):
+    """Test that from_bytes and view unwrap compressed blobs of either version"""
+    obj = [make_payload_dict() for _ in range(20)]
+    compressed = compress(to_bytes(obj, version=version))
+    assert is_compressed(compressed)
+    assert from_bytes(compressed) == obj
+    assert view(compressed)[0]["batch_0"][0]["actions"][1] == "ünïcødé"
+
+
+def test_preset_dictionary():
+    """Test that a trained dictionary shrinks a small blob and round-trips"""
+    samples = [to_bytes(make_payload_dict()) for _ in range(10)]
+    dictionary = train_dictionary(samples)
+    register_dictionary(dictionary)
+
+    blob = to_bytes(make_payload_dict())
+    with_dict = compress(blob, dictionary=dictionary, min_size=0)
+    without_dict = compress(blob, min_size=0)
+    assert len(with_dict) < len(without_dict)
+    assert from_bytes(with_dict) == make_payload_dict()
+
+
+def test_unknown_dictionary():
+    """Test that blobs compressed with an unregistered dictionary are rejected"""
+    blob = make_blob()
+    compressed = compress(blob, dictionary=b"never registered " * 64)
+    with pytest.raises(CompressionError, match="Unknown preset dictionary"):
+        decompress(compressed)
+
+
+def test_max_output_size():
+    """Test that decompression stops at the output size limit"""
+    compressed = compress(b"\x00" * 100_000)
+    with pytest.raises(CompressionError, match="exceeds"):
+        decompress(compressed, max_output_size=1000)
+
+
+def test_unsupported_codec():
+    """Test that unknown codecs are rejected"""
+    with pytest.raises(CompressionError, match="Unsupported codec"):
+        compress(make_blob(), codec="brotli")
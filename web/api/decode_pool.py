@@ -0,0 +1,121 @@
+import multiprocessing
+import random
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .game_tree_view import PayloadBatchView, view
+
+# (question, source dataset, sampled action) for one payload.
+GossipFields = Tuple[str, str, str]
+
+
+def iter_gossip_fields(blob: bytes) -> Iterator[GossipFields]:
+    """
+    Reads the fields gossip is built from out of one peer's encoded
+    {batch_id: [Payload, ...]} value, sampling one action per payload.
+    Nothing is decoded until the iterator is consumed.
+    """
+    root = view(blob)
+    if isinstance(root, PayloadBatchView):
+        # Columnar batches: read just the three fields across all payloads.
+        questions = root.column("world_state", "environment_states", "question")
+        datasets = root.column("world_state", "environment_states", "metadata", "source_dataset")
+        entries = zip(questions, datasets, root.column("actions"))
+    else:
+        # Walk the encoded payloads lazily; only the fields read below are decoded.
+        entries = (
+            (
+                payload["world_state"]["environment_states"]["question"],
+                payload["world_state"]["environment_states"]["metadata"]["source_dataset"],
+                payload["actions"],
+            )
+            for _, payloads in root.items()
+            for payload in payloads
+        )
+    for question, source_dataset, actions in entries:
+        yield question, source_dataset, random.choice(actions) if actions else ""
+
+
+def extract_gossip_fields(blob: bytes) -> List[GossipFields]:
+    """All of iter_gossip_fields(blob), as a list that can be sent back from a worker."""
+    return list(iter_gossip_fields(blob))
+
+
+def _timed_extract(blob: bytes) -> Tuple[List[GossipFields], float]:
+    start = time.perf_counter()
+    fields = extract_gossip_fields(blob)
+    return fields, time.perf_counter() - start
+
+
+class DecodePool:
+    """
+    Decodes peer blobs on a process pool so that decoding does not hold the
+    GIL of the web server. Only the small extracted records come back.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        # Spawned rather than forked: the server process runs hivemind and uvicorn threads.
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._busy_seconds = 0.0
+
+    def submit(self, blob: bytes) -> "Future[List[GossipFields]]":
+        """Queues a blob for decoding; the future resolves to its gossip fields."""
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+        inner = self._executor.submit(_timed_extract, blob)
+        outer = Future()
+        inner.add_done_callback(lambda f: self._on_done(f, outer))
+        outer.add_done_callback(lambda f: f.cancelled() and inner.cancel())
+        return outer
+
+    def _on_done(self, inner: Future, outer: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if inner.cancelled():
+                self._cancelled += 1
+            elif inner.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+                self._busy_seconds += inner.result()[1]
+        try:
+            if inner.cancelled():
+                outer.cancel()
+            elif inner.exception() is not None:
+                outer.set_exception(inner.exception())
+            else:
+                outer.set_result(inner.result()[0])
+        except InvalidStateError:
+            pass  # The caller cancelled it first.
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilization, as reported by the health endpoint."""
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            return {
+                "workers": self.max_workers,
+                "inFlight": self._in_flight,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "busySeconds": round(self._busy_seconds, 3),
+                # Fraction of the pool's total capacity spent decoding since it started.
+                "utilization": round(self._busy_seconds / (elapsed * self.max_workers), 4) if elapsed > 0 else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
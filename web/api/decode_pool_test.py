@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from .decode_pool import DecodePool, extract_gossip_fields
+from .game_tree import WIRE_V2, to_bytes
+from .game_tree_test import make_batch, make_payload_dict
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_extract_gossip_fields(columnar):
+    """Test that each payload yields its question, dataset and one of its actions"""
+    obj = make_batch(3)
+    fields = extract_gossip_fields(to_bytes(obj, version=WIRE_V2, columnar=columnar))
+    assert [question for question, _, _ in fields] == [f"What is {k}+{k}?" for k in range(3)]
+    for _, dataset, action in fields:
+        assert dataset == "basic_arithmetic"
+        assert action in obj["batch_0"][0].actions
+
+
+def test_decode_pool():
+    """Test decoding on worker processes and the utilization stats"""
+    pool = DecodePool(max_workers=1)
+    try:
+        blob = to_bytes(make_payload_dict())
+        assert pool.submit(blob).result(timeout=60)[0][0] == "What is 2+2?"
+        with pytest.raises(Exception):
+            pool.submit(b"\x00not a blob").result(timeout=60)
+
+        # Stats are updated by a callback just after the future resolves.
+        time.sleep(0.1)
+        stats = pool.stats()
+        assert stats["workers"] == 1
+        assert stats["inFlight"] == 0
+        assert (stats["submitted"], stats["completed"], stats["failed"]) == (2, 1, 1)
+        assert 0 <= stats["utilization"] <= 1
+    finally:
+        pool.shutdown()
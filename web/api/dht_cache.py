@@ -0,0 +1,195 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from hivemind.utils import ValueWithExpiration, get_dht_time
+
+
+class CachedDHT:
+    """
+    Read-through cache in front of a hivemind DHT client, shared by every
+    publisher and API handler of the server so that lookups of the same key
+    within a few seconds cost one network round-trip.
+
+    Entries live until the value's DHT expiration or `max_ttl_seconds`,
+    whichever is sooner; missing keys are remembered for `negative_ttl_seconds`.
+    For keys with subkeys, each subkey's own expiration is honored when an
+    entry is read. Concurrent lookups of a key share one in-flight DHT request,
+    and at most `max_entries` keys are kept, least recently used evicted first.
+
+    `get` mirrors `DHT.get`; everything else is passed through to the DHT.
+    """
+
+    def __init__(
+        self,
+        dht,
+        max_entries: int = 4096,
+        max_ttl_seconds: float = 10.0,
+        negative_ttl_seconds: float = 1.0,
+        clock: Callable[[], float] = get_dht_time,
+    ):
+        self.dht = dht
+        self.max_entries = max_entries
+        self.max_ttl_seconds = max_ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # cache key -> (expires at, earliest subkey expiration, value)
+        self._entries: OrderedDict[Hashable, Tuple[float, float, Optional[ValueWithExpiration]]] = OrderedDict()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __getattr__(self, name: str):
+        return getattr(self.dht, name)
+
+    def get(self, key, latest: bool = False, return_future: bool = False, subkey: Any = None, **kwargs):
+        """
+        Like `DHT.get`. With `subkey`, returns just that subkey's value, from
+        the same cache entry as the whole key.
+        """
+        future = self._lookup((key, latest, tuple(sorted(kwargs.items()))), key, latest, kwargs)
+        if subkey is not None:
+            future = _chain(future, lambda value: _subkey(value, subkey))
+        if not return_future:
+            return future.result()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return future
+        return _to_asyncio(future)
+
+    def _lookup(self, cache_key: Hashable, key, latest: bool, kwargs: Dict[str, Any]) -> Future:
+        with self._lock:
+            now = self._clock()
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                future = Future()
+                future.set_result(_unexpired(entry[2], entry[1], now))
+                return future
+            if entry is not None:
+                del self._entries[cache_key]
+
+            future = self._in_flight.get(cache_key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            self.misses += 1
+            future = Future()
+            self._in_flight[cache_key] = future
+
+        try:
+            request = self.dht.get(key, latest=latest, return_future=True, **kwargs)
+        except Exception as e:
+            self._done(cache_key, future, None, e)
+            return future
+        request.add_done_callback(lambda f: self._on_result(cache_key, future, f))
+        return future
+
+    def _on_result(self, cache_key: Hashable, future: Future, request: Future) -> None:
+        try:
+            value = request.result()
+        except BaseException as e:
+            self._done(cache_key, future, None, e)
+        else:
+            self._done(cache_key, future, value, None)
+
+    def _done(self, cache_key: Hashable, future: Future, value, error: Optional[BaseException]) -> None:
+        with self._lock:
+            self._in_flight.pop(cache_key, None)
+            if error is None:
+                now = self._clock()
+                if value is None:
+                    expires, earliest = now + self.negative_ttl_seconds, float("inf")
+                else:
+                    expires = min(value.expiration_time, now + self.max_ttl_seconds)
+                    earliest = float("inf")
+                    if isinstance(value.value, dict):
+                        earliest = min((v.expiration_time for v in value.value.values()), default=earliest)
+                self._entries[cache_key] = (expires, earliest, value)
+                self._entries.move_to_end(cache_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        # Errors are not cached; the next caller retries.
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    def invalidate(self, key=None) -> None:
+        """Drops cached entries for `key`, or all of them."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                for cache_key in [k for k in self._entries if k[0] == key]:
+                    del self._entries[cache_key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "inFlight": len(self._in_flight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hitRate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _unexpired(value: Optional[ValueWithExpiration], earliest: float, now: float) -> Optional[ValueWithExpiration]:
+    if value is None or earliest > now:
+        return value
+    # Some subkeys expired since the value was fetched.
+    live = {k: v for k, v in value.value.items() if v.expiration_time > now}
+    return ValueWithExpiration(live, value.expiration_time) if live else None
+
+
+def _subkey(value: Optional[ValueWithExpiration], subkey: Any) -> Optional[ValueWithExpiration]:
+    if value is None or not isinstance(value.value, dict):
+        return None
+    return value.value.get(subkey)
+
+
+def _chain(future: Future, fn: Callable[[Any], Any]) -> Future:
+    chained = Future()
+
+    def done(f: Future):
+        if f.exception() is not None:
+            chained.set_exception(f.exception())
+        else:
+            chained.set_result(fn(f.result()))
+
+    future.add_done_callback(done)
+    return chained
+
+
+def _to_asyncio(future: Future) -> asyncio.Future:
+    # One asyncio future per caller, so that a caller giving up cannot cancel
+    # the lookup shared with the others.
+    loop = asyncio.get_running_loop()
+    result = loop.create_future()
+
+    def copy(f: Future):
+        if result.done():
+            return
+        if f.exception() is not None:
+            result.set_exception(f.exception())
+        else:
+            result.set_result(f.result())
+
+    def schedule(f: Future):
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(copy, f)
+
+    future.add_done_callback(schedule)
+    return result
@@ -0,0 +1,156 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+import pytest
+from hivemind.utils import ValueWithExpiration
+
+from .dht_cache import CachedDHT
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDHT:
+    """Answers get(..., return_future=True) with futures resolved by hand, or at once from `values`."""
+
+    def __init__(self, values=None, manual=False):
+        self.values = values or {}
+        self.manual = manual
+        self.requests = []
+        self.peer_id = "me"
+
+    def get(self, key, latest=False, return_future=False, **kwargs):
+        assert return_future
+        future = Future()
+        self.requests.append((key, future))
+        if not self.manual:
+            value = self.values.get(key)
+            if isinstance(value, Exception):
+                future.set_exception(value)
+            else:
+                future.set_result(value)
+        return future
+
+
+def make_cache(dht, **kwargs):
+    clock = FakeClock()
+    return CachedDHT(dht, clock=clock, **kwargs), clock
+
+
+def test_read_through_and_expiration():
+    dht = FakeDHT({"a": ValueWithExpiration("x", 1005.0), "b": ValueWithExpiration("y", 2000.0)})
+    cache, clock = make_cache(dht, max_ttl_seconds=10)
+
+    assert cache.get("a").value == "x"
+    assert cache.get("a").value == "x"
+    assert len(dht.requests) == 1
+
+    # "a" expires with its DHT value, "b" after the cache's own TTL.
+    cache.get("b")
+    clock.now += 6
+    cache.get("a")
+    cache.get("b")
+    assert [k for k, _ in dht.requests] == ["a", "b", "a"]
+    clock.now += 5
+    cache.get("b")
+    assert [k for k, _ in dht.requests] == ["a", "b", "a", "b"]
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 4)
+    # Other attributes are the DHT's.
+    assert cache.peer_id == "me"
+
+
+def test_subkeys_expire_individually():
+    rewards = {
+        "peer1": ValueWithExpiration(1.0, 1003.0),
+        "peer2": ValueWithExpiration(2.0, 1100.0),
+    }
+    dht = FakeDHT({"rewards": ValueWithExpiration(rewards, 1100.0)})
+    cache, clock = make_cache(dht)
+
+    assert set(cache.get("rewards").value) == {"peer1", "peer2"}
+    clock.now += 5
+    assert set(cache.get("rewards").value) == {"peer2"}
+    assert cache.get("rewards", subkey="peer2").value == 2.0
+    assert cache.get("rewards", subkey="peer1") is None
+    assert len(dht.requests) == 1
+
+
+def test_missing_keys_and_errors():
+    dht = FakeDHT({"broken": ConnectionError("unreachable")})
+    cache, clock = make_cache(dht, negative_ttl_seconds=1)
+
+    assert cache.get("missing") is None
+    assert cache.get("missing") is None
+    assert len(dht.requests) == 1
+    clock.now += 2
+    cache.get("missing")
+    assert len(dht.requests) == 2
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            cache.get("broken")
+    # Errors are not cached.
+    assert len(dht.requests) == 4
+
+
+def test_concurrent_lookups_share_one_request():
+    dht = FakeDHT(manual=True)
+    cache, _ = make_cache(dht)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("round"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+
+    async def wait():
+        return await cache.get("round", return_future=True)
+
+    while not dht.requests:
+        pass
+    dht.requests[0][1].set_result(ValueWithExpiration("data", 2000.0))
+    for thread in threads:
+        thread.join()
+    assert asyncio.run(wait()).value == "data"
+
+    assert [r.value for r in results] == ["data"] * 5
+    assert len(dht.requests) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] + stats["coalesced"] == 5
+
+
+def test_async_caller_timing_out_does_not_cancel_others():
+    dht = FakeDHT(manual=True)
+    cache, _ = make_cache(dht)
+
+    async def run():
+        impatient = cache.get("key", return_future=True)
+        patient = cache.get("key", return_future=True)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(impatient, 0.01)
+        dht.requests[0][1].set_result(ValueWithExpiration("v", 2000.0))
+        return await patient
+
+    assert asyncio.run(run()).value == "v"
+    assert len(dht.requests) == 1
+
+
+def test_size_bound():
+    dht = FakeDHT({k: ValueWithExpiration(k, 2000.0) for k in "abcd"})
+    cache, _ = make_cache(dht, max_entries=2)
+    for key in "abc":
+        cache.get(key)
+    cache.get("c")
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+    cache.get("a")
+    assert [k for k, _ in dht.requests] == ["a", "b", "c", "a"]
+
+    cache.invalidate("a")
+    cache.get("a")
+    assert len(dht.requests) == 5
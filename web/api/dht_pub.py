@@ -1,33 +1,54 @@
+import asyncio
+import concurrent.futures
+import functools
 import hashlib
 import logging
 import threading
 import time
 import uuid
-import random
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
-from typing import Any, Optional
-from .game_tree import Payload, from_bytes
+from typing import Any, Iterable, Iterator, Optional
 
 from hivemind.dht import DHT
 
 from hivemind_exp.chain_utils import ModalSwarmCoordinator
-from hivemind_exp.dht_utils import get_dht_value, outputs_key, rewards_key
+from hivemind_exp.dht_utils import (
+    get_dht_value,
+    get_dht_values,
+    hash_keys,
+    outputs_key,
+    rewards_key,
+    unwrap_dht_value,
+)
 from hivemind_exp.name_utils import get_name_from_peer_id
 
+from .decode_pool import DecodePool, GossipFields, iter_gossip_fields
+from .gossip_sampler import FairReservoirSampler
+from .gossip_utils import stage_message
 from .kinesis import (
     GossipMessage,
     GossipMessageData,
     Kinesis,
+    LeaderboardEntry,
+    LeaderboardMessage,
 )
+from .leaderboard import TopKLeaderboard
+from .poll_schedule import AdaptivePollSchedule
+from .seen_cache import SeenCache
+from .snapshot import SnapshotStore
 
 
 class BaseDHTPublisher(ABC):
     """
     Base class for DHT publishers that poll the DHT for changes and publish data to Kinesis.
-    This is an abstract base class that cannot be instantiated directly.
+    This is an abstract base class that cannot be instantiated directly; subclasses
+    pick how they poll by deriving from ThreadedDHTPublisher or AsyncDHTPublisher.
     """
 
+    # Whether the health check fails when this publisher goes stale.
+    required_for_health = True
+
     def __init__(
         self,
         dht: DHT,
@@ -35,6 +56,8 @@ class BaseDHTPublisher(ABC):
         logger: logging.Logger,
         poll_interval_seconds: int = 300,  # 5 minutes default
         coordinator: Optional[ModalSwarmCoordinator] = None,
+        poll_schedule: Optional[AdaptivePollSchedule] = None,
+        snapshots: Optional[SnapshotStore] = None,
     ):
         """
         Initialize the DHT publisher.
@@ -45,12 +68,16 @@ class BaseDHTPublisher(ABC):
             logger: Logger instance
             poll_interval_seconds: How often to poll the DHT (in seconds)
             coordinator: The coordinator to get round and stage information from
+            poll_schedule: Adaptive schedule to use instead of the fixed interval
+            snapshots: Store to keep the latest published data in, for the API
         """
         self.dht = dht
         self.kinesis_client = kinesis_client
         self.logger = logger
         self.poll_interval_seconds = poll_interval_seconds
         self.coordinator = coordinator
+        self.poll_schedule = poll_schedule
+        self.snapshots = snapshots
 
         # Thread control
         self._stop_event = threading.Event()
@@ -62,40 +89,72 @@ class BaseDHTPublisher(ABC):
         self.current_stage = -1
         self.last_polled = None
         self.poll_id = None
+        # Ids of published gossip, for subclasses that de-duplicate across polls.
+        self._published: Optional[SeenCache] = None
 
         # Store the class name for use in logging
         self.class_name = self.__class__.__name__
 
         self.logger.info(f"{self.class_name} initialized")
 
+    @abstractmethod
     def start(self):
-        """Start the polling thread."""
-        if self._poll_thread:
-            self.logger.warning(f"{self.class_name} is already running")
-            return
-
-        self.logger.info(f"{self.class_name} starting")
-
-        self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
-        self._poll_thread.start()
-        self.running = True
-        self.logger.info(f"{self.class_name} started")
+        """Start polling."""
 
+    @abstractmethod
     def stop(self):
-        """Stop the polling thread."""
-        if not self._poll_thread:
-            self.logger.warning(f"{self.class_name} is not running")
-            return
+        """Stop polling."""
 
-        self._stop_event.set()
-        self._poll_thread.join(timeout=5)
-        self.running = False
-        self.logger.info(f"{self.class_name} stopped")
+    async def aclose(self):
+        """Stop polling and wait for an in-flight publish to finish."""
+        await asyncio.get_running_loop().run_in_executor(None, self.stop)
 
     def get_last_polled(self):
         """Get the time of the last poll."""
         return self.last_polled
 
+    @property
+    def max_staleness_seconds(self) -> float:
+        """Longest expected gap between polls; the health check allows a grace period on top."""
+        if self.poll_schedule is not None:
+            return self.poll_schedule.max_staleness_seconds
+        return self.poll_interval_seconds
+
+    def _next_poll_delay(self, round_and_stage: tuple[int, int]) -> float:
+        """Delay before the next poll, given the round and stage before the last one."""
+        if self.poll_schedule is None:
+            return self.poll_interval_seconds
+        changed = round_and_stage != (self.current_round, self.current_stage)
+        return self.poll_schedule.next_delay(changed)
+
+    def _round_check_delay(self) -> Optional[float]:
+        """Time until the next check for a round/stage change between polls; None to not check."""
+        if self.poll_schedule is None or self.coordinator is None:
+            return None
+        return self.poll_schedule.next_check_delay(time.monotonic())
+
+    def _round_changed(self) -> bool:
+        """Asks the coordinator whether the round or stage moved on since the last poll."""
+        try:
+            return tuple(self.coordinator.get_round_and_stage()) != (self.current_round, self.current_stage)
+        except Exception as e:
+            # The next poll asks again and reports the error.
+            self.logger.warning(
+                "Error checking round/stage",
+                extra={"class": self.class_name, "error": str(e), "poll_id": self.poll_id},
+            )
+            return False
+
+    def stats(self) -> dict[str, Any]:
+        """Publisher metrics, as reported by the health endpoint."""
+        return {
+            "running": self.running,
+            "round": self.current_round,
+            "stage": self.current_stage,
+            "lastPolled": self.last_polled.isoformat() if self.last_polled else None,
+            "maxStalenessSeconds": self.max_staleness_seconds,
+        }
+
     def _get_rewards_data(
         self, round_num: int, stage_num: int
     ) -> dict[str, Any] | None:
@@ -113,6 +172,86 @@ class BaseDHTPublisher(ABC):
     def _get_peer_name_from_id(self, peer_id: str) -> str:
         return get_name_from_peer_id(peer_id) or peer_id
 
+    def _mark_published(self, messages: list[GossipMessageData]):
+        """Remembers delivered gossip, for subclasses that de-duplicate across polls."""
+        if self._published is not None:
+            self._published.add_all(m.id for m in messages)
+
+    def _publish_gossip(self, gossip: list[tuple[float, dict[str, Any]]]):
+        """
+        Publish gossip data to Kinesis.
+
+        Args:
+            gossip_data: The gossip data from the DHT
+        """
+        try:
+            if not gossip:
+                self.logger.info("No gossip data to publish")
+                return
+
+            self.logger.info(
+                "Publishing gossip messages", extra={"num_messages": len(gossip)}
+            )
+            gossip_data = []
+
+            for ts, g in gossip:
+                dt = datetime.fromtimestamp(ts, tz=timezone.utc)
+                gossip_data.append(
+                    GossipMessageData(
+                        id=g["id"],
+                        peerId=g["nodeId"],
+                        peerName=g["node"],
+                        message=g["message"],
+                        timestamp=dt,
+                        dataset=g.get("dataset"),
+                    )
+                )
+
+            if len(gossip_data) > 0:
+                if self.snapshots is not None:
+                    self.snapshots.update_gossip(gossip_data)
+                # Marked as published only once delivered, so records the
+                # producer drops are sent again by a later poll.
+                self.kinesis_client.put_gossip(
+                    GossipMessage(type="gossip", data=gossip_data), on_delivered=self._mark_published
+                )
+                self.logger.info("Successfully published gossip")
+
+        except Exception as e:
+            self.logger.error(
+                "Error publishing gossip",
+                extra={"error": str(e), "poll_id": self.poll_id},
+            )
+
+class ThreadedDHTPublisher(BaseDHTPublisher):
+    """
+    A DHT publisher whose poll loop runs on a dedicated thread.
+    """
+
+    def start(self):
+        """Start the polling thread."""
+        if self._poll_thread:
+            self.logger.warning(f"{self.class_name} is already running")
+            return
+
+        self.logger.info(f"{self.class_name} starting")
+
+        self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self._poll_thread.start()
+        self.running = True
+        self.logger.info(f"{self.class_name} started")
+
+    def stop(self):
+        """Stop the polling thread."""
+        if not self._poll_thread:
+            self.logger.warning(f"{self.class_name} is not running")
+            return
+
+        self._stop_event.set()
+        self._poll_thread.join(timeout=5)
+        self.running = False
+        self.logger.info(f"{self.class_name} stopped")
+
     def _poll_loop(self):
         """Main polling loop."""
 
@@ -128,8 +267,23 @@ class BaseDHTPublisher(ABC):
                     "poll_id": self.poll_id,
                 },
             )
+            round_and_stage = (self.current_round, self.current_stage)
             self._poll_once()
-            time.sleep(self.poll_interval_seconds)
+            self._wait_for_next_poll(self._next_poll_delay(round_and_stage))
+
+    def _wait_for_next_poll(self, delay: float):
+        """Waits `delay` seconds, or until stop() or a round/stage change."""
+        deadline = time.monotonic() + delay
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            check_delay = self._round_check_delay()
+            # Woken early by stop().
+            if self._stop_event.wait(remaining if check_delay is None else min(remaining, check_delay)):
+                return
+            if check_delay is not None and self._round_changed():
+                return
 
     @abstractmethod
     def _poll_once(self):
@@ -140,7 +294,154 @@ class BaseDHTPublisher(ABC):
         pass
 
 
-class GossipDHTPublisher(BaseDHTPublisher):
+class AsyncDHTPublisher(BaseDHTPublisher):
+    """
+    A DHT publisher whose poll loop is a task on an asyncio event loop instead of
+    a dedicated thread. Started from inside a running loop (e.g. a uvicorn startup
+    hook) it runs on that loop; otherwise it starts its own loop on a daemon thread.
+    DHT reads use hivemind's future-returning `get`, and blocking calls (the
+    coordinator, decoding, publishing) run on the loop's default executor.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._publish_task: Optional[asyncio.Future] = None
+
+    def start(self):
+        """Start the polling task."""
+        if self._task:
+            self.logger.warning(f"{self.class_name} is already running")
+            return
+
+        self.logger.info(f"{self.class_name} starting")
+        self._stop_event.clear()
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = asyncio.new_event_loop()
+            self._poll_thread = threading.Thread(target=self._run_own_loop, daemon=True)
+
+        self._task = self._loop.create_task(self._poll_loop_async())
+        if self._poll_thread:
+            self._poll_thread.start()
+        self.running = True
+        self.logger.info(f"{self.class_name} started")
+
+    def stop(self):
+        """Stop the polling task, letting an in-flight publish finish."""
+        if not self._task:
+            self.logger.warning(f"{self.class_name} is not running")
+            return
+
+        self._stop_event.set()
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._poll_thread:
+            self._poll_thread.join(timeout=5)
+            self._poll_thread = None
+        self._task = None
+        self.running = False
+        self.logger.info(f"{self.class_name} stopped")
+
+    async def aclose(self):
+        """
+        Stop polling and wait for the poll task and any in-flight publish to
+        finish. stop() on a shared loop only schedules the cancellation, so
+        callers that tear down the Kinesis client or decode pool next must use
+        this instead.
+        """
+        task = self._task
+        if task is None or self._poll_thread is not None:
+            await super().aclose()
+            return
+
+        self.stop()
+        await asyncio.wait([task])
+        if self._publish_task is not None:
+            await asyncio.wait([self._publish_task])
+
+    def _run_own_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _poll_loop_async(self):
+        """Main polling loop."""
+        try:
+            while not self._stop_event.is_set():
+                self.poll_id = str(uuid.uuid4())
+
+                self.logger.info(
+                    "Polling for round/stage",
+                    extra={
+                        "class": self.class_name,
+                        "round": self.current_round,
+                        "stage": self.current_stage,
+                        "poll_id": self.poll_id,
+                    },
+                )
+                round_and_stage = (self.current_round, self.current_stage)
+                await self._poll_once_async()
+                await self._wait_for_next_poll_async(self._next_poll_delay(round_and_stage))
+        finally:
+            if self._publish_task is not None and not self._publish_task.done():
+                await asyncio.wait([self._publish_task], timeout=5)
+
+    async def _wait_for_next_poll_async(self, delay: float):
+        """Waits `delay` seconds, or until a round/stage change."""
+        deadline = time.monotonic() + delay
+        while not self._stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            check_delay = self._round_check_delay()
+            await asyncio.sleep(remaining if check_delay is None else min(remaining, check_delay))
+            if check_delay is not None and await self._run_blocking(self._round_changed):
+                return
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
+
+    def _dht_get(self, key: str, **kwargs) -> asyncio.Task:
+        """Starts a DHT lookup in the background and returns a task resolving to its result."""
+        async def get():
+            return await self.dht.get(key, return_future=True, **kwargs)
+
+        return asyncio.ensure_future(get())
+
+    async def _dht_get_many(self, keys: list[str], **kwargs) -> dict[str, Any]:
+        """Looks several keys up concurrently; failed lookups map to None."""
+        results = await asyncio.gather(*(self._dht_get(key, **kwargs) for key in keys), return_exceptions=True)
+        return {key: None if isinstance(r, Exception) else r for key, r in zip(keys, results)}
+
+    async def _wait_for_publish(self):
+        """Waits for the in-flight publish, if any, to finish."""
+        if self._publish_task is not None and not self._publish_task.done():
+            await asyncio.wait([self._publish_task])
+
+    async def _publish_in_background(self, fn, *args):
+        """
+        Runs a blocking publish without waiting for it, so the next poll can
+        start while it is in flight. At most one publish runs at a time.
+        """
+        await self._wait_for_publish()
+        self._publish_task = asyncio.ensure_future(self._run_blocking(fn, *args))
+
+    @abstractmethod
+    async def _poll_once_async(self):
+        """
+        Perform a single poll of the DHT.
+        This method should be overridden by subclasses to implement specific polling logic.
+        """
+        pass
+
+
+class GossipDHTPublisher(ThreadedDHTPublisher):
     """
     A class that polls the DHT for gossip data and publishes it to Kinesis.
     """
@@ -152,44 +453,228 @@ class GossipDHTPublisher(BaseDHTPublisher):
         logger=None,
         poll_interval_seconds: int = 300,
         coordinator=None,
+        poll_schedule: Optional[AdaptivePollSchedule] = None,
+        snapshots: Optional[SnapshotStore] = None,
+        decode_pool: Optional[DecodePool] = None,
+        poll_time_budget_seconds: Optional[float] = None,
+        gossip_budget: int = 200,
+        gossip_per_peer_cap: Optional[int] = None,
+        seen_cache: Optional[SeenCache] = None,
     ):
-        """Initialize the publisher."""
+        """
+        Initialize the publisher.
+
+        Args:
+            decode_pool: Optional process pool to decode peer blobs on
+            poll_time_budget_seconds: How long a poll may spend decoding; peers
+                left over are decoded on the next poll
+            gossip_budget: Most messages published per poll
+            gossip_per_peer_cap: Most of those messages a single peer may take
+            seen_cache: Cache of published gossip ids, so that messages are not
+                sent twice
+        """
         super().__init__(
-            dht, kinesis_client, logger, poll_interval_seconds, coordinator=coordinator
+            dht,
+            kinesis_client,
+            logger,
+            poll_interval_seconds,
+            coordinator=coordinator,
+            poll_schedule=poll_schedule,
+            snapshots=snapshots,
         )
+        self.decode_pool = decode_pool
+        self.poll_time_budget_seconds = poll_time_budget_seconds
+        self.gossip_budget = gossip_budget
+        self.gossip_per_peer_cap = gossip_per_peer_cap
+        self._published = seen_cache or SeenCache()
+        # peer id -> (expiration time, content hash) of the value last decoded,
+        # so that a poll only decodes peers that republished since the last one.
+        self._peer_fingerprints: dict[str, tuple[Any, bytes]] = {}
+        # peer id -> (fingerprint, ids of its sampled messages) for peers whose
+        # messages were all sampled by the last poll; the fingerprint is only
+        # recorded once every one of them was delivered.
+        self._pending_fingerprints: dict[str, tuple[tuple[Any, bytes], list[str]]] = {}
 
-    def _poll_once(self):
+    @staticmethod
+    def _fingerprint(value_with_expiration) -> tuple[Any, bytes]:
+        digest = hashlib.blake2b(value_with_expiration.value, digest_size=16).digest()
+        return value_with_expiration.expiration_time, digest
+
+    def stats(self) -> dict[str, Any]:
+        return {**super().stats(), "dedup": self._published.stats()}
+
+    def _gossip_id(self, peer_id: str, question: str, source_dataset: str) -> str:
+        # Generate a unique ID for the gossip message. The action is sampled at
+        # random from the peer's answers, so it is left out: re-decoding the same
+        # question must give the same ID.
+        return hashlib.md5(f"{question}-{peer_id}-{self.current_round}-{source_dataset}".encode()).hexdigest()
+
+    def _gossip_messages(self, peer_id: str, fields: list[GossipFields]) -> list[tuple[float, dict[str, Any]]]:
+        gossip = []
+        for question, source_dataset, action in fields:
+            # Stamp the message with the current time.
+            now_utc = datetime.now(timezone.utc)
+            ts = int(now_utc.timestamp())
+
+            gossip_id = self._gossip_id(peer_id, question, source_dataset)
+            gossip.append((
+                ts, {
+                    "id": gossip_id,
+                    "message": f"{question}...{action}",
+                    "node": get_name_from_peer_id(peer_id),
+                    "nodeId": peer_id,
+                    "dataset": source_dataset,
+                }
+            ))
+        return gossip
+
+    def _decode_peers(self, blobs: dict[str, bytes]) -> Iterator[tuple[str, Iterable[GossipFields] | Exception]]:
+        """
+        Extracts gossip fields from each peer's blob, on the decode pool if one
+        is set, yielding them as they become available. Without a pool, each
+        peer's fields are decoded lazily as the caller consumes them, and
+        decoding errors are raised from there. Peers not reached within the
+        poll time budget are left out.
+        """
+        deadline = None
+        if self.poll_time_budget_seconds is not None:
+            deadline = time.monotonic() + self.poll_time_budget_seconds
+
+        if self.decode_pool is None:
+            for n, (peer_id, blob) in enumerate(blobs.items()):
+                # At least one peer is decoded per poll, so a tight budget still makes progress.
+                if n and deadline is not None and time.monotonic() > deadline:
+                    return
+                yield peer_id, iter_gossip_fields(blob)
+            return
+
+        futures = {self.decode_pool.submit(blob): peer_id for peer_id, blob in blobs.items()}
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
         try:
-            new_round, new_stage = self.coordinator.get_round_and_stage()
+            for future in concurrent.futures.as_completed(futures, timeout=timeout):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+        except concurrent.futures.TimeoutError:
+            pass
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _set_round_and_stage(self, new_round: int, new_stage: int):
+        self.logger.info(
+            "Polled for round/stage",
+            extra={
+                "class": self.class_name,
+                "round": new_round,
+                "stage": new_stage,
+                "poll_id": self.poll_id,
+            }
+        )
 
+        if new_round != self.current_round or new_stage != self.current_stage:
             self.logger.info(
-                "Polled for round/stage",
+                "Round/stage changed",
                 extra={
                     "class": self.class_name,
-                    "round": new_round,
-                    "stage": new_stage,
+                    "old_round": self.current_round,
+                    "old_stage": self.current_stage,
+                    "new_round": new_round,
+                    "new_stage": new_stage,
                     "poll_id": self.poll_id,
                 }
             )
 
-            if new_round != self.current_round or new_stage != self.current_stage:
-                self.logger.info(
-                    "Round/stage changed",
-                    extra={
-                        "class": self.class_name,
-                        "old_round": self.current_round,
-                        "old_stage": self.current_stage,
-                        "new_round": new_round,
-                        "new_stage": new_stage,
-                        "poll_id": self.poll_id,
-                    }
+        if new_round != self.current_round:
+            # Gossip is keyed by round, so nothing from the old round carries over.
+            self._peer_fingerprints.clear()
+            self._pending_fingerprints.clear()
+
+        # Update current round and stage
+        self.current_round = new_round
+        self.current_stage = new_stage
+
+    def _collect_gossip(self, round_data) -> list[tuple[float, dict[str, Any]]]:
+        """
+        Builds gossip messages for the peers whose round value changed since the
+        last poll, or that still have messages that were not sampled or not
+        delivered. Decoded fields stream into a fixed-size sampler, so only the
+        published messages are ever built.
+        """
+        sampler = FairReservoirSampler(self.gossip_budget, self.gossip_per_peer_cap)
+        fingerprints = {}
+        changed = {}
+        for peer_id, value_with_expiration in round_data.value.items():
+            fingerprint = self._fingerprint(value_with_expiration)
+            if self._peer_fingerprints.get(peer_id) == fingerprint:
+                fingerprints[peer_id] = fingerprint
+                continue
+            pending = self._pending_fingerprints.get(peer_id)
+            if pending is not None and pending[0] == fingerprint and all(i in self._published for i in pending[1]):
+                # Everything the peer had was delivered since the last poll.
+                fingerprints[peer_id] = fingerprint
+                continue
+            changed[peer_id] = (fingerprint, value_with_expiration.value)
+
+        decoded = 0
+        fresh_counts = {}
+        for peer_id, fields in self._decode_peers({peer_id: blob for peer_id, (_, blob) in changed.items()}):
+            decoded += 1
+            try:
+                if isinstance(fields, Exception):
+                    raise fields
+                # Messages already published (they stay in the DHT across polls) are not
+                # sent again. The rest stream into the sampler, one peer sample at a time.
+                fresh_count = sampler.offer_stream(
+                    peer_id, (f for f in fields if not self._published.seen(self._gossip_id(peer_id, f[0], f[1])))
+                )
+            except Exception as e:
+                # Recorded even on failure: the same bytes would fail again.
+                fingerprints[peer_id] = changed[peer_id][0]
+                self.logger.warning(
+                    "Could not decode peer gossip",
+                    extra={"peer_id": peer_id, "error": str(e), "poll_id": self.poll_id},
                 )
+                continue
+            if fresh_count:
+                fresh_counts[peer_id] = fresh_count
+            else:
+                fingerprints[peer_id] = changed[peer_id][0]
+        sampled = sampler.sample()
 
-            # Update current round and stage
-            self.current_round = new_round
-            self.current_stage = new_stage
+        # Peers whose messages all made it into the sample are recorded once
+        # those are delivered; the others are decoded again next poll, to offer
+        # what is left. Only peers still present are kept, which also bounds the
+        # maps. Peers skipped for the time budget stay unrecorded too.
+        sampled_ids: dict[str, list[str]] = {}
+        for peer_id, fields in sampled:
+            sampled_ids.setdefault(peer_id, []).append(self._gossip_id(peer_id, fields[0], fields[1]))
+        self._pending_fingerprints = {
+            peer_id: (changed[peer_id][0], ids)
+            for peer_id, ids in sampled_ids.items()
+            if len(ids) == fresh_counts[peer_id]
+        }
+        self._peer_fingerprints = fingerprints
+
+        self.logger.info("Got gossip messages", extra={
+            "message_count": sampler.offered,
+            "sampled_count": len(sampler),
+            "peer_count": len(round_data.value),
+            "changed_peer_count": len(changed),
+            "deferred_peer_count": len(changed) - decoded,
+            "dedup_hit_rate": self._published.stats()["hitRate"],
+        })
+
+        round_gossip = []
+        for peer_id, fields in sampled:
+            round_gossip.extend(self._gossip_messages(peer_id, [fields]))
+        return round_gossip
 
-            round_gossip = []
+    def _poll_once(self):
+        try:
+            new_round, new_stage = self.coordinator.get_round_and_stage()
+            self._set_round_and_stage(new_round, new_stage)
 
             round_data = self.dht.get(str(self.current_round))
             if not round_data:
@@ -199,48 +684,7 @@ class GossipDHTPublisher(BaseDHTPublisher):
             # Update the last polled time
             self.last_polled = datetime.now(timezone.utc)
 
-            for peer_id, value_with_expiration in round_data.value.items():
-                bytes = value_with_expiration.value
-                payload_dict = from_bytes(bytes)
-
-                # Flatten the payloads into a list of payloads.
-                all_payloads = []
-                for _, payload_list in payload_dict.items():
-                    all_payloads.extend(payload_list)
-
-                # For each payload, generate a gossip message.
-                for payload in all_payloads:
-                    world_state_tuple = payload.world_state
-                    question = world_state_tuple.environment_states["question"]
-                    actions = payload.actions
-                    source_dataset = world_state_tuple.environment_states["metadata"]["source_dataset"]
-                    action = random.choice(actions) if actions else ""
-
-                    # Stamp the message with the current time.
-                    now_utc = datetime.now(timezone.utc)
-                    ts = int(now_utc.timestamp())
-
-                    # Generate a unique ID for the gossip message.
-                    gossip_id = hashlib.md5(f"{question}-{peer_id}-{self.current_round}-{action}-{source_dataset}".encode()).hexdigest()
-                    round_gossip.append((
-                        ts, {
-                            "id": gossip_id,
-                            "message": f"{question}...{action}",
-                            "node": get_name_from_peer_id(peer_id),
-                            "nodeId": peer_id,
-                            "dataset": source_dataset,
-                        }
-                    ))
-
-            self.logger.info("Got gossip messages", extra={
-                "message_count": len(round_gossip),
-            })
-
-            # Shuffle the gossip messages to attempt to avoid getting only 1 peer, and only publish 200.
-            random.shuffle(round_gossip)
-            round_gossip = round_gossip[:200]
-
-            self._publish_gossip(round_gossip)
+            self._publish_gossip(self._collect_gossip(round_data))
 
         except Exception as e:
             self.logger.error(
@@ -252,44 +696,414 @@ class GossipDHTPublisher(BaseDHTPublisher):
                 },
             )
 
-    def _publish_gossip(self, gossip: list[tuple[float, dict[str, Any]]]):
+class RewardsDHTPublisher(ThreadedDHTPublisher):
+    """
+    A class that polls the DHT for per-peer rewards, keeps cumulative totals
+    across rounds and publishes the top-K leaderboard to Kinesis.
+    """
+
+    def __init__(
+        self,
+        dht: DHT,
+        kinesis_client,
+        logger=None,
+        poll_interval_seconds: int = 300,
+        coordinator=None,
+        poll_schedule: Optional[AdaptivePollSchedule] = None,
+        snapshots: Optional[SnapshotStore] = None,
+        leaderboard_size: int = 10,
+    ):
         """
-        Publish gossip data to Kinesis.
+        Initialize the publisher.
 
         Args:
-            gossip_data: The gossip data from the DHT
+            leaderboard_size: How many peers the published leaderboard holds
         """
+        super().__init__(
+            dht,
+            kinesis_client,
+            logger,
+            poll_interval_seconds,
+            coordinator=coordinator,
+            poll_schedule=poll_schedule,
+            snapshots=snapshots,
+        )
+        # Cumulative reward per peer over every round/stage seen so far.
+        self.totals: dict[str, float] = {}
+        # Each peer's reward for the current round/stage as last seen, so that
+        # a republished value only adds its difference to the total.
+        self._stage_rewards: dict[str, float] = {}
+        self.leaderboard = TopKLeaderboard(leaderboard_size)
+        self._published_top: list[tuple[str, float]] = []
+
+    @staticmethod
+    def _reward_value(value: Any) -> float:
+        if isinstance(value, (list, tuple)):
+            return float(sum(value))
+        return float(value)
+
+    def _apply_rewards(self, rewards: dict[str, Any]) -> int:
+        """Folds one rewards poll into the totals; returns how many peers changed."""
+        changed = 0
+        for peer_id, value in rewards.items():
+            try:
+                reward = self._reward_value(value)
+            except (TypeError, ValueError):
+                self.logger.warning("Skipping malformed reward", extra={"peer_id": peer_id, "poll_id": self.poll_id})
+                continue
+            delta = reward - self._stage_rewards.get(peer_id, 0.0)
+            # A new peer is recorded even with a zero reward, so it shows on the leaderboard.
+            if not delta and peer_id in self.totals:
+                continue
+            self._stage_rewards[peer_id] = reward
+            self.totals[peer_id] = self.totals.get(peer_id, 0.0) + delta
+            self.leaderboard.update(peer_id, self.totals[peer_id])
+            changed += 1
+        return changed
+
+    def _end_stage(self, final_rewards: dict[str, Any] | None):
+        """Applies the last rewards of the stage that just ended and starts afresh."""
+        if final_rewards:
+            self._apply_rewards(final_rewards)
+        self._stage_rewards.clear()
+
+    def _set_round_and_stage(self, new_round: int, new_stage: int):
+        if new_round != self.current_round or new_stage != self.current_stage:
+            self.logger.info(
+                "Round/stage changed",
+                extra={
+                    "class": self.class_name,
+                    "old_round": self.current_round,
+                    "old_stage": self.current_stage,
+                    "new_round": new_round,
+                    "new_stage": new_stage,
+                    "poll_id": self.poll_id,
+                }
+            )
+        self.current_round = new_round
+        self.current_stage = new_stage
+
+    def _update_leaderboard(self, rewards: dict[str, Any]) -> list[tuple[str, float]] | None:
+        """Applies a rewards poll and returns the new top-K, or None if it is unchanged."""
+        changed = self._apply_rewards(rewards)
+        self.logger.info("Got rewards", extra={
+            "peer_count": len(rewards),
+            "changed_peer_count": changed,
+            "poll_id": self.poll_id,
+        })
+
+        top = self.leaderboard.top()
+        return None if top == self._published_top else top
+
+    def _poll_once(self):
         try:
-            if not gossip:
-                self.logger.info("No gossip data to publish")
+            new_round, new_stage = self.coordinator.get_round_and_stage()
+            if self.current_round >= 0 and (new_round, new_stage) != (self.current_round, self.current_stage):
+                self._end_stage(self._get_rewards_data(self.current_round, self.current_stage))
+            self._set_round_and_stage(new_round, new_stage)
+
+            rewards = self._get_rewards_data(self.current_round, self.current_stage)
+            if not rewards:
+                self.logger.info("No rewards found for round/stage", extra={
+                    "round": self.current_round, "stage": self.current_stage,
+                })
                 return
 
-            self.logger.info(
-                "Publishing gossip messages", extra={"num_messages": len(gossip)}
+            # Update the last polled time
+            self.last_polled = datetime.now(timezone.utc)
+
+            top = self._update_leaderboard(rewards)
+            if top is not None:
+                self._publish_leaderboard(top)
+
+        except Exception as e:
+            self.logger.error(
+                "Error polling for round/stage in rewards",
+                extra={
+                    "class": self.class_name,
+                    "error": str(e),
+                    "poll_id": self.poll_id,
+                },
             )
-            gossip_data = []
 
-            for ts, g in gossip:
-                dt = datetime.fromtimestamp(ts, tz=timezone.utc)
-                gossip_data.append(
-                    GossipMessageData(
-                        id=g["id"],
-                        peerId=g["nodeId"],
-                        peerName=g["node"],
-                        message=g["message"],
-                        timestamp=dt,
-                        dataset=g.get("dataset"),
+    def _publish_leaderboard(self, top: list[tuple[str, float]]):
+        try:
+            message = LeaderboardMessage(
+                round=self.current_round,
+                stage=self.current_stage,
+                timestamp=datetime.now(timezone.utc),
+                data=[
+                    LeaderboardEntry(
+                        peerId=peer_id,
+                        peerName=self._get_peer_name_from_id(peer_id),
+                        rank=rank,
+                        score=score,
                     )
+                    for rank, (peer_id, score) in enumerate(top, start=1)
+                ],
+            )
+            if self.snapshots is not None:
+                self.snapshots.update_leaderboard(message)
+            self.kinesis_client.put_leaderboard(message)
+            self._published_top = top
+            self.logger.info("Successfully published leaderboard", extra={"num_entries": len(top)})
+
+        except Exception as e:
+            self.logger.error(
+                "Error publishing leaderboard",
+                extra={"error": str(e), "poll_id": self.poll_id},
+            )
+
+    def stats(self) -> dict[str, Any]:
+        return {**super().stats(), "leaderboard": self.leaderboard.stats()}
+
+class AsyncGossipDHTPublisher(AsyncDHTPublisher, GossipDHTPublisher):
+    """
+    GossipDHTPublisher on an event loop. The round's gossip is fetched while the
+    coordinator is asked for the round, and publishing overlaps the next poll.
+    """
+
+    async def _poll_once_async(self):
+        try:
+            # Start fetching the round we last saw; it is usually still current.
+            round_task = self._dht_get(str(self.current_round)) if self.current_round >= 0 else None
+
+            new_round, new_stage = await self._run_blocking(self.coordinator.get_round_and_stage)
+            fetched_round = self.current_round
+            self._set_round_and_stage(new_round, new_stage)
+            if round_task is None or new_round != fetched_round:
+                if round_task is not None:
+                    round_task.cancel()
+                round_task = self._dht_get(str(self.current_round))
+
+            round_data = await round_task
+            if not round_data:
+                self.logger.info("No gossip found for round", extra={"round": self.current_round})
+                return
+
+            # Update the last polled time
+            self.last_polled = datetime.now(timezone.utc)
+
+            # The in-flight publish marks its messages as published; collecting
+            # before it is done would race with it and resend them.
+            await self._wait_for_publish()
+            gossip = await self._run_blocking(self._collect_gossip, round_data)
+            await self._publish_in_background(self._publish_gossip, gossip)
+
+        except Exception as e:
+            self.logger.error(
+                "Error polling for round/stage in gossip",
+                extra={
+                    "class": self.class_name,
+                    "error": str(e),
+                    "poll_id": self.poll_id,
+                },
+            )
+
+
+class AsyncRewardsDHTPublisher(AsyncDHTPublisher, RewardsDHTPublisher):
+    """
+    RewardsDHTPublisher on an event loop. The current stage's rewards are
+    fetched while the coordinator is asked for the round.
+    """
+
+    async def _get_rewards_async(self, round_num: int, stage_num: int) -> dict[str, Any] | None:
+        return unwrap_dht_value(await self._dht_get(rewards_key(round_num, stage_num), beam_size=500))
+
+    async def _poll_once_async(self):
+        try:
+            rewards_task = None
+            if self.current_round >= 0:
+                rewards_task = asyncio.ensure_future(self._get_rewards_async(self.current_round, self.current_stage))
+
+            new_round, new_stage = await self._run_blocking(self.coordinator.get_round_and_stage)
+            if rewards_task is not None and (new_round, new_stage) != (self.current_round, self.current_stage):
+                # The prefetched rewards are the final ones of the stage that just ended.
+                self._end_stage(await rewards_task)
+                rewards_task = None
+            self._set_round_and_stage(new_round, new_stage)
+            if rewards_task is None:
+                rewards_task = asyncio.ensure_future(self._get_rewards_async(self.current_round, self.current_stage))
+
+            rewards = await rewards_task
+            if not rewards:
+                self.logger.info("No rewards found for round/stage", extra={
+                    "round": self.current_round, "stage": self.current_stage,
+                })
+                return
+
+            # Update the last polled time
+            self.last_polled = datetime.now(timezone.utc)
+
+            top = self._update_leaderboard(rewards)
+            if top is not None:
+                await self._publish_in_background(self._publish_leaderboard, top)
+
+        except Exception as e:
+            self.logger.error(
+                "Error polling for round/stage in rewards",
+                extra={
+                    "class": self.class_name,
+                    "error": str(e),
+                    "poll_id": self.poll_id,
+                },
+            )
+
+
+class OutputsDHTPublisher(AsyncDHTPublisher):
+    """
+    A class that polls the DHT for the stage outputs of every node in the round
+    and publishes them to Kinesis as gossip, rendered with the stage message
+    formatters. Nodes are those that published rewards for the round/stage.
+
+    Outputs are fetched concurrently, at most `max_concurrency` at a time and
+    each within `fetch_timeout_seconds`, so a slow or missing node only loses
+    its own outputs.
+    """
+
+    def __init__(
+        self,
+        dht: DHT,
+        kinesis_client,
+        logger=None,
+        poll_interval_seconds: int = 300,
+        coordinator=None,
+        poll_schedule: Optional[AdaptivePollSchedule] = None,
+        snapshots: Optional[SnapshotStore] = None,
+        max_concurrency: int = 16,
+        fetch_timeout_seconds: float = 10,
+        gossip_budget: int = 200,
+        seen_cache: Optional[SeenCache] = None,
+    ):
+        """
+        Initialize the publisher.
+
+        Args:
+            max_concurrency: Most outputs lookups in flight at once
+            fetch_timeout_seconds: How long a single node's lookup may take
+            gossip_budget: Most messages published per poll
+            seen_cache: Cache of published message ids, so that messages are
+                not sent twice
+        """
+        super().__init__(
+            dht,
+            kinesis_client,
+            logger,
+            poll_interval_seconds,
+            coordinator=coordinator,
+            poll_schedule=poll_schedule,
+            snapshots=snapshots,
+        )
+        self.max_concurrency = max_concurrency
+        self.fetch_timeout_seconds = fetch_timeout_seconds
+        self.gossip_budget = gossip_budget
+        self._published = seen_cache or SeenCache()
+        self.fetch_stats = {"fetched": 0, "missing": 0, "timedOut": 0, "failed": 0}
+
+    async def _get_node_keys(self) -> list[str]:
+        key = rewards_key(self.current_round, self.current_stage)
+        rewards = await self._run_blocking(get_dht_values, self.dht, [key], self.fetch_timeout_seconds, beam_size=500)
+        return list(rewards.get(key) or {})
+
+    async def _fetch_outputs(self, node_keys: list[str]) -> dict[str, dict[str, Any]]:
+        """
+        Fetches each node's outputs, `max_concurrency` at a time and each within
+        `fetch_timeout_seconds`; nodes that fail or time out are left out.
+        Lookup latencies are recorded in `dht_latency`.
+        """
+        keys = {outputs_key(node_key, self.current_round, self.current_stage): node_key for node_key in node_keys}
+        values = await self._run_blocking(
+            get_dht_values,
+            self.dht,
+            keys,
+            self.fetch_timeout_seconds,
+            max_concurrency=self.max_concurrency,
+            stats=self.fetch_stats,
+            latest=False,
+        )
+        return {keys[key]: hash_keys(outputs) for key, outputs in values.items() if outputs}
+
+    def _outputs_gossip(self, outputs: dict[str, dict[str, Any]]) -> list[tuple[float, dict[str, Any]]]:
+        """Renders unpublished outputs as gossip, sampled fairly across nodes."""
+        sampler = FairReservoirSampler(self.gossip_budget)
+        for node_key, node_outputs in outputs.items():
+            fresh = []
+            for question_hash, value in node_outputs.items():
+                gossip_id = hashlib.md5(
+                    f"{node_key}-{self.current_round}-{self.current_stage}-{question_hash}".encode()
+                ).hexdigest()
+                if not self._published.seen(gossip_id):
+                    fresh.append((gossip_id, value))
+            sampler.offer_all(node_key, fresh)
+
+        gossip = []
+        for node_key, (gossip_id, value) in sampler.sample():
+            try:
+                ts, stage_outputs = value
+                message = stage_message(
+                    self.current_stage, node_key, stage_outputs.get("question", ""), ts, stage_outputs
                 )
+            except (TypeError, ValueError, KeyError, AttributeError):
+                continue  # Outputs from an incompatible trainer version.
+            gossip.append((
+                ts, {
+                    "id": gossip_id,
+                    "message": message,
+                    "node": self._get_peer_name_from_id(node_key),
+                    "nodeId": node_key,
+                    "dataset": stage_outputs.get("dataset"),
+                }
+            ))
+        return gossip
 
-            if len(gossip_data) > 0:
-                self.kinesis_client.put_gossip(
-                    GossipMessage(type="gossip", data=gossip_data)
+    async def _poll_once_async(self):
+        try:
+            new_round, new_stage = await self._run_blocking(self.coordinator.get_round_and_stage)
+            if (new_round, new_stage) != (self.current_round, self.current_stage):
+                self.logger.info(
+                    "Round/stage changed",
+                    extra={
+                        "class": self.class_name,
+                        "old_round": self.current_round,
+                        "old_stage": self.current_stage,
+                        "new_round": new_round,
+                        "new_stage": new_stage,
+                        "poll_id": self.poll_id,
+                    }
                 )
-                self.logger.info("Successfully published gossip")
+            self.current_round = new_round
+            self.current_stage = new_stage
+
+            node_keys = await self._get_node_keys()
+            if not node_keys:
+                self.logger.info("No nodes found for round/stage", extra={
+                    "round": self.current_round, "stage": self.current_stage,
+                })
+                return
+
+            outputs = await self._fetch_outputs(node_keys)
+
+            # Update the last polled time
+            self.last_polled = datetime.now(timezone.utc)
+
+            gossip = self._outputs_gossip(outputs)
+            self.logger.info("Got node outputs", extra={
+                "node_count": len(node_keys),
+                "nodes_with_outputs": len(outputs),
+                "message_count": len(gossip),
+                "poll_id": self.poll_id,
+            })
+            await self._publish_in_background(self._publish_gossip, gossip)
 
         except Exception as e:
             self.logger.error(
-                "Error publishing gossip",
-                extra={"error": str(e), "poll_id": self.poll_id},
+                "Error polling for round/stage in outputs",
+                extra={
+                    "class": self.class_name,
+                    "error": str(e),
+                    "poll_id": self.poll_id,
+                },
             )
+
+    def stats(self) -> dict[str, Any]:
+        return {**super().stats(), "fetches": dict(self.fetch_stats), "dedup": self._published.stats()}
@@ -1,5 +1,8 @@
+import asyncio
+import concurrent.futures
 import logging
 import sys
+import threading
 import time
 from pathlib import Path
 from unittest.mock import MagicMock, call, patch
@@ -14,9 +17,51 @@ sys.path.append(str(parent_dir))
 # because these functions are only copied over at build time in Docker and aren't available during local testing.
 # This allows us to test the DHTPublisher class without needing the actual hivemind_exp module.
 
-from api.dht_pub import GossipDHTPublisher
+from api.dht_pub import (
+    AsyncGossipDHTPublisher,
+    AsyncRewardsDHTPublisher,
+    GossipDHTPublisher,
+    OutputsDHTPublisher,
+    RewardsDHTPublisher,
+)
 from api.game_tree import Payload, WorldState, to_bytes, from_bytes
 from api.kinesis import GossipMessage, GossipMessageData
+from api.poll_schedule import AdaptivePollSchedule, SharedRoundAndStage
+from hivemind.utils import ValueWithExpiration
+from hivemind_exp.dht_utils import LatencyHistogram, outputs_key, rewards_key
+
+
+def deliver(message, on_delivered=None):
+    """Stands in for Kinesis.put_gossip, delivering every message at once."""
+    if on_delivered is not None:
+        on_delivered(message.data)
+
+
+def make_peer_blob(*questions, actions=("4",), **to_bytes_kwargs) -> bytes:
+    """Encodes a peer's round gossip: one arc_1d payload per question."""
+    payloads = [
+        Payload(
+            world_state=WorldState(
+                environment_states={"question": question, "metadata": {"source_dataset": "arc_1d"}},
+                opponent_states=None,
+                personal_states=None,
+            ),
+            actions=list(actions),
+            metadata=None,
+        )
+        for question in questions
+    ]
+    return to_bytes({"0": payloads}, **to_bytes_kwargs)
+
+
+def make_peer_value(*questions, expiration_time=1.0, **kwargs):
+    """A peer's round gossip as the DHT returns it."""
+    return MagicMock(value=make_peer_blob(*questions, **kwargs), expiration_time=expiration_time)
+
+
+def make_round_value(question="What is 2+2?", **kwargs):
+    """A round's DHT value with a single peer."""
+    return MagicMock(value={"peer": make_peer_value(question, **kwargs)})
 
 
 # Wraps data put into the DHT so we can mock the DHT.get method
@@ -284,3 +329,550 @@ class TestGossipDHTPublisher:
         assert data_item.peer_name == "solitary finicky meerkat"
         assert data_item.peer_id == "test_peer_id"
         assert data_item.dataset == "calendar_arithmetic"  # Should be from metadata
+
+    def test_poll_once_skips_unchanged_peers(self):
+        """Test that only new or republished peer values are decoded and published."""
+        round_values = {
+            "peer_a": make_peer_value("qa", expiration_time=10.0),
+            "peer_b": make_peer_value("qb", expiration_time=10.0),
+        }
+        self.publisher.dht.get = MagicMock(return_value=MagicMock(value=round_values))
+        self.publisher.kinesis_client.put_gossip = MagicMock(side_effect=deliver)
+        self.coordinator.get_round_and_stage.return_value = (1, 0)
+
+        def published_peers():
+            message = self.publisher.kinesis_client.put_gossip.call_args[0][0]
+            return sorted(d.peer_id for d in message.data)
+
+        self.publisher._poll_once()
+        assert published_peers() == ["peer_a", "peer_b"]
+
+        # Nothing changed: nothing is decoded or published.
+        self.publisher.kinesis_client.put_gossip.reset_mock()
+        with patch("api.dht_pub.iter_gossip_fields") as extract:
+            self.publisher._poll_once()
+            assert extract.call_count == 0
+        assert self.publisher.kinesis_client.put_gossip.call_count == 0
+
+        # peer_b republishes and peer_c joins.
+        round_values["peer_b"] = make_peer_value("qb2", expiration_time=20.0)
+        round_values["peer_c"] = make_peer_value("qc", expiration_time=20.0)
+        self.publisher._poll_once()
+        assert published_peers() == ["peer_b", "peer_c"]
+
+        # A new stage of the same round decodes nothing.
+        self.publisher.kinesis_client.put_gossip.reset_mock()
+        self.coordinator.get_round_and_stage.return_value = (1, 1)
+        with patch("api.dht_pub.iter_gossip_fields") as extract:
+            self.publisher._poll_once()
+            assert extract.call_count == 0
+
+        # A new round starts from scratch.
+        self.publisher.kinesis_client.put_gossip.reset_mock()
+        self.coordinator.get_round_and_stage.return_value = (2, 0)
+        self.publisher._poll_once()
+        assert published_peers() == ["peer_a", "peer_b", "peer_c"]
+
+    def test_poll_once_columnar_batch(self):
+        """Test that columnar peer values are read column by column."""
+        self.publisher.dht.get = MagicMock(return_value=make_round_value("q", actions=["x"], version=2, columnar=True))
+        self.publisher.kinesis_client.put_gossip = MagicMock()
+        self.coordinator.get_round_and_stage.return_value = (1, 0)
+        self.publisher._poll_once()
+        data = self.publisher.kinesis_client.put_gossip.call_args[0][0].data
+        assert [(d.message, d.dataset) for d in data] == [("q...x", "arc_1d")]
+
+    def test_poll_once_time_budget(self):
+        """Test that peers not decoded within the poll budget are retried next poll."""
+        round_values = {f"peer_{k}": make_peer_value("q", expiration_time=float(k)) for k in range(3)}
+        self.publisher.dht.get = MagicMock(return_value=MagicMock(value=round_values))
+        self.publisher.kinesis_client.put_gossip = MagicMock(side_effect=deliver)
+        self.coordinator.get_round_and_stage.return_value = (1, 0)
+
+        # A budget of zero lets each poll decode only its first peer.
+        self.publisher.poll_time_budget_seconds = 0
+        for expected in ["peer_0", "peer_1", "peer_2"]:
+            self.publisher._poll_once()
+            data = self.publisher.kinesis_client.put_gossip.call_args[0][0].data
+            assert [d.peer_id for d in data] == [expected]
+
+
+    def test_published_gossip_is_not_resent(self):
+        """Test that a republished but unchanged peer value does not resend its gossip."""
+        value = make_round_value().value["peer"]
+        self.publisher.dht.get = MagicMock(return_value=MagicMock(value={"peer": value}))
+        self.publisher.kinesis_client.put_gossip = MagicMock(side_effect=deliver)
+        self.coordinator.get_round_and_stage.return_value = (1, 0)
+        self.publisher._poll_once()
+        assert self.publisher.kinesis_client.put_gossip.call_count == 1
+
+        # The peer republishes the same content with a new expiration time.
+        value.expiration_time = 2.0
+        self.publisher._poll_once()
+        assert self.publisher.kinesis_client.put_gossip.call_count == 1
+        assert self.publisher.stats()["dedup"]["hitRate"] == 0.5
+
+    def test_undelivered_gossip_is_resent(self):
+        """Test that gossip is only marked as published once Kinesis delivers it."""
+        value = make_round_value().value["peer"]
+        self.publisher.dht.get = MagicMock(return_value=MagicMock(value={"peer": value}))
+        # Buffered by the producer, then dropped: the callback never runs.
+        self.publisher.kinesis_client.put_gossip = MagicMock()
+        self.coordinator.get_round_and_stage.return_value = (1, 0)
+        self.publisher._poll_once()
+
+        value.expiration_time = 2.0
+        self.publisher.kinesis_client.put_gossip.side_effect = deliver
+        self.publisher._poll_once()
+        value.expiration_time = 3.0
+        self.publisher._poll_once()
+        assert self.publisher.kinesis_client.put_gossip.call_count == 2
+
+    def test_unsampled_gossip_is_offered_again(self):
+        """Test that messages left out of a poll's sample are published by the next polls."""
+        value = make_peer_value("q1", "q2", "q3", actions=["a"])
+        self.publisher.dht.get = MagicMock(return_value=MagicMock(value={"peer": value}))
+        self.publisher.kinesis_client.put_gossip = MagicMock(side_effect=deliver)
+        self.coordinator.get_round_and_stage.return_value = (1, 0)
+        self.publisher.gossip_budget = 2
+
+        self.publisher._poll_once()
+        self.publisher._poll_once()
+        messages = [d.message for c in self.publisher.kinesis_client.put_gossip.call_args_list for d in c[0][0].data]
+        assert sorted(messages) == ["q1...a", "q2...a", "q3...a"]
+
+        # Everything was delivered: the unchanged peer is no longer decoded.
+        with patch("api.dht_pub.iter_gossip_fields") as extract:
+            self.publisher._poll_once()
+            self.publisher._poll_once()
+            assert extract.call_count == 0
+
+    def test_gossip_id_ignores_sampled_action(self):
+        """Test that a peer with several actions is not resent when another action is sampled."""
+        value = make_peer_value("q", actions=[str(k) for k in range(20)])
+        self.publisher.dht.get = MagicMock(return_value=MagicMock(value={"peer": value}))
+        self.publisher.kinesis_client.put_gossip = MagicMock(side_effect=deliver)
+        self.coordinator.get_round_and_stage.return_value = (1, 0)
+        for k in range(5):
+            value.expiration_time = float(k)
+            self.publisher._poll_once()
+        assert self.publisher.kinesis_client.put_gossip.call_count == 1
+
+
+class TestAsyncGossipDHTPublisher:
+    """Tests for the event-loop based gossip publisher."""
+
+    def setup_method(self):
+        self.dht = MagicMock()
+        self.kinesis = MagicMock()
+        self.kinesis.put_gossip.side_effect = deliver
+        self.coordinator = MagicMock()
+        self.coordinator.get_round_and_stage.return_value = (3, 0)
+        self.publisher = AsyncGossipDHTPublisher(
+            dht=self.dht,
+            kinesis_client=self.kinesis,
+            logger=logging.getLogger("test_logger"),
+            poll_interval_seconds=0.05,
+            coordinator=self.coordinator,
+        )
+
+    def _resolve_gets(self, values):
+        """Makes dht.get(..., return_future=True) return an awaitable resolving to values[key]."""
+        self.requested = []
+
+        def get(key, return_future=False, **kwargs):
+            assert return_future
+            self.requested.append(key)
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(values.get(key))
+            return future
+
+        self.dht.get = MagicMock(side_effect=get)
+
+    def test_poll_once_async(self):
+        """Test a poll that fetches the new round after the coordinator reports it."""
+        self._resolve_gets({"3": make_round_value()})
+
+        async def poll():
+            await self.publisher._poll_once_async()
+            await self.publisher._publish_task
+
+        asyncio.run(poll())
+        assert self.requested == ["3"]
+        assert self.publisher.current_round == 3
+        assert self.publisher.last_polled is not None
+        message = self.kinesis.put_gossip.call_args[0][0]
+        assert [d.message for d in message.data] == ["What is 2+2?...4"]
+
+    def test_collect_waits_for_in_flight_publish(self):
+        """Test that gossip is only collected once the previous publish has marked its messages."""
+        round_value = make_round_value()
+        self._resolve_gets({"3": round_value})
+        events = []
+        collect, publish = self.publisher._collect_gossip, self.publisher._publish_gossip
+
+        def slow_publish(gossip):
+            events.append("publish")
+            time.sleep(0.05)
+            publish(gossip)
+            events.append("published")
+
+        def traced_collect(round_data):
+            events.append("collect")
+            return collect(round_data)
+
+        self.publisher._publish_gossip = slow_publish
+        self.publisher._collect_gossip = traced_collect
+
+        async def poll():
+            for expiration_time in (1.0, 2.0):
+                round_value.value["peer"].expiration_time = expiration_time
+                await self.publisher._poll_once_async()
+            await self.publisher._publish_task
+
+        asyncio.run(poll())
+        assert events == ["collect", "publish", "published", "collect", "publish", "published"]
+        # The republished question was marked by the first publish, so it is not sent again.
+        assert self.kinesis.put_gossip.call_count == 1
+
+    def test_prefetches_current_round(self):
+        """Test that the last seen round is fetched alongside the coordinator call, and refetched on change."""
+        self._resolve_gets({"2": make_round_value("old"), "3": make_round_value("new")})
+        self.publisher.current_round = 3
+
+        async def poll():
+            await self.publisher._poll_once_async()
+            self.coordinator.get_round_and_stage.return_value = (4, 0)
+            await self.publisher._poll_once_async()
+
+        asyncio.run(poll())
+        # Round 3 is prefetched both times; the second poll learns of round 4 and refetches.
+        assert self.requested == ["3", "3", "4"]
+        assert self.coordinator.get_round_and_stage.call_count == 2
+
+    def test_start_stop_without_running_loop(self):
+        """Test that start() outside an event loop runs the poller on its own loop thread."""
+        self._resolve_gets({"3": make_round_value()})
+        self.publisher.start()
+        try:
+            deadline = time.time() + 5
+            while self.kinesis.put_gossip.call_count == 0 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            self.publisher.stop()
+        assert self.kinesis.put_gossip.call_count >= 1
+        assert self.publisher.running is False
+        assert self.publisher._poll_thread is None
+
+    def test_start_stop_on_running_loop(self):
+        """Test that start() inside an event loop schedules the poller on that loop."""
+        self._resolve_gets({"3": make_round_value()})
+
+        async def run():
+            self.publisher.start()
+            assert self.publisher._poll_thread is None
+            await asyncio.sleep(0.2)
+            task = self.publisher._task
+            self.publisher.stop()
+            await asyncio.wait([task], timeout=5)
+            assert task.done()
+
+        asyncio.run(run())
+        assert self.kinesis.put_gossip.call_count >= 1
+
+    def test_aclose_waits_for_in_flight_publish(self):
+        """Test that aclose() returns only once the poll task and its last publish have finished."""
+        self._resolve_gets({"3": make_round_value()})
+        publish = self.publisher._publish_gossip
+        started, events = threading.Event(), []
+
+        def slow_publish(gossip):
+            started.set()
+            time.sleep(0.2)
+            publish(gossip)
+            events.append("published")
+
+        self.publisher._publish_gossip = slow_publish
+
+        async def run():
+            self.publisher.start()
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            task = self.publisher._task
+            await self.publisher.aclose()
+            events.append("closed")
+            assert task.done()
+
+        asyncio.run(run())
+        assert events == ["published", "closed"]
+        assert self.publisher.running is False
+
+
+def test_adaptive_poll_delay():
+    """Test that publishers with a schedule poll sooner after a round/stage change."""
+    publisher = GossipDHTPublisher(
+        dht=MagicMock(),
+        kinesis_client=MagicMock(),
+        logger=logging.getLogger("test_logger"),
+        poll_interval_seconds=150,
+        coordinator=MagicMock(),
+        poll_schedule=AdaptivePollSchedule(min_interval_seconds=10, max_staleness_seconds=40, jitter=0),
+    )
+    assert publisher.max_staleness_seconds == 40
+    publisher.current_round, publisher.current_stage = 1, 0
+    assert publisher._next_poll_delay((0, 0)) == 10
+    assert publisher._next_poll_delay((1, 0)) == 20
+    assert publisher._next_poll_delay((1, 0)) == 40
+    assert publisher._next_poll_delay((1, 0)) == 40
+
+    publisher.poll_schedule = None
+    assert publisher._next_poll_delay((0, 0)) == 150
+    assert publisher.max_staleness_seconds == 150
+
+
+def test_round_change_cuts_wait_short():
+    """Test that a backed-off wait ends as soon as the coordinator reports a new round/stage."""
+    coordinator = MagicMock()
+    coordinator.get_round_and_stage.return_value = (1, 0)
+    kwargs = dict(
+        dht=MagicMock(),
+        kinesis_client=MagicMock(),
+        logger=logging.getLogger("test_logger"),
+        coordinator=coordinator,
+        poll_schedule=AdaptivePollSchedule(min_interval_seconds=10, max_staleness_seconds=60, round_check_seconds=0.01),
+    )
+    threaded = GossipDHTPublisher(**kwargs)
+    async_publisher = OutputsDHTPublisher(**kwargs)
+    for publisher in (threaded, async_publisher):
+        publisher.current_round, publisher.current_stage = 1, 0
+
+    # Unchanged: the wait runs to its end, checking along the way.
+    start = time.monotonic()
+    threaded._wait_for_next_poll(0.05)
+    asyncio.run(async_publisher._wait_for_next_poll_async(0.05))
+    assert time.monotonic() - start >= 0.1
+    assert coordinator.get_round_and_stage.call_count >= 4
+
+    coordinator.get_round_and_stage.return_value = (1, 1)
+    start = time.monotonic()
+    threaded._wait_for_next_poll(60)
+    asyncio.run(async_publisher._wait_for_next_poll_async(60))
+    assert time.monotonic() - start < 5
+
+    # A failing coordinator does not end the wait early.
+    coordinator.get_round_and_stage.side_effect = RuntimeError("unreachable")
+    threaded.current_stage = 1
+    threaded._wait_for_next_poll(0.03)
+
+
+def test_publishers_share_round_checks():
+    """Test that publishers sharing a SharedRoundAndStage make one coordinator call per check between them."""
+    coordinator = MagicMock()
+    coordinator.get_round_and_stage.return_value = (1, 0)
+    shared = SharedRoundAndStage(coordinator, max_age_seconds=0.025)
+    publishers = [
+        GossipDHTPublisher(
+            dht=MagicMock(),
+            kinesis_client=MagicMock(),
+            logger=logging.getLogger("test_logger"),
+            coordinator=shared,
+            poll_schedule=AdaptivePollSchedule(
+                min_interval_seconds=10, max_staleness_seconds=60, round_check_seconds=0.05
+            ),
+        )
+        for _ in range(3)
+    ]
+    threads = []
+    for publisher in publishers:
+        publisher.current_round, publisher.current_stage = 1, 0
+        threads.append(threading.Thread(target=publisher._wait_for_next_poll, args=(0.5,)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # About 10 aligned checks each; unshared, that would be about 30 calls.
+    assert coordinator.get_round_and_stage.call_count <= 12
+
+
+class TestRewardsDHTPublisher:
+    """Tests for the rewards leaderboard publisher."""
+
+    def setup_method(self):
+        self.rewards = {}
+        self.coordinator = MagicMock()
+        self.kinesis = MagicMock()
+
+    def make_publisher(self, cls=RewardsDHTPublisher):
+        publisher = cls(
+            dht=MagicMock(),
+            kinesis_client=self.kinesis,
+            logger=logging.getLogger("test_logger"),
+            coordinator=self.coordinator,
+            leaderboard_size=2,
+        )
+        publisher._get_rewards_data = lambda r, s: self.rewards.get((r, s))
+        return publisher
+
+    def published(self):
+        message = self.kinesis.put_leaderboard.call_args[0][0]
+        return [(e.peer_id, e.score, e.rank) for e in message.data]
+
+    def test_incremental_totals(self):
+        """Test cumulative totals across republished values and stage changes."""
+        publisher = self.make_publisher()
+        self.coordinator.get_round_and_stage.return_value = (0, 0)
+        self.rewards[(0, 0)] = {"a": 1.0, "b": 2.0, "c": 0.5}
+        publisher._poll_once()
+        assert self.published() == [("b", 2.0, 1), ("a", 1.0, 2)]
+
+        # Nothing changed: nothing is published.
+        publisher._poll_once()
+        assert self.kinesis.put_leaderboard.call_count == 1
+
+        # "a" republishes a higher reward for the same stage: only the difference counts.
+        self.rewards[(0, 0)] = {"a": 3.0, "b": 2.0, "c": 0.5}
+        publisher._poll_once()
+        assert self.published() == [("a", 3.0, 1), ("b", 2.0, 2)]
+
+        # The stage ends with a final update, and the next stage starts from zero.
+        self.rewards[(0, 0)] = {"a": 3.0, "b": 2.0, "c": 4.0}
+        self.rewards[(0, 1)] = {"b": [1.0, 1.5]}
+        self.coordinator.get_round_and_stage.return_value = (0, 1)
+        publisher._poll_once()
+        assert publisher.totals == {"a": 3.0, "b": 4.5, "c": 4.0}
+        assert self.published() == [("b", 4.5, 1), ("c", 4.0, 2)]
+
+    def test_zero_reward_peer_is_recorded(self):
+        """Test that a peer whose first reward is zero still enters the totals and leaderboard."""
+        publisher = self.make_publisher()
+        self.coordinator.get_round_and_stage.return_value = (0, 0)
+        self.rewards[(0, 0)] = {"a": 0.0}
+        publisher._poll_once()
+        assert publisher.totals == {"a": 0.0}
+        assert self.published() == [("a", 0.0, 1)]
+
+        # Once known, an unchanged zero is not an update.
+        publisher._poll_once()
+        assert self.kinesis.put_leaderboard.call_count == 1
+
+    def test_async_poll(self):
+        """Test the event-loop variant, which prefetches the current stage's rewards."""
+        publisher = self.make_publisher(AsyncRewardsDHTPublisher)
+        keys = []
+
+        async def get_rewards(r, s):
+            keys.append((r, s))
+            return self.rewards.get((r, s))
+
+        publisher._get_rewards_async = get_rewards
+        self.rewards[(0, 0)] = {"a": 1.0}
+        self.rewards[(1, 0)] = {"b": 2.0}
+
+        async def poll():
+            self.coordinator.get_round_and_stage.return_value = (0, 0)
+            await publisher._poll_once_async()
+            self.coordinator.get_round_and_stage.return_value = (1, 0)
+            await publisher._poll_once_async()
+            await publisher._publish_task
+
+        asyncio.run(poll())
+        assert keys == [(0, 0), (0, 0), (1, 0)]
+        assert self.published() == [("b", 2.0, 1), ("a", 1.0, 2)]
+
+
+class TestOutputsDHTPublisher:
+    """Tests for the concurrent stage outputs publisher."""
+
+    def setup_method(self):
+        self.kinesis = MagicMock()
+        self.kinesis.put_gossip.side_effect = deliver
+        self.coordinator = MagicMock()
+        self.coordinator.get_round_and_stage.return_value = (2, 1)
+        self.dht = MagicMock()
+        self.publisher = OutputsDHTPublisher(
+            dht=self.dht,
+            kinesis_client=self.kinesis,
+            logger=logging.getLogger("test_logger"),
+            coordinator=self.coordinator,
+            max_concurrency=2,
+            fetch_timeout_seconds=0.2,
+        )
+
+    def _serve(self, values, hang=()):
+        """Serves values[key] from dht.get, never resolving keys in `hang`."""
+        self.in_flight = self.max_in_flight = 0
+        lock = threading.Lock()
+
+        def resolve(future, key):
+            with lock:
+                self.in_flight -= 1
+            future.set_result(values.get(key))
+
+        def get(key, return_future=False, **kwargs):
+            assert return_future
+            future = concurrent.futures.Future()
+            with lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            if key not in hang:
+                threading.Timer(0.01, resolve, (future, key)).start()
+            return future
+
+        self.dht.get = MagicMock(side_effect=get)
+
+    @staticmethod
+    def wrap(value):
+        return ValueWithExpiration(value, time.time() + 60)
+
+    def outputs(self, node_key, question):
+        opinion = f"<explain>{node_key} thinks</explain>\n<identify>{node_key}</identify>"
+        return self.wrap({
+            "q" * 32: self.wrap((1700000000.0, {"question": question, "agent_opinion": {node_key: opinion}})),
+        })
+
+    def poll(self):
+        async def poll():
+            await self.publisher._poll_once_async()
+            if self.publisher._publish_task is not None:
+                await self.publisher._publish_task
+
+        asyncio.run(poll())
+
+    def published(self):
+        message = self.kinesis.put_gossip.call_args[0][0]
+        return sorted((d.peer_id, d.message) for d in message.data)
+
+    def test_poll_renders_stage_messages(self):
+        nodes = ["a", "b", "c", "d"]
+        values = {rewards_key(2, 1): self.wrap({n: self.wrap(1.0) for n in nodes})}
+        for n in nodes:
+            values[outputs_key(n, 2, 1)] = self.outputs(n, f"question {n}")
+        self._serve(values)
+
+        self.poll()
+        assert self.published() == [(n, f"{n} thinks...Identify: {n}") for n in nodes]
+        assert self.max_in_flight <= 2
+        assert self.publisher.stats()["fetches"]["fetched"] == 4
+        assert self.publisher.last_polled is not None
+
+        # Nothing new to publish on the next poll.
+        self.kinesis.put_gossip.reset_mock()
+        self.poll()
+        self.kinesis.put_gossip.assert_not_called()
+
+    def test_slow_and_missing_nodes_do_not_stall_poll(self):
+        values = {
+            rewards_key(2, 1): self.wrap({n: self.wrap(1.0) for n in ["fast", "slow", "gone"]}),
+            outputs_key("fast", 2, 1): self.outputs("fast", "q"),
+        }
+        self._serve(values, hang={outputs_key("slow", 2, 1)})
+
+        start = time.monotonic()
+        with patch("hivemind_exp.dht_utils.dht_latency", LatencyHistogram()) as latency:
+            self.poll()
+        assert time.monotonic() - start < 2
+        assert self.published() == [("fast", "fast thinks...Identify: fast")]
+        fetches = self.publisher.stats()["fetches"]
+        assert (fetches["fetched"], fetches["missing"], fetches["timedOut"]) == (1, 1, 1)
+        counts = latency.snapshot()["rl_swarm_outputs"]
+        assert (sum(counts.values()), counts["timeout"]) == (3, 1)
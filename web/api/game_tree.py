@@ -1,27 +1,62 @@
 import sys
 import struct # Added for float serialization
+from array import array
+from collections import Counter
+from contextvars import ContextVar
 from types import NoneType
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple, Type
+from typing import Any, Callable, Dict, List, Tuple, Type
 
-@dataclass
-class Payload(dict):
+from .compression import decompress, is_compressed
+
+try:
+    import numpy
+except ImportError:  # Optional; only needed to decode packed arrays as NumPy arrays.
+    numpy = None
+
+class _FieldMapping:
     """
-    Provides a template for organizing objects being communicated throughout the swarm.
+    Mapping-style access to the fields of a slotted dataclass, so instances can
+    be used both as `obj.field` and `obj["field"]` without carrying a dict.
     """
-    world_state: Any = None
-    actions: Any = None
-    metadata: Any = None
+    __slots__ = ()
 
-    # Methods for emulating a mapping container object
     def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
         return getattr(self, key)
 
     def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
         setattr(self, key, value)
 
-@dataclass
-class WorldState:
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+@dataclass(slots=True)
+class Payload(_FieldMapping):
+    """
+    Provides a template for organizing objects being communicated throughout the swarm.
+    """
+    world_state: Any = None
+    actions: Any = None
+    metadata: Any = None
+
+@dataclass(slots=True)
+class WorldState(_FieldMapping):
     environment_states: List[Any]
     opponent_states: List[Any]
     personal_states: List[Any]
@@ -36,32 +71,52 @@ class ObjType:
     PAYLOAD = 7
     WORLD_STATE = 8
     NONE = 9
+    STRING_REF = 10  # v2 only: index into the blob's string table
+    FLOAT_ARRAY = 11  # v2 only: packed little-endian float64 values
+    INT_ARRAY = 12  # v2 only: packed little-endian ints of 1, 2, 4 or 8 bytes
+    BOOL_ARRAY = 13  # v2 only: packed one-byte booleans
+    PAYLOAD_BATCH = 14  # v2 only: columnar {batch_id: [Payload, ...]}
+
+# Wire format versions. v1 blobs start with the high byte of an 8-byte type tag,
+# which is always zero, so any other leading byte identifies a newer format.
+# v1 is big-endian throughout; v2 stores all fixed-width numbers (scalar floats
+# and packed arrays) little-endian.
+WIRE_V1 = 1
+WIRE_V2 = 2
+
+# Flag bits OR-ed into the leading v2 byte.
+_FLAG_STRING_TABLE = 0x10
 
 #### Deserialization methods ####
 
-def int_from_bytes(b: bytes, i: int) -> Tuple[int, int]:
-    n_bytes = int.from_bytes(b[i : (i + 8)], byteorder="big", signed=False)
+# Decoding runs over a memoryview of the input so headers are read in place and
+# slicing never copies; the only copies made are the final str/int objects.
+_U64 = struct.Struct(">Q")
+_F64 = struct.Struct(">d")
+_F64_V2 = struct.Struct("<d")
+
+def int_from_bytes(b: memoryview, i: int) -> Tuple[int, int]:
+    n_bytes, = _U64.unpack_from(b, i)
     i += 8
     value = int.from_bytes(b[i : (i + n_bytes)], byteorder="big", signed=True)
     return value, i + n_bytes
 
-def float_from_bytes(b: bytes, i: int) -> Tuple[float, int]:
-    n_bytes = int.from_bytes(b[i : (i + 8)], byteorder="big", signed=False)
+def float_from_bytes(b: memoryview, i: int) -> Tuple[float, int]:
+    n_bytes, = _U64.unpack_from(b, i)
     i += 8
-    value_tuple = struct.unpack('>d', b[i : (i + n_bytes)])
-    value = value_tuple[0] # struct.unpack returns a tuple
+    value, = _F64.unpack_from(b, i)
     return value, i + n_bytes
 
-def string_from_bytes(b: bytes, i: int) -> Tuple[str, int]:
-    n_bytes = int.from_bytes(b[i : (i + 8)], byteorder="big", signed=False)
+def string_from_bytes(b: memoryview, i: int) -> Tuple[str, int]:
+    n_bytes, = _U64.unpack_from(b, i)
     i += 8
-    s = b[i : (i + n_bytes)].decode("utf-8")
+    s = str(b[i : (i + n_bytes)], "utf-8")
     i += n_bytes
     return s, i
 
 
-def list_from_bytes(b: bytes, i: int) -> Tuple[List[Any], int]:
-    n_items = int.from_bytes(b[i : (i + 8)], byteorder="big", signed=False)
+def list_from_bytes(b: memoryview, i: int) -> Tuple[List[Any], int]:
+    n_items, = _U64.unpack_from(b, i)
     i += 8
     out = [None] * n_items
 
@@ -70,33 +125,35 @@ def list_from_bytes(b: bytes, i: int) -> Tuple[List[Any], int]:
     return out, i
 
 
-def dict_from_bytes(b: bytes, i: int) -> Tuple[List[Any], int]:
-    n_items = int.from_bytes(b[i : (i + 8)], byteorder="big", signed=False)
+def dict_from_bytes(b: memoryview, i: int) -> Tuple[Dict[Any, Any], int]:
+    n_items, = _U64.unpack_from(b, i)
     i += 8
     out = {}
     for _ in range(n_items):
         key, i = _from_bytes(b, i)
         value, i = _from_bytes(b, i)
-        out[key] = value
+        # Interned so that decoded trees share a single object per distinct key.
+        out[sys.intern(key) if type(key) is str else key] = value
     return out, i
 
-def payload_from_bytes(b: bytes, i: int) -> Tuple[List[Any], int]:
+def payload_from_bytes(b: memoryview, i: int) -> Tuple[Payload, int]:
     world_state, i = _from_bytes(b, i)
     actions, i = _from_bytes(b, i)
     metadata, i = _from_bytes(b, i)
-    return Payload(world_state=world_state, actions=actions, metadata=metadata), i
+    return Payload(world_state, actions, metadata), i
 
-def world_state_from_bytes(b: bytes, i: int) -> Tuple[WorldState, int]:
+def world_state_from_bytes(b: memoryview, i: int) -> Tuple[WorldState, int]:
     environment_states, i = _from_bytes(b, i)
     opponent_states, i = _from_bytes(b, i)
     personal_states, i = _from_bytes(b, i)
-    return WorldState(environment_states=environment_states, opponent_states=opponent_states, personal_states=personal_states), i
+    return WorldState(environment_states, opponent_states, personal_states), i
 
-def none_from_bytes(b: bytes, i: int) -> Tuple[List[Any], int]:
+def none_from_bytes(b: memoryview, i: int) -> Tuple[None, int]:
     return None, i
 
-def boolean_from_bytes(b: bytes, i: int) -> Tuple[List[Any], int]:
-    return b[i] == b"0", i+1
+def boolean_from_bytes(b: memoryview, i: int) -> Tuple[bool, int]:
+    # Booleans are written as the ASCII digits b"0" / b"1".
+    return b[i] == ord("1"), i+1
 
 _DESERIALIZATION_METHOD = {ObjType.LIST: list_from_bytes,
                             ObjType.DICT: dict_from_bytes,
@@ -108,11 +165,8 @@ _DESERIALIZATION_METHOD = {ObjType.LIST: list_from_bytes,
                             ObjType.WORLD_STATE: world_state_from_bytes,
                             ObjType.NONE: none_from_bytes}
 
-def from_bytes(b: bytes) -> Any:
-    return _from_bytes(b, 0)[0]
-
-def _from_bytes(b: bytes, i: int) -> Tuple[Any, int]:
-    obj_type = int.from_bytes(b[i : (i + 8)], byteorder="big", signed=False)
+def _from_bytes(b: memoryview, i: int) -> Tuple[Any, int]:
+    obj_type, = _U64.unpack_from(b, i)
     i += 8
     return serializer_from_bytes(obj_type)(b, i)
 
@@ -123,76 +177,288 @@ def serializer_from_bytes(obj_type: ObjType):
         )
     return _DESERIALIZATION_METHOD[obj_type]
 
+#### v2 deserialization methods ####
+
+# v2 replaces the fixed 8-byte type tags and length headers of v1 with a
+# single tag byte and LEB128 varints; integers are zigzag-encoded varints.
+
+def _read_varint(b: memoryview, i: int) -> Tuple[int, int]:
+    byte = b[i]
+    if byte < 0x80:
+        return byte, i + 1
+    result = byte & 0x7F
+    shift = 7
+    i += 1
+    while True:
+        byte = b[i]
+        i += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, i
+        shift += 7
+
+def int_from_bytes_v2(b: memoryview, i: int) -> Tuple[int, int]:
+    zigzag, i = _read_varint(b, i)
+    return (zigzag >> 1) if not zigzag & 1 else -((zigzag + 1) >> 1), i
+
+def float_from_bytes_v2(b: memoryview, i: int) -> Tuple[float, int]:
+    value, = _F64_V2.unpack_from(b, i)
+    return value, i + 8
+
+def string_from_bytes_v2(b: memoryview, i: int) -> Tuple[str, int]:
+    n_bytes, i = _read_varint(b, i)
+    return str(b[i : (i + n_bytes)], "utf-8"), i + n_bytes
+
+def list_from_bytes_v2(b: memoryview, i: int) -> Tuple[List[Any], int]:
+    n_items, i = _read_varint(b, i)
+    out = [None] * n_items
+    for k in range(n_items):
+        out[k], i = _from_bytes_v2(b, i)
+    return out, i
+
+def dict_from_bytes_v2(b: memoryview, i: int) -> Tuple[Dict[Any, Any], int]:
+    n_items, i = _read_varint(b, i)
+    out = {}
+    for _ in range(n_items):
+        key, i = _from_bytes_v2(b, i)
+        value, i = _from_bytes_v2(b, i)
+        out[sys.intern(key) if type(key) is str else key] = value
+    return out, i
+
+def payload_from_bytes_v2(b: memoryview, i: int) -> Tuple[Payload, int]:
+    world_state, i = _from_bytes_v2(b, i)
+    actions, i = _from_bytes_v2(b, i)
+    metadata, i = _from_bytes_v2(b, i)
+    return Payload(world_state, actions, metadata), i
+
+def world_state_from_bytes_v2(b: memoryview, i: int) -> Tuple[WorldState, int]:
+    environment_states, i = _from_bytes_v2(b, i)
+    opponent_states, i = _from_bytes_v2(b, i)
+    personal_states, i = _from_bytes_v2(b, i)
+    return WorldState(environment_states, opponent_states, personal_states), i
+
+def boolean_from_bytes_v2(b: memoryview, i: int) -> Tuple[bool, int]:
+    return b[i] == 1, i + 1
+
+# How packed numeric arrays are decoded: as lists (the default, equal to what
+# was encoded), as array.array, or as read-only NumPy arrays over the blob.
+ARRAYS_LIST = "list"
+ARRAYS_ARRAY = "array"
+ARRAYS_NUMPY = "numpy"
+_array_mode: ContextVar[str] = ContextVar("_array_mode", default=ARRAYS_LIST)
+
+# array typecodes and NumPy dtypes for the packed element widths.
+_INT_TYPECODES = {array(code).itemsize: code for code in "bhiq"}
+_NUMPY_INT_DTYPES = {1: "<i1", 2: "<i2", 4: "<i4", 8: "<i8"}
+
+def _array_from_bytes(b: memoryview, i: int, n_items: int, typecode: str, dtype: str) -> Tuple[Any, int]:
+    end = i + n_items * array(typecode).itemsize
+    mode = _array_mode.get()
+    if mode == ARRAYS_NUMPY:
+        if numpy is None:
+            raise RuntimeError("Decoding packed arrays as NumPy arrays requires numpy.")
+        return numpy.frombuffer(b, dtype=dtype, count=n_items, offset=i), end
+    values = array(typecode)
+    values.frombytes(b[i:end])
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values.byteswap()
+    return (values if mode == ARRAYS_ARRAY else values.tolist()), end
+
+def float_array_from_bytes_v2(b: memoryview, i: int) -> Tuple[Any, int]:
+    n_items, i = _read_varint(b, i)
+    return _array_from_bytes(b, i, n_items, "d", "<f8")
+
+def int_array_from_bytes_v2(b: memoryview, i: int) -> Tuple[Any, int]:
+    n_items, i = _read_varint(b, i)
+    width = b[i]
+    return _array_from_bytes(b, i + 1, n_items, _INT_TYPECODES[width], _NUMPY_INT_DTYPES[width])
+
+def bool_array_from_bytes_v2(b: memoryview, i: int) -> Tuple[Any, int]:
+    n_items, i = _read_varint(b, i)
+    if _array_mode.get() == ARRAYS_LIST:
+        return [x == 1 for x in b[i : (i + n_items)]], i + n_items
+    return _array_from_bytes(b, i, n_items, "B", "?")
+
+# String table of the blob currently being decoded; set by from_bytes.
+_string_table: ContextVar[List[str] | None] = ContextVar("_string_table", default=None)
+
+def string_ref_from_bytes_v2(b: memoryview, i: int) -> Tuple[str, int]:
+    index, i = _read_varint(b, i)
+    table = _string_table.get()
+    if table is None:
+        raise RuntimeError("String reference found in a blob without a string table.")
+    return table[index], i
+
+def string_table_from_bytes(b: memoryview, i: int) -> Tuple[List[str], int]:
+    """Reads a v2 string table: a varint count of (varint length, utf-8 bytes) entries."""
+    n_strings, i = _read_varint(b, i)
+    table = [""] * n_strings
+    for k in range(n_strings):
+        n_bytes, i = _read_varint(b, i)
+        table[k] = str(b[i : (i + n_bytes)], "utf-8")
+        i += n_bytes
+    return table, i
+
+_DESERIALIZATION_METHOD_V2 = {ObjType.LIST: list_from_bytes_v2,
+                               ObjType.DICT: dict_from_bytes_v2,
+                               ObjType.STRING: string_from_bytes_v2,
+                               ObjType.INTEGER: int_from_bytes_v2,
+                               ObjType.FLOAT: float_from_bytes_v2,
+                               ObjType.BOOLEAN: boolean_from_bytes_v2,
+                               ObjType.PAYLOAD: payload_from_bytes_v2,
+                               ObjType.WORLD_STATE: world_state_from_bytes_v2,
+                               ObjType.NONE: none_from_bytes,
+                               ObjType.STRING_REF: string_ref_from_bytes_v2,
+                               ObjType.FLOAT_ARRAY: float_array_from_bytes_v2,
+                               ObjType.INT_ARRAY: int_array_from_bytes_v2,
+                               ObjType.BOOL_ARRAY: bool_array_from_bytes_v2}
+
+def _from_bytes_v2(b: memoryview, i: int) -> Tuple[Any, int]:
+    obj_type = b[i]
+    method = _DESERIALIZATION_METHOD_V2.get(obj_type)
+    if method is None:
+        raise RuntimeError(
+            f"Unsupported type: {obj_type}; supported types are {list(_DESERIALIZATION_METHOD_V2.keys())}."
+        )
+    return method(b, i + 1)
+
+def wire_version(b: bytes | bytearray | memoryview) -> int:
+    """Returns the wire format version of an encoded blob."""
+    if len(b) and b[0] in (WIRE_V2, WIRE_V2 | _FLAG_STRING_TABLE):
+        return WIRE_V2
+    return WIRE_V1
+
+def has_string_table(b: bytes | bytearray | memoryview) -> bool:
+    """Returns whether an encoded blob starts with a v2 string table."""
+    return wire_version(b) == WIRE_V2 and bool(b[0] & _FLAG_STRING_TABLE)
+
+def from_bytes(b: bytes | bytearray | memoryview, numeric_arrays: str = ARRAYS_LIST) -> Any:
+    """
+    Decodes an object from any bytes-like buffer without copying it. The wire
+    format version, and any compression envelope, is detected from the leading
+    byte. `numeric_arrays` selects how packed v2 arrays are returned; NumPy
+    arrays are zero-copy views that keep the input buffer alive.
+    """
+    view = b if isinstance(b, memoryview) else memoryview(b)
+    view = view.cast("B")
+    if is_compressed(view):
+        view = memoryview(decompress(view))
+    if wire_version(view) != WIRE_V2:
+        return _from_bytes(view, 0)[0]
+    mode_token = _array_mode.set(numeric_arrays)
+    try:
+        if not has_string_table(view):
+            return _from_bytes_v2(view, 1)[0]
+        table, i = string_table_from_bytes(view, 1)
+        token = _string_table.set(table)
+        try:
+            return _from_bytes_v2(view, i)[0]
+        finally:
+            _string_table.reset(token)
+    finally:
+        _array_mode.reset(mode_token)
+
 #### Serialization methods ####
 
-def boolean_to_bytes(obj: bool) -> bytes:
-    type_bytes = ObjType.BOOLEAN.to_bytes(length=8, byteorder="big", signed=False)
-    bool_bytes = b"0" if not obj else b"1"
-    return type_bytes + bool_bytes
-
-def none_to_bytes(obj: None) -> bytes:
-    return ObjType.NONE.to_bytes(length=8, byteorder="big", signed=False)
-
-def payload_to_bytes(obj: Payload) -> bytes:
-    type_bytes = ObjType.PAYLOAD.to_bytes(length=8, byteorder="big", signed=False)
-    world_state_bytes = to_bytes(obj.world_state)
-    actions_bytes = to_bytes(obj.actions)
-    metadata_bytes = to_bytes(obj.metadata)
-    return type_bytes + world_state_bytes + actions_bytes + metadata_bytes
-
-def world_state_to_bytes(obj: WorldState) -> bytes:
-    type_bytes = ObjType.WORLD_STATE.to_bytes(length=8, byteorder="big", signed=False)
-    environment_states_bytes = to_bytes(obj.environment_states)
-    opponent_states_bytes = to_bytes(obj.opponent_states)
-    personal_bytes = to_bytes(obj.personal_states)
-    return type_bytes + environment_states_bytes + opponent_states_bytes + personal_bytes
-    
-def int_to_bytes(obj: int) -> bytes:
-    type_bytes = ObjType.INTEGER.to_bytes(length=8, byteorder="big", signed=False)
+# Encoding appends into a single growing bytearray in one pass instead of
+# concatenating child byte strings at every nesting level.
+_TYPE_HEADER = {
+    obj_type: _U64.pack(obj_type)
+    for obj_type in (
+        ObjType.LIST,
+        ObjType.DICT,
+        ObjType.STRING,
+        ObjType.INTEGER,
+        ObjType.FLOAT,
+        ObjType.BOOLEAN,
+        ObjType.PAYLOAD,
+        ObjType.WORLD_STATE,
+        ObjType.NONE,
+    )
+}
+_FLOAT_SIZE_HEADER = _U64.pack(_F64.size)
+
+class _SpillBuffer(bytearray):
+    """
+    Encoding buffer that hands its contents to a writer whenever it grows past
+    `chunk_size` bytes, so streaming an object never holds all of it in memory.
+    """
+
+    def __init__(self, write: Callable[[bytes], Any], chunk_size: int):
+        super().__init__()
+        self.write = write
+        self.chunk_size = chunk_size
+
+    def spill(self):
+        if self:
+            self.write(bytes(self))
+            del self[:]
+
+def boolean_into(obj: bool, out: bytearray) -> None:
+    out += _TYPE_HEADER[ObjType.BOOLEAN]
+    out += b"1" if obj else b"0"
+
+def none_into(obj: None, out: bytearray) -> None:
+    out += _TYPE_HEADER[ObjType.NONE]
+
+def payload_into(obj: Payload, out: bytearray) -> None:
+    out += _TYPE_HEADER[ObjType.PAYLOAD]
+    _into(obj.world_state, out)
+    _into(obj.actions, out)
+    _into(obj.metadata, out)
+
+def world_state_into(obj: WorldState, out: bytearray) -> None:
+    out += _TYPE_HEADER[ObjType.WORLD_STATE]
+    _into(obj.environment_states, out)
+    _into(obj.opponent_states, out)
+    _into(obj.personal_states, out)
+
+def int_into(obj: int, out: bytearray) -> None:
     byte_length = sys.getsizeof(obj)
-    int_bytes = obj.to_bytes(length=byte_length, byteorder="big", signed=True)
-    size_header = byte_length.to_bytes(length=8, byteorder="big", signed=False)
-    return type_bytes + size_header + int_bytes
-
-def float_to_bytes(obj: float) -> bytes:
-    type_bytes = ObjType.FLOAT.to_bytes(length=8, byteorder="big", signed=False)
-    packed_float_bytes = struct.pack('>d', obj)
-    byte_length = len(packed_float_bytes) # This will be 8 for '>d'
-    size_header = byte_length.to_bytes(length=8, byteorder="big", signed=False)
-    return type_bytes + size_header + packed_float_bytes
-
-def string_to_bytes(obj: str) -> bytes:
+    out += _TYPE_HEADER[ObjType.INTEGER]
+    out += _U64.pack(byte_length)
+    out += obj.to_bytes(length=byte_length, byteorder="big", signed=True)
+
+def float_into(obj: float, out: bytearray) -> None:
+    out += _TYPE_HEADER[ObjType.FLOAT]
+    out += _FLOAT_SIZE_HEADER
+    out += _F64.pack(obj)
+
+def string_into(obj: str, out: bytearray) -> None:
     serialized_obj = obj.encode("utf-8")
-    type_bytes = ObjType.STRING.to_bytes(length=8, byteorder="big", signed=False)
-    len_bytes = len(serialized_obj).to_bytes(length=8, byteorder="big", signed=False)
-    return type_bytes + len_bytes + serialized_obj
-
-def dict_to_bytes(obj: Dict[Any, Any]) -> bytes:
-    type_bytes = ObjType.DICT.to_bytes(length=8, byteorder="big", signed=False)
-    len_bytes = len(obj).to_bytes(length=8, byteorder="big", signed=False)
-    dict_bytes = []
+    out += _TYPE_HEADER[ObjType.STRING]
+    out += _U64.pack(len(serialized_obj))
+    out += serialized_obj
+
+def dict_into(obj: Dict[Any, Any], out: bytearray) -> None:
+    out += _TYPE_HEADER[ObjType.DICT]
+    out += _U64.pack(len(obj))
+    spill = type(out) is _SpillBuffer
     for key, value in obj.items():
-        dict_bytes.append(to_bytes(key))
-        dict_bytes.append(to_bytes(value))
-    return type_bytes + len_bytes + b"".join(dict_bytes)
-
-def list_to_bytes(obj: List[Any]) -> bytes:
-    type_bytes = ObjType.LIST.to_bytes(length=8, byteorder="big", signed=False)
-    count_bytes = len(obj).to_bytes(length=8, byteorder="big", signed=False)
-    header = type_bytes + count_bytes
-    serialized_list = [to_bytes(x) for x in obj]
-    return header + b"".join(serialized_list)
+        _into(key, out)
+        _into(value, out)
+        if spill and len(out) >= out.chunk_size:
+            out.spill()
+
+def list_into(obj: List[Any], out: bytearray) -> None:
+    out += _TYPE_HEADER[ObjType.LIST]
+    out += _U64.pack(len(obj))
+    spill = type(out) is _SpillBuffer
+    for x in obj:
+        _into(x, out)
+        if spill and len(out) >= out.chunk_size:
+            out.spill()
 
 _SERIALIZATION_METHOD = {
-    ObjType.BOOLEAN: boolean_to_bytes,
-    ObjType.NONE: none_to_bytes,
-    ObjType.PAYLOAD: payload_to_bytes,
-    ObjType.WORLD_STATE: world_state_to_bytes,
-    ObjType.INTEGER: int_to_bytes,
-    ObjType.FLOAT: float_to_bytes,
-    ObjType.STRING: string_to_bytes,
-    ObjType.DICT: dict_to_bytes,
-    ObjType.LIST: list_to_bytes
+    ObjType.BOOLEAN: boolean_into,
+    ObjType.NONE: none_into,
+    ObjType.PAYLOAD: payload_into,
+    ObjType.WORLD_STATE: world_state_into,
+    ObjType.INTEGER: int_into,
+    ObjType.FLOAT: float_into,
+    ObjType.STRING: string_into,
+    ObjType.DICT: dict_into,
+    ObjType.LIST: list_into
 }
 
 def serializer_to_bytes(obj_type: Type):
@@ -225,8 +491,453 @@ def _type_to_objtype(obj_type: Type) -> ObjType:
     else:
         raise RuntimeError(f"Unsupported type: {obj_type}")
 
-def to_bytes(obj: Any) -> bytes:
-    obj_type = _type_to_objtype(type(obj))
-    return serializer_to_bytes(obj_type)(obj)
+# Resolved once per Python type so the hot path is a single dict lookup.
+_SERIALIZER_BY_TYPE = {
+    python_type: _SERIALIZATION_METHOD[_type_to_objtype(python_type)]
+    for python_type in (bool, NoneType, Payload, WorldState, int, float, str, dict, list)
+}
+
+def _into(obj: Any, out: bytearray) -> None:
+    serializer = _SERIALIZER_BY_TYPE.get(type(obj))
+    if serializer is None:
+        serializer = serializer_to_bytes(_type_to_objtype(type(obj)))
+    serializer(obj, out)
+
+#### v2 serialization methods ####
+
+def _write_varint(n: int, out: bytearray) -> None:
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def boolean_into_v2(obj: bool, out: bytearray) -> None:
+    out.append(ObjType.BOOLEAN)
+    out.append(1 if obj else 0)
+
+def none_into_v2(obj: None, out: bytearray) -> None:
+    out.append(ObjType.NONE)
+
+def payload_into_v2(obj: Payload, out: bytearray) -> None:
+    out.append(ObjType.PAYLOAD)
+    _into_v2(obj.world_state, out)
+    _into_v2(obj.actions, out)
+    _into_v2(obj.metadata, out)
+
+def world_state_into_v2(obj: WorldState, out: bytearray) -> None:
+    out.append(ObjType.WORLD_STATE)
+    _into_v2(obj.environment_states, out)
+    _into_v2(obj.opponent_states, out)
+    _into_v2(obj.personal_states, out)
+
+def int_into_v2(obj: int, out: bytearray) -> None:
+    out.append(ObjType.INTEGER)
+    _write_varint((obj << 1) if obj >= 0 else ((-obj) << 1) - 1, out)
+
+def float_into_v2(obj: float, out: bytearray) -> None:
+    out.append(ObjType.FLOAT)
+    out += _F64_V2.pack(obj)
+
+# Maps repeated strings to their string table index while encoding with a table.
+_string_index: ContextVar[Dict[str, int] | None] = ContextVar("_string_index", default=None)
+
+def string_into_v2(obj: str, out: bytearray) -> None:
+    index = _string_index.get()
+    if index is not None:
+        ref = index.get(obj)
+        if ref is not None:
+            out.append(ObjType.STRING_REF)
+            _write_varint(ref, out)
+            return
+    serialized_obj = obj.encode("utf-8")
+    out.append(ObjType.STRING)
+    _write_varint(len(serialized_obj), out)
+    out += serialized_obj
+
+def dict_into_v2(obj: Dict[Any, Any], out: bytearray) -> None:
+    out.append(ObjType.DICT)
+    _write_varint(len(obj), out)
+    spill = type(out) is _SpillBuffer
+    for key, value in obj.items():
+        _into_v2(key, out)
+        _into_v2(value, out)
+        if spill and len(out) >= out.chunk_size:
+            out.spill()
+
+def _packed_into(values: array, out: bytearray) -> None:
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values.byteswap()
+    out += values
+
+def _int_width(obj: List[int]) -> int | None:
+    lo, hi = min(obj), max(obj)
+    for width in (1, 2, 4, 8):
+        bound = 1 << (8 * width - 1)
+        if -bound <= lo and hi < bound:
+            return width
+    return None
+
+def _packed_list_into_v2(obj: List[Any], out: bytearray) -> bool:
+    """Writes a homogeneous float/int/bool list as a packed array, if it is one."""
+    item_type = type(obj[0])
+    if item_type not in (float, int, bool):
+        return False
+    for x in obj:
+        if type(x) is not item_type:
+            return False
+    if item_type is float:
+        out.append(ObjType.FLOAT_ARRAY)
+        _write_varint(len(obj), out)
+        _packed_into(array("d", obj), out)
+    elif item_type is bool:
+        out.append(ObjType.BOOL_ARRAY)
+        _write_varint(len(obj), out)
+        out += bytes(obj)
+    else:
+        width = _int_width(obj)
+        if width is None:
+            return False
+        out.append(ObjType.INT_ARRAY)
+        _write_varint(len(obj), out)
+        out.append(width)
+        _packed_into(array(_INT_TYPECODES[width], obj), out)
+    return True
+
+def list_into_v2(obj: List[Any], out: bytearray) -> None:
+    if obj and _packed_list_into_v2(obj, out):
+        return
+    out.append(ObjType.LIST)
+    _write_varint(len(obj), out)
+    spill = type(out) is _SpillBuffer
+    for x in obj:
+        _into_v2(x, out)
+        if spill and len(out) >= out.chunk_size:
+            out.spill()
+
+_SERIALIZATION_METHOD_V2 = {
+    ObjType.BOOLEAN: boolean_into_v2,
+    ObjType.NONE: none_into_v2,
+    ObjType.PAYLOAD: payload_into_v2,
+    ObjType.WORLD_STATE: world_state_into_v2,
+    ObjType.INTEGER: int_into_v2,
+    ObjType.FLOAT: float_into_v2,
+    ObjType.STRING: string_into_v2,
+    ObjType.DICT: dict_into_v2,
+    ObjType.LIST: list_into_v2
+}
+
+_SERIALIZER_BY_TYPE_V2 = {
+    python_type: _SERIALIZATION_METHOD_V2[_type_to_objtype(python_type)]
+    for python_type in _SERIALIZER_BY_TYPE
+}
 
+def _into_v2(obj: Any, out: bytearray) -> None:
+    serializer = _SERIALIZER_BY_TYPE_V2.get(type(obj))
+    if serializer is None:
+        serializer = _SERIALIZATION_METHOD_V2[_type_to_objtype(type(obj))]
+    serializer(obj, out)
+
+#### Columnar payload batches ####
+
+# A PAYLOAD_BATCH stores a {batch_id: [Payload, ...]} dict column by column:
+#
+#   PAYLOAD_BATCH, varint body length,
+#   column of batch ids, column of list sizes, column of all payloads
+#
+# Every column is a kind byte, a varint byte length and the kind's data, so a
+# reader can step over columns it does not need. Payload, WorldState and dicts
+# sharing one key order become struct columns with a child column per field;
+# lists become a sizes column plus a column over their concatenated items.
+# A consumer can thus read, say, every question in the batch in one pass.
+
+class ColumnKind:
+    NONE = 0  # every value is None; no data
+    STRING = 1  # width byte, n + 1 packed byte offsets, concatenated utf-8
+    PACKED = 2  # one v2 packed array holding all values
+    STRUCT = 3  # varint key count, v2-encoded keys, one child column per key
+    PAYLOAD = 4  # child columns for world_state, actions, metadata
+    WORLD_STATE = 5  # child columns for environment/opponent/personal states
+    LIST = 6  # column of list sizes, column over the concatenated items
+    OBJECT = 7  # fallback: the values v2-encoded back to back
+    STRING_REF = 8  # width byte, n packed indexes into the blob's string table
+
+_COLUMN_FIELDS = {
+    ColumnKind.PAYLOAD: ("world_state", "actions", "metadata"),
+    ColumnKind.WORLD_STATE: ("environment_states", "opponent_states", "personal_states"),
+}
+
+def _column_kind(values: List[Any]) -> int:
+    if not values:
+        return ColumnKind.NONE
+    value_type = type(values[0])
+    for x in values:
+        if type(x) is not value_type:
+            return ColumnKind.OBJECT
+    if value_type is NoneType:
+        return ColumnKind.NONE
+    if value_type is str:
+        index = _string_index.get()
+        if index is not None and all(x in index for x in values):
+            return ColumnKind.STRING_REF
+        return ColumnKind.STRING
+    if value_type in (float, int, bool):
+        return ColumnKind.PACKED
+    if value_type is Payload:
+        return ColumnKind.PAYLOAD
+    if value_type is WorldState:
+        return ColumnKind.WORLD_STATE
+    if value_type is list:
+        return ColumnKind.LIST
+    if value_type is dict:
+        keys = list(values[0])
+        for x in values:
+            if len(x) != len(keys) or list(x) != keys:
+                return ColumnKind.OBJECT
+        return ColumnKind.STRUCT
+    return ColumnKind.OBJECT
+
+def _column_data_into(kind: int, values: List[Any], out: bytearray) -> int:
+    """Writes the data of a column and returns the kind actually used."""
+    if kind == ColumnKind.STRING:
+        encoded = [x.encode("utf-8") for x in values]
+        offsets = [0] * (len(encoded) + 1)
+        for k, x in enumerate(encoded):
+            offsets[k + 1] = offsets[k] + len(x)
+        width = _int_width(offsets)
+        out.append(width)
+        _packed_into(array(_INT_TYPECODES[width], offsets), out)
+        for x in encoded:
+            out += x
+    elif kind == ColumnKind.STRING_REF:
+        index = _string_index.get()
+        refs = [index[x] for x in values]
+        width = _int_width(refs)
+        out.append(width)
+        _packed_into(array(_INT_TYPECODES[width], refs), out)
+    elif kind == ColumnKind.PACKED:
+        if not _packed_list_into_v2(values, out):
+            return _column_data_into(ColumnKind.OBJECT, values, out)
+    elif kind == ColumnKind.STRUCT:
+        keys = list(values[0])
+        _write_varint(len(keys), out)
+        for key in keys:
+            _into_v2(key, out)
+        for key in keys:
+            _column_into([x[key] for x in values], out)
+    elif kind in _COLUMN_FIELDS:
+        for field in _COLUMN_FIELDS[kind]:
+            _column_into([getattr(x, field) for x in values], out)
+    elif kind == ColumnKind.LIST:
+        _column_into([len(x) for x in values], out)
+        _column_into([item for x in values for item in x], out)
+    elif kind == ColumnKind.OBJECT:
+        for x in values:
+            _into_v2(x, out)
+    return kind
+
+def _column_into(values: List[Any], out: bytearray) -> None:
+    data = bytearray()
+    kind = _column_data_into(_column_kind(values), values, data)
+    out.append(kind)
+    _write_varint(len(data), out)
+    out += data
+
+def _read_column_header(b: memoryview, i: int) -> Tuple[int, int, int]:
+    """Returns the kind, data offset and end offset of the column at `i`."""
+    kind = b[i]
+    n_bytes, i = _read_varint(b, i + 1)
+    return kind, i, i + n_bytes
+
+def column_from_bytes(b: memoryview, i: int, n_items: int) -> Tuple[List[Any], int]:
+    """Decodes the `n_items` values of the column starting at `i`."""
+    kind, i, end = _read_column_header(b, i)
+    if kind == ColumnKind.NONE:
+        return [None] * n_items, end
+    if kind == ColumnKind.STRING:
+        width = b[i]
+        offsets, i = _array_from_bytes(b, i + 1, n_items + 1, _INT_TYPECODES[width], _NUMPY_INT_DTYPES[width])
+        offsets = list(offsets)
+        return [str(b[(i + offsets[k]) : (i + offsets[k + 1])], "utf-8") for k in range(n_items)], end
+    if kind == ColumnKind.STRING_REF:
+        table = _string_table.get()
+        if table is None:
+            raise RuntimeError("String reference found in a blob without a string table.")
+        width = b[i]
+        refs, _ = _array_from_bytes(b, i + 1, n_items, _INT_TYPECODES[width], _NUMPY_INT_DTYPES[width])
+        return [table[k] for k in refs], end
+    if kind == ColumnKind.PACKED or kind == ColumnKind.OBJECT:
+        values = [None] * n_items
+        if kind == ColumnKind.PACKED:
+            values = list(_from_bytes_v2(b, i)[0])
+        else:
+            for k in range(n_items):
+                values[k], i = _from_bytes_v2(b, i)
+        return values, end
+    if kind == ColumnKind.STRUCT:
+        n_keys, i = _read_varint(b, i)
+        keys = [None] * n_keys
+        for k in range(n_keys):
+            key, i = _from_bytes_v2(b, i)
+            keys[k] = sys.intern(key) if type(key) is str else key
+        columns = [None] * n_keys
+        for k in range(n_keys):
+            columns[k], i = column_from_bytes(b, i, n_items)
+        return [dict(zip(keys, row)) for row in zip(*columns)] if n_keys else [{} for _ in range(n_items)], end
+    if kind in _COLUMN_FIELDS:
+        first, i = column_from_bytes(b, i, n_items)
+        second, i = column_from_bytes(b, i, n_items)
+        third, i = column_from_bytes(b, i, n_items)
+        value_type = Payload if kind == ColumnKind.PAYLOAD else WorldState
+        return [value_type(x, y, z) for x, y, z in zip(first, second, third)], end
+    if kind == ColumnKind.LIST:
+        sizes, i = column_from_bytes(b, i, n_items)
+        items, i = column_from_bytes(b, i, sum(sizes))
+        values = [None] * n_items
+        start = 0
+        for k, size in enumerate(sizes):
+            values[k] = items[start : (start + size)]
+            start += size
+        return values, end
+    raise RuntimeError(f"Unsupported column kind: {kind}")
+
+def _check_payload_batch(obj: Any) -> None:
+    if type(obj) is not dict or not all(
+        type(payloads) is list and all(type(p) is Payload for p in payloads)
+        for payloads in obj.values()
+    ):
+        raise RuntimeError("Columnar encoding requires a dict of Payload lists.")
+
+def payload_batch_into_v2(obj: Dict[Any, List[Payload]], out: bytearray) -> None:
+    _check_payload_batch(obj)
+    payloads = [p for group in obj.values() for p in group]
+    body = bytearray()
+    _write_varint(len(obj), body)
+    _write_varint(len(payloads), body)
+    _column_into(list(obj.keys()), body)
+    _column_into([len(group) for group in obj.values()], body)
+    _column_into(payloads, body)
+    out.append(ObjType.PAYLOAD_BATCH)
+    _write_varint(len(body), out)
+    out += body
+
+def payload_batch_header(b: memoryview, i: int) -> Tuple[int, int, int, int]:
+    """
+    Reads the header of a PAYLOAD_BATCH whose tag precedes `i`. Returns the
+    number of batch ids, the number of payloads, the offset of the first column
+    and the end offset of the batch.
+    """
+    n_bytes, i = _read_varint(b, i)
+    end = i + n_bytes
+    n_groups, i = _read_varint(b, i)
+    n_payloads, i = _read_varint(b, i)
+    return n_groups, n_payloads, i, end
+
+def payload_batch_from_bytes_v2(b: memoryview, i: int) -> Tuple[Dict[Any, List[Payload]], int]:
+    n_groups, n_payloads, i, end = payload_batch_header(b, i)
+    batch_ids, i = column_from_bytes(b, i, n_groups)
+    sizes, i = column_from_bytes(b, i, n_groups)
+    payloads, i = column_from_bytes(b, i, n_payloads)
+    out = {}
+    start = 0
+    for batch_id, size in zip(batch_ids, sizes):
+        out[batch_id] = payloads[start : (start + size)]
+        start += size
+    return out, end
+
+_DESERIALIZATION_METHOD_V2[ObjType.PAYLOAD_BATCH] = payload_batch_from_bytes_v2
+
+def _count_strings(obj: Any, counts: Counter) -> None:
+    obj_type = type(obj)
+    if obj_type is str:
+        counts[obj] += 1
+    elif obj_type is list:
+        for x in obj:
+            _count_strings(x, counts)
+    elif obj_type is dict:
+        for key, value in obj.items():
+            _count_strings(key, counts)
+            _count_strings(value, counts)
+    elif obj_type is Payload:
+        _count_strings(obj.world_state, counts)
+        _count_strings(obj.actions, counts)
+        _count_strings(obj.metadata, counts)
+    elif obj_type is WorldState:
+        _count_strings(obj.environment_states, counts)
+        _count_strings(obj.opponent_states, counts)
+        _count_strings(obj.personal_states, counts)
+
+def repeated_strings(obj: Any) -> List[str]:
+    """Strings that occur more than once in `obj`, most frequent first."""
+    counts = Counter()
+    _count_strings(obj, counts)
+    return [s for s, n in counts.most_common() if n > 1]
+
+def string_table_into(table: List[str], out: bytearray) -> None:
+    _write_varint(len(table), out)
+    for s in table:
+        serialized_obj = s.encode("utf-8")
+        _write_varint(len(serialized_obj), out)
+        out += serialized_obj
+
+def _encode(obj: Any, out: bytearray, version: int, intern_strings: bool = False, columnar: bool = False) -> None:
+    if version == WIRE_V1:
+        if intern_strings or columnar:
+            raise RuntimeError("String interning and columnar batches require the v2 wire format.")
+        _into(obj, out)
+    elif version == WIRE_V2:
+        body_into = payload_batch_into_v2 if columnar else _into_v2
+        if not intern_strings:
+            out.append(WIRE_V2)
+            body_into(obj, out)
+            return
+        # Repeated strings are written once up front and referenced by index,
+        # most frequent first so the common ones get one-byte indices.
+        table = repeated_strings(obj)
+        out.append(WIRE_V2 | _FLAG_STRING_TABLE)
+        string_table_into(table, out)
+        token = _string_index.set({s: k for k, s in enumerate(table)})
+        try:
+            body_into(obj, out)
+        finally:
+            _string_index.reset(token)
+    else:
+        raise RuntimeError(f"Unsupported wire version: {version}; supported versions are {[WIRE_V1, WIRE_V2]}.")
+
+def to_buffer(
+    obj: Any,
+    out: bytearray | None = None,
+    version: int = WIRE_V1,
+    intern_strings: bool = False,
+    columnar: bool = False,
+) -> bytearray:
+    """Appends the encoding of `obj` to `out` (a new bytearray by default) and returns it."""
+    if out is None:
+        out = bytearray()
+    _encode(obj, out, version, intern_strings, columnar)
+    return out
+
+def to_stream(
+    obj: Any,
+    write: Callable[[bytes], Any],
+    chunk_size: int = 1 << 16,
+    version: int = WIRE_V1,
+    intern_strings: bool = False,
+    columnar: bool = False,
+) -> None:
+    """
+    Encodes `obj` in a single pass, passing chunks of roughly `chunk_size` bytes
+    to `write` (e.g. `fp.write` or `sock.sendall`) as they fill up. With
+    `intern_strings` the object is walked once beforehand to build the table.
+    """
+    out = _SpillBuffer(write, chunk_size)
+    _encode(obj, out, version, intern_strings, columnar)
+    out.spill()
 
+def to_bytes(obj: Any, version: int = WIRE_V1, intern_strings: bool = False, columnar: bool = False) -> bytes:
+    """
+    Encodes `obj`. Defaults to v1 so peers running older decoders can read the
+    output; pass `version=WIRE_V2` for the compact format, and additionally
+    `intern_strings=True` to write repeated strings once in a per-blob table.
+    `columnar=True` encodes a {batch_id: [Payload, ...]} dict as a PAYLOAD_BATCH.
+    """
+    return bytes(to_buffer(obj, version=version, intern_strings=intern_strings, columnar=columnar))
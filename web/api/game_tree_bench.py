@@ -0,0 +1,244 @@
+"""
+Benchmarks for the game_tree codec.
+
+Runs seeded synthetic payloads shaped like GRPO rollouts through each codec
+configuration and reports encode/decode throughput, peak allocation and output
+size as JSON, optionally comparing against a stored baseline:
+
+    python -m api.game_tree_bench --output results.json
+    python -m api.game_tree_bench --baseline results.json --tolerance 0.15
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List
+
+from .compression import compress
+from .game_tree import WIRE_V1, WIRE_V2, Payload, WorldState, from_bytes, to_bytes
+from .game_tree_view import PayloadBatchView, iter_payloads, view
+
+_WORDS = (
+    "the of and to a in is that for it as with was on be by this are or so "
+    "then we add subtract multiply divide answer step first next therefore "
+    "total number sum result check value equals because"
+).split()
+_DATASETS = ("basic_arithmetic", "arc_1d", "propositional_logic", "calendar_arithmetic")
+_SYSTEM_PROMPT = (
+    "A conversation between User and Assistant. The user asks a question, and the "
+    "Assistant solves it. The assistant first thinks about the reasoning process in "
+    "the mind and then provides the user with the answer."
+)
+
+
+@dataclass
+class Scenario:
+    """Shape of the synthetic swarm data for one benchmark run."""
+
+    name: str
+    peers: int = 4
+    batches: int = 8
+    generations: int = 4
+    completion_words: int = 60
+    metadata_depth: int = 2
+    seed: int = 42
+
+
+DEFAULT_SCENARIOS = [
+    Scenario("baseline"),
+    Scenario("many_generations", generations=16),
+    Scenario("long_completions", completion_words=400),
+    Scenario("deep_metadata", metadata_depth=6),
+    Scenario("many_peers", peers=32, batches=4),
+]
+
+
+@dataclass
+class Codec:
+    name: str
+    encode: Callable[[Any], bytes]
+
+
+CODECS = [
+    Codec("v1", lambda obj: to_bytes(obj, version=WIRE_V1)),
+    Codec("v2", lambda obj: to_bytes(obj, version=WIRE_V2)),
+    Codec("v2_strings", lambda obj: to_bytes(obj, version=WIRE_V2, intern_strings=True)),
+    Codec("v2_strings_zlib", lambda obj: compress(to_bytes(obj, version=WIRE_V2, intern_strings=True))),
+    Codec("v2_columnar", lambda obj: to_bytes(obj, version=WIRE_V2, intern_strings=True, columnar=True)),
+]
+
+# Metrics where a larger value is worse; throughputs are the opposite.
+_LOWER_IS_BETTER = ("size_bytes", "peak_alloc_bytes")
+_HIGHER_IS_BETTER = ("encode_payloads_s", "decode_payloads_s", "lazy_extract_payloads_s")
+
+
+def _text(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n_words))
+
+
+def _metadata(rng: random.Random, depth: int) -> Dict[str, Any]:
+    metadata = {"source_dataset": rng.choice(_DATASETS), "source_index": rng.randrange(10_000)}
+    node = metadata
+    for level in range(depth):
+        child = {"level": level, "difficulty": rng.random(), "tags": [_text(rng, 1) for _ in range(3)]}
+        node["config"] = child
+        node = child
+    return metadata
+
+
+def make_peer_payloads(scenario: Scenario, rng: random.Random) -> Dict[str, List[Payload]]:
+    """One peer's DHT value: batch id -> payloads, one payload per question."""
+    out = {}
+    for batch in range(scenario.batches):
+        world_state = WorldState(
+            environment_states={
+                "system_prompt": _SYSTEM_PROMPT,
+                "question": _text(rng, 30) + "?",
+                "answer": str(rng.randrange(1000)),
+                "metadata": _metadata(rng, scenario.metadata_depth),
+            },
+            opponent_states=None,
+            personal_states=None,
+        )
+        actions = [
+            f"<think>{_text(rng, scenario.completion_words)}</think>\n<answer>{rng.randrange(1000)}</answer>"
+            for _ in range(scenario.generations)
+        ]
+        metadata = {"rewards": [rng.random() for _ in range(scenario.generations)], "step": rng.randrange(100)}
+        out[str(batch)] = [Payload(world_state=world_state, actions=actions, metadata=metadata)]
+    return out
+
+
+def make_swarm(scenario: Scenario) -> List[Dict[str, List[Payload]]]:
+    rng = random.Random(scenario.seed)
+    return [make_peer_payloads(scenario, rng) for _ in range(scenario.peers)]
+
+
+def _best_of(fn: Callable[[], Any], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_alloc(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _lazy_extract(blob: bytes):
+    # The fields GossipDHTPublisher reads from each payload.
+    root = view(blob)
+    if isinstance(root, PayloadBatchView):
+        root.column("world_state", "environment_states", "question")
+        root.column("world_state", "environment_states", "metadata", "source_dataset")
+        root.column("actions")
+        return
+    for payload in iter_payloads(blob):
+        environment_states = payload["world_state"]["environment_states"]
+        environment_states["question"]
+        environment_states["metadata"]["source_dataset"]
+        payload["actions"][0]
+
+
+def bench_codec(swarm: List[Any], codec: Codec, repeats: int) -> Dict[str, float]:
+    # Throughput is counted in payloads rather than bytes so that codecs with
+    # smaller output are not penalized for it.
+    blobs = [codec.encode(peer) for peer in swarm]
+    n_payloads = sum(len(payloads) for peer in swarm for payloads in peer.values())
+
+    encode_s = _best_of(lambda: [codec.encode(peer) for peer in swarm], repeats)
+    decode_s = _best_of(lambda: [from_bytes(blob) for blob in blobs], repeats)
+    lazy_s = _best_of(lambda: [_lazy_extract(blob) for blob in blobs], repeats)
+    return {
+        "size_bytes": sum(len(blob) for blob in blobs),
+        "encode_payloads_s": n_payloads / encode_s,
+        "decode_payloads_s": n_payloads / decode_s,
+        "lazy_extract_payloads_s": n_payloads / lazy_s,
+        "peak_alloc_bytes": _peak_alloc(lambda: [from_bytes(blob) for blob in blobs]),
+    }
+
+
+def run(scenarios: List[Scenario] = DEFAULT_SCENARIOS, codecs: List[Codec] = CODECS, repeats: int = 5) -> Dict[str, Any]:
+    results = {}
+    for scenario in scenarios:
+        swarm = make_swarm(scenario)
+        results[scenario.name] = {
+            "scenario": asdict(scenario),
+            "codecs": {codec.name: bench_codec(swarm, codec, repeats) for codec in codecs},
+        }
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1) -> List[str]:
+    """
+    Lists every metric that is worse than the baseline by more than `tolerance`
+    (a fraction). Scenarios or codecs missing from either side are ignored.
+    """
+    regressions = []
+    for scenario, entry in results["results"].items():
+        base_entry = baseline["results"].get(scenario)
+        if base_entry is None:
+            continue
+        for codec, metrics in entry["codecs"].items():
+            base_metrics = base_entry["codecs"].get(codec)
+            if base_metrics is None:
+                continue
+            for metric in _LOWER_IS_BETTER:
+                if metrics[metric] > base_metrics[metric] * (1 + tolerance):
+                    regressions.append(f"{scenario}/{codec}/{metric}: {base_metrics[metric]:.0f} -> {metrics[metric]:.0f}")
+            for metric in _HIGHER_IS_BETTER:
+                if metrics[metric] < base_metrics[metric] * (1 - tolerance):
+                    regressions.append(f"{scenario}/{codec}/{metric}: {base_metrics[metric]:.2f} -> {metrics[metric]:.2f}")
+    return regressions
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the game_tree codec.")
+    parser.add_argument("-o", "--output", help="write results JSON to this file")
+    parser.add_argument("-b", "--baseline", help="compare against a stored results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative regression")
+    parser.add_argument("--repeats", type=int, default=5, help="timing repeats (best is kept)")
+    parser.add_argument("--scenario", action="append", help="only run the named scenario(s)")
+    return parser.parse_args()
+
+
+def main(args) -> int:
+    scenarios = DEFAULT_SCENARIOS
+    if args.scenario:
+        scenarios = [s for s in DEFAULT_SCENARIOS if s.name in args.scenario]
+    results = run(scenarios, repeats=args.repeats)
+
+    serialized = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(serialized)
+    else:
+        print(serialized)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_arguments()))
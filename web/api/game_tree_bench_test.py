@@ -0,0 +1,52 @@
+import copy
+
+from .game_tree import from_bytes, to_bytes
+from .game_tree_bench import CODECS, Scenario, compare, make_swarm, run
+
+
+def test_make_swarm_is_seeded():
+    """Test that synthetic swarms are reproducible and shaped as configured"""
+    scenario = Scenario("tiny", peers=2, batches=3, generations=5, metadata_depth=3)
+    swarm = make_swarm(scenario)
+    assert to_bytes(swarm) == to_bytes(make_swarm(scenario))
+
+    assert len(swarm) == 2
+    payload = swarm[0]["0"][0]
+    assert len(swarm[0]) == 3
+    assert len(payload.actions) == 5
+    assert payload.world_state.environment_states["metadata"]["config"]["config"]["config"]["level"] == 2
+    assert from_bytes(to_bytes(swarm)) == swarm
+
+
+def test_run_reports_every_codec():
+    """Test a minimal benchmark run"""
+    results = run([Scenario("tiny", peers=1, batches=2)], repeats=1)
+    codecs = results["results"]["tiny"]["codecs"]
+    assert set(codecs) == {codec.name for codec in CODECS}
+    for metrics in codecs.values():
+        assert metrics["size_bytes"] > 0
+        assert metrics["decode_payloads_s"] > 0
+        assert metrics["peak_alloc_bytes"] > 0
+    assert codecs["v2"]["size_bytes"] < codecs["v1"]["size_bytes"]
+
+
+def test_compare_flags_regressions():
+    """Test that compare reports metrics worse than the baseline beyond tolerance"""
+    metrics = {
+        "size_bytes": 1000,
+        "encode_payloads_s": 10.0,
+        "decode_payloads_s": 10.0,
+        "lazy_extract_payloads_s": 10.0,
+        "peak_alloc_bytes": 5000,
+    }
+    baseline = {"results": {"s": {"codecs": {"v2": metrics}}}}
+    results = copy.deepcopy(baseline)
+    assert compare(results, baseline) == []
+
+    results["results"]["s"]["codecs"]["v2"]["size_bytes"] = 1200
+    results["results"]["s"]["codecs"]["v2"]["decode_payloads_s"] = 9.5
+    results["results"]["s"]["codecs"]["v2"]["encode_payloads_s"] = 5.0
+    regressions = compare(results, baseline, tolerance=0.1)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("s/v2/size_bytes")
+    assert regressions[1].startswith("s/v2/encode_payloads_s")
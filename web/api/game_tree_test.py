@@ -0,0 +1,285 @@
+import io
+import struct
+from array import array
+
+import pytest
+
+from .game_tree import (
+    ARRAYS_ARRAY,
+    ARRAYS_NUMPY,
+    WIRE_V1,
+    WIRE_V2,
+    Payload,
+    WorldState,
+    from_bytes,
+    to_buffer,
+    to_bytes,
+    to_stream,
+    repeated_strings,
+    wire_version,
+)
+
+
+def make_payload_dict():
+    """Build a payload dict shaped like the ones nodes publish to the DHT."""
+    world_state = WorldState(
+        environment_states={
+            "question": "What is 2+2?",
+            "answer": "4",
+            "metadata": {"source_dataset": "basic_arithmetic", "index": 7},
+        },
+        opponent_states=None,
+        personal_states=[1.5, -3, True, False, None],
+    )
+    payload = Payload(
+        world_state=world_state,
+        actions=["<think>easy</think><answer>4</answer>", "ünïcødé"],
+        metadata={"rewards": [0.0, 1.0], "big": 2**70, "neg": -12345},
+    )
+    return {"batch_0": [payload], "batch_1": []}
+
+
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview])
+def test_round_trip_buffer_types(wrap):
+    """Test that decoding works over bytes, bytearray and memoryview inputs"""
+    obj = make_payload_dict()
+    assert from_bytes(wrap(to_bytes(obj))) == obj
+
+
+def test_boolean_round_trip():
+    """Test that booleans decode to the value they were encoded with"""
+    assert from_bytes(to_bytes(True)) is True
+    assert from_bytes(to_bytes(False)) is False
+    assert from_bytes(to_bytes([True, False])) == [True, False]
+
+
+def test_decode_sub_buffer():
+    """Test decoding an encoded object embedded in a larger buffer"""
+    encoded = to_bytes({"question": "q"})
+    view = memoryview(b"junk" + encoded + b"tail")[4 : 4 + len(encoded)]
+    assert from_bytes(view) == {"question": "q"}
+
+
+def test_unsupported_type():
+    """Test that unknown type tags are rejected"""
+    with pytest.raises(RuntimeError, match="Unsupported type"):
+        from_bytes((99).to_bytes(8, "big"))
+
+
+def test_v1_wire_format_is_stable():
+    """Test that the encoder output is byte-identical to the original v1 encoder"""
+    expected = bytes.fromhex(
+        "0000000000000002" "0000000000000001"  # dict, 1 item
+        "0000000000000003" "0000000000000001" "71"  # "q"
+        "0000000000000001" "0000000000000004"  # list, 4 items
+        "0000000000000004" "000000000000001c" + "00" * 27 + "01"  # int 1 (28 bytes)
+        "0000000000000005" "0000000000000008" "4004000000000000"  # 2.5
+        "0000000000000006" "31"  # True
+        "0000000000000009"  # None
+    )
+    assert to_bytes({"q": [1, 2.5, True, None]}) == expected
+
+
+def test_to_buffer_appends():
+    """Test that to_buffer appends to an existing bytearray"""
+    out = bytearray(b"prefix")
+    to_buffer("abc", out)
+    assert bytes(out) == b"prefix" + to_bytes("abc")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 1 << 16])
+def test_to_stream_matches_to_bytes(chunk_size):
+    """Test that streamed output matches to_bytes regardless of chunking"""
+    obj = make_payload_dict()
+    sink = io.BytesIO()
+    to_stream(obj, sink.write, chunk_size=chunk_size)
+    assert sink.getvalue() == to_bytes(obj)
+
+
+def test_unsupported_python_type():
+    """Test that encoding an unsupported type raises"""
+    with pytest.raises(RuntimeError, match="Unsupported type"):
+        to_bytes({"x": (1, 2)})
+
+
+@pytest.mark.parametrize("version", [WIRE_V1, WIRE_V2])
+def test_from_bytes_detects_version(version):
+    """Test that from_bytes decodes both wire versions without being told which"""
+    obj = make_payload_dict()
+    encoded = to_bytes(obj, version=version)
+    assert wire_version(encoded) == version
+    assert from_bytes(encoded) == obj
+
+
+@pytest.mark.parametrize(
+    "value", [0, 1, -1, 63, -64, 64, 127, 128, -129, 2**63, -(2**63) - 1, 2**200]
+)
+def test_v2_int_round_trip(value):
+    """Test zigzag varint integers across byte-width boundaries"""
+    assert from_bytes(to_bytes(value, version=WIRE_V2)) == value
+
+
+def test_v2_floats_are_little_endian():
+    """Test that v2 scalar floats share the byte order of packed float arrays"""
+    assert to_bytes(2.5, version=WIRE_V2) == bytes([WIRE_V2, 5]) + struct.pack("<d", 2.5)
+    packed = to_bytes([2.5, 2.5], version=WIRE_V2)
+    assert packed.endswith(struct.pack("<d", 2.5) * 2)
+    assert from_bytes(to_bytes([2.5, "x"], version=WIRE_V2)) == [2.5, "x"]
+
+
+def test_v2_is_smaller():
+    """Test that v2 headers shrink small-value payloads"""
+    obj = make_payload_dict()
+    assert len(to_bytes(obj, version=WIRE_V2)) < len(to_bytes(obj)) // 2
+    assert to_bytes(5, version=WIRE_V2) == bytes([WIRE_V2, 4, 10])
+
+
+def test_v2_stream_matches_to_bytes():
+    """Test that v2 streaming output matches to_bytes"""
+    obj = make_payload_dict()
+    sink = io.BytesIO()
+    to_stream(obj, sink.write, chunk_size=16, version=WIRE_V2)
+    assert sink.getvalue() == to_bytes(obj, version=WIRE_V2)
+
+
+def test_unsupported_version():
+    """Test that unknown wire versions are rejected when encoding"""
+    with pytest.raises(RuntimeError, match="Unsupported wire version"):
+        to_bytes("x", version=7)
+
+
+def test_interned_round_trip():
+    """Test that blobs with a string table decode to the original object"""
+    obj = [make_payload_dict() for _ in range(3)]
+    encoded = to_bytes(obj, version=WIRE_V2, intern_strings=True)
+    assert from_bytes(encoded) == obj
+    assert len(encoded) < len(to_bytes(obj, version=WIRE_V2))
+
+
+def test_interned_strings_are_shared():
+    """Test that repeated strings decode to a single shared object"""
+    question = "".join(["What is", " 2+2?"])
+    obj = [{"question": question}, {"question": question}]
+    for intern_strings in (False, True):
+        decoded = from_bytes(to_bytes(obj, version=WIRE_V2, intern_strings=intern_strings))
+        keys = [next(iter(d)) for d in decoded]
+        assert keys[0] is keys[1]
+    assert decoded[0]["question"] is decoded[1]["question"]
+
+
+def test_repeated_strings_order():
+    """Test that the string table only holds repeated strings, most frequent first"""
+    obj = {"a": ["x", "y", "y", "y", "unique"], "b": "x"}
+    assert repeated_strings(obj) == ["y", "x"]
+
+
+def test_interning_requires_v2():
+    """Test that string interning is rejected for the v1 format"""
+    with pytest.raises(RuntimeError, match="require the v2 wire format"):
+        to_bytes("x", intern_strings=True)
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [0.0, 1.5, -2.25],
+        [1, -1, 127],
+        [300, -300],
+        [2**40, -(2**40)],
+        [True, False, True],
+        [1, 2.0],  # Mixed lists are not packed.
+        [2**64, 1],  # Too wide for int64; not packed.
+    ],
+)
+def test_packed_array_round_trip(values):
+    """Test that numeric lists round-trip through the v2 packed array types"""
+    decoded = from_bytes(to_bytes({"rewards": values}, version=WIRE_V2))
+    assert decoded == {"rewards": values}
+    assert [type(x) for x in decoded["rewards"]] == [type(x) for x in values]
+
+
+def test_packed_arrays_are_smaller():
+    """Test that packed float arrays cost 8 bytes per element"""
+    rewards = [0.5] * 100
+    packed = to_bytes(rewards, version=WIRE_V2)
+    assert len(packed) == 1 + 1 + 1 + 8 * 100
+    assert len(to_bytes(rewards)) > 2.5 * len(packed)
+
+
+def test_packed_array_modes():
+    """Test decoding packed arrays as array.array and NumPy arrays"""
+    encoded = to_bytes([[0.5, 1.5], [1, 2, 3]], version=WIRE_V2)
+    floats, ints = from_bytes(encoded, numeric_arrays=ARRAYS_ARRAY)
+    assert floats == array("d", [0.5, 1.5])
+    assert ints.tolist() == [1, 2, 3] and ints.itemsize == 1
+
+    numpy = pytest.importorskip("numpy")
+    floats, ints = from_bytes(encoded, numeric_arrays=ARRAYS_NUMPY)
+    assert isinstance(floats, numpy.ndarray)
+    assert floats.tolist() == [0.5, 1.5]
+    assert not floats.flags.writeable  # A view over the encoded bytes.
+    assert ints.tolist() == [1, 2, 3]
+
+
+def test_payload_attribute_and_mapping_access():
+    """Test that Payload and WorldState support both access styles without a __dict__"""
+    payload = make_payload_dict()["batch_0"][0]
+    assert not hasattr(payload, "__dict__")
+    assert not hasattr(payload.world_state, "__dict__")
+
+    assert payload["actions"] is payload.actions
+    assert payload["world_state"]["environment_states"]["question"] == "What is 2+2?"
+    payload["metadata"] = {"step": 1}
+    assert payload.metadata == {"step": 1}
+    assert "world_state" in payload and "other" not in payload
+    assert payload.keys() == ["world_state", "actions", "metadata"]
+    assert payload.get("other", 5) == 5
+    with pytest.raises(KeyError):
+        payload["other"]
+    with pytest.raises(KeyError):
+        payload["other"] = 1
+
+
+def make_batch(n_payloads=6):
+    payloads = []
+    for k in range(n_payloads):
+        payload = make_payload_dict()["batch_0"][0]
+        payload.world_state.environment_states["question"] = f"What is {k}+{k}?"
+        payloads.append(payload)
+    return {"batch_0": payloads[:4], "batch_1": [], "batch_2": payloads[4:]}
+
+
+@pytest.mark.parametrize("intern_strings", [False, True])
+def test_columnar_round_trip(intern_strings):
+    """Test that columnar payload batches decode to the original dict"""
+    obj = make_batch()
+    encoded = to_bytes(obj, version=WIRE_V2, intern_strings=intern_strings, columnar=True)
+    assert from_bytes(encoded) == obj
+    assert len(encoded) < len(to_bytes(obj, version=WIRE_V2, intern_strings=intern_strings))
+
+
+def test_columnar_heterogeneous_fields():
+    """Test that fields whose values differ in shape across payloads still round-trip"""
+    obj = make_batch(3)
+    obj["batch_0"][1].metadata = None
+    obj["batch_0"][2].world_state.environment_states["extra"] = [1, "two"]
+    obj["batch_0"][0].actions = ["a", 2**70]
+    assert from_bytes(to_bytes(obj, version=WIRE_V2, columnar=True)) == obj
+
+
+def test_columnar_requires_payload_batch():
+    """Test that columnar encoding is rejected for other shapes and for v1"""
+    with pytest.raises(RuntimeError, match="dict of Payload lists"):
+        to_bytes({"batch_0": [{"not": "a payload"}]}, version=WIRE_V2, columnar=True)
+    with pytest.raises(RuntimeError, match="require the v2 wire format"):
+        to_bytes(make_batch(), columnar=True)
+
+
+def test_columnar_unknown_to_older_readers(monkeypatch):
+    """Test that a reader without PAYLOAD_BATCH support fails cleanly"""
+    from . import game_tree
+
+    encoded = to_bytes(make_batch(), version=WIRE_V2, columnar=True)
+    monkeypatch.delitem(game_tree._DESERIALIZATION_METHOD_V2, game_tree.ObjType.PAYLOAD_BATCH)
+    with pytest.raises(RuntimeError, match="Unsupported type"):
+        from_bytes(encoded)
@@ -0,0 +1,391 @@
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .compression import decompress, is_compressed
+from .game_tree import (
+    _COLUMN_FIELDS,
+    _DESERIALIZATION_METHOD,
+    _DESERIALIZATION_METHOD_V2,
+    _U64,
+    WIRE_V2,
+    ColumnKind,
+    ObjType,
+    Payload,
+    _from_bytes,
+    _from_bytes_v2,
+    _read_column_header,
+    _read_varint,
+    _string_table,
+    column_from_bytes,
+    has_string_table,
+    payload_batch_from_bytes_v2,
+    payload_batch_header,
+    string_table_from_bytes,
+    wire_version,
+)
+
+# Lazy, read-only access to encoded game trees. Views walk the encoded bytes in
+# place: containers are only indexed (and their skip tables built) when a caller
+# reaches into them, and everything a caller never names is stepped over by its
+# length header without being decoded. Packed numeric arrays are the exception:
+# they decode with a single copy, so they are returned as lists wherever they are.
+
+_CONTAINER_TYPES = frozenset(
+    (ObjType.LIST, ObjType.DICT, ObjType.PAYLOAD, ObjType.WORLD_STATE)
+)
+_PACKED_TYPES = frozenset((ObjType.FLOAT_ARRAY, ObjType.INT_ARRAY, ObjType.BOOL_ARRAY))
+_PAYLOAD_FIELDS = ("world_state", "actions", "metadata")
+_WORLD_STATE_FIELDS = ("environment_states", "opponent_states", "personal_states")
+
+
+def _skip_v1(b: memoryview, i: int) -> int:
+    """Returns the offset just past the v1-encoded object starting at `i`."""
+    obj_type, = _U64.unpack_from(b, i)
+    i += 8
+    if obj_type == ObjType.STRING or obj_type == ObjType.INTEGER or obj_type == ObjType.FLOAT:
+        n_bytes, = _U64.unpack_from(b, i)
+        return i + 8 + n_bytes
+    if obj_type == ObjType.LIST or obj_type == ObjType.DICT:
+        n_items, = _U64.unpack_from(b, i)
+        i += 8
+        for _ in range(n_items if obj_type == ObjType.LIST else 2 * n_items):
+            i = _skip_v1(b, i)
+        return i
+    if obj_type == ObjType.PAYLOAD or obj_type == ObjType.WORLD_STATE:
+        return _skip_v1(b, _skip_v1(b, _skip_v1(b, i)))
+    if obj_type == ObjType.BOOLEAN:
+        return i + 1
+    if obj_type == ObjType.NONE:
+        return i
+    raise RuntimeError(f"Unsupported type: {obj_type}")
+
+
+def _skip_v2(b: memoryview, i: int) -> int:
+    """Returns the offset just past the v2-encoded object starting at `i`."""
+    obj_type = b[i]
+    i += 1
+    if obj_type == ObjType.STRING:
+        n_bytes, i = _read_varint(b, i)
+        return i + n_bytes
+    if obj_type == ObjType.INTEGER or obj_type == ObjType.STRING_REF:
+        while b[i] & 0x80:
+            i += 1
+        return i + 1
+    if obj_type == ObjType.FLOAT:
+        return i + 8
+    if obj_type == ObjType.FLOAT_ARRAY:
+        n_items, i = _read_varint(b, i)
+        return i + 8 * n_items
+    if obj_type == ObjType.INT_ARRAY:
+        n_items, i = _read_varint(b, i)
+        return i + 1 + b[i] * n_items
+    if obj_type == ObjType.BOOL_ARRAY:
+        n_items, i = _read_varint(b, i)
+        return i + n_items
+    if obj_type == ObjType.LIST or obj_type == ObjType.DICT:
+        n_items, i = _read_varint(b, i)
+        for _ in range(n_items if obj_type == ObjType.LIST else 2 * n_items):
+            i = _skip_v2(b, i)
+        return i
+    if obj_type == ObjType.PAYLOAD_BATCH:
+        n_bytes, i = _read_varint(b, i)
+        return i + n_bytes
+    if obj_type == ObjType.PAYLOAD or obj_type == ObjType.WORLD_STATE:
+        return _skip_v2(b, _skip_v2(b, _skip_v2(b, i)))
+    if obj_type == ObjType.BOOLEAN:
+        return i + 1
+    if obj_type == ObjType.NONE:
+        return i
+    raise RuntimeError(f"Unsupported type: {obj_type}")
+
+
+class _V1Layout:
+    """Header layout of the v1 wire format: 8-byte tags and lengths."""
+
+    @staticmethod
+    def read_tag(b: memoryview, i: int) -> Tuple[int, int]:
+        return _U64.unpack_from(b, i)[0], i + 8
+
+    @staticmethod
+    def read_count(b: memoryview, i: int) -> Tuple[int, int]:
+        return _U64.unpack_from(b, i)[0], i + 8
+
+    skip = staticmethod(_skip_v1)
+    decoders = _DESERIALIZATION_METHOD
+    decode = staticmethod(_from_bytes)
+
+
+class _V2Layout:
+    """Header layout of the v2 wire format: 1-byte tags and varint lengths."""
+
+    @staticmethod
+    def read_tag(b: memoryview, i: int) -> Tuple[int, int]:
+        return b[i], i + 1
+
+    read_count = staticmethod(_read_varint)
+    skip = staticmethod(_skip_v2)
+    decoders = _DESERIALIZATION_METHOD_V2
+    decode = staticmethod(_from_bytes_v2)
+
+
+class GameTreeView:
+    """
+    A lazy view over one encoded container (list, dict, Payload or WorldState).
+
+    Indexing returns scalars decoded on the spot and nested containers as further
+    views. Payload and WorldState fields are looked up by name, as with
+    `Payload.__getitem__`. Use `decode()` to materialize the whole subtree.
+
+    Child offsets are discovered incrementally and kept in a skip table, and
+    views handed out for nested containers are kept so that finding where they
+    end reuses whatever part of them the caller already walked. A blob is
+    therefore scanned about once however its fields are accessed.
+    """
+
+    __slots__ = ("_buf", "_layout", "_strings", "_offset", "obj_type", "_count", "_first", "_starts", "_views")
+
+    def __init__(self, buf: memoryview, offset: int, layout, strings: List[str] | None = None):
+        self._buf = buf
+        self._layout = layout
+        self._strings = strings
+        self._offset = offset
+        self.obj_type, body = layout.read_tag(buf, offset)
+        if self.obj_type in (ObjType.PAYLOAD, ObjType.WORLD_STATE):
+            self._count = 3
+        elif self.obj_type in (ObjType.LIST, ObjType.DICT):
+            self._count, body = layout.read_count(buf, body)
+            if self.obj_type == ObjType.DICT:
+                self._count *= 2
+        else:
+            raise RuntimeError(f"Cannot create a view over scalar type: {self.obj_type}")
+        # Dict children alternate key, value.
+        self._first = body
+        self._starts = [body]
+        self._views = {}
+
+    def _start(self, k: int) -> int:
+        starts = self._starts
+        while len(starts) <= k:
+            starts.append(self._end_of(len(starts) - 1))
+        return starts[k]
+
+    def _end_of(self, k: int) -> int:
+        child = self._views.get(k)
+        if child is not None:
+            return child._end()
+        return self._layout.skip(self._buf, self._start(k))
+
+    def _end(self) -> int:
+        if not self._count:
+            return self._first
+        return self._end_of(self._count - 1)
+
+    def _child(self, k: int) -> Any:
+        child = self._views.get(k)
+        if child is not None:
+            return child
+        i = self._start(k)
+        obj_type, body = self._layout.read_tag(self._buf, i)
+        if obj_type in _CONTAINER_TYPES:
+            child = self._views[k] = GameTreeView(self._buf, i, self._layout, self._strings)
+            return child
+        if obj_type == ObjType.STRING_REF:
+            return self._strings[_read_varint(self._buf, body)[0]]
+        decoder = self._layout.decoders.get(obj_type)
+        if decoder is None:
+            raise RuntimeError(f"Unsupported type: {obj_type}")
+        return decoder(self._buf, body)[0]
+
+    def _fields(self) -> Tuple[str, ...]:
+        return _PAYLOAD_FIELDS if self.obj_type == ObjType.PAYLOAD else _WORLD_STATE_FIELDS
+
+    def _key_matches(self, k: int, key: Any) -> bool:
+        # Compares string keys against their encoded bytes without decoding them.
+        if type(key) is str:
+            obj_type, body = self._layout.read_tag(self._buf, self._start(k))
+            if obj_type == ObjType.STRING_REF:
+                return self._strings[_read_varint(self._buf, body)[0]] == key
+            if obj_type != ObjType.STRING:
+                return False
+            n_bytes, body = self._layout.read_count(self._buf, body)
+            return self._buf[body : body + n_bytes] == key.encode("utf-8")
+        return self._child(k) == key
+
+    def __len__(self) -> int:
+        return self._count // 2 if self.obj_type == ObjType.DICT else self._count
+
+    def __getitem__(self, key: Any) -> Any:
+        if self.obj_type == ObjType.LIST:
+            k = key + self._count if key < 0 else key
+            if not 0 <= k < self._count:
+                raise IndexError("list index out of range")
+            return self._child(k)
+        if self.obj_type == ObjType.DICT:
+            for k in range(0, self._count, 2):
+                if self._key_matches(k, key):
+                    return self._child(k + 1)
+            raise KeyError(key)
+        fields = self._fields()
+        if key not in fields:
+            raise KeyError(key)
+        return self._child(fields.index(key))
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.obj_type == ObjType.LIST:
+            for k in range(self._count):
+                yield self._child(k)
+        elif self.obj_type == ObjType.DICT:
+            for k in range(0, self._count, 2):
+                yield self._child(k)
+        else:
+            yield from self._fields()
+
+    def keys(self) -> List[Any]:
+        return list(self)
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        if self.obj_type == ObjType.DICT:
+            for k in range(0, self._count, 2):
+                yield self._child(k), self._child(k + 1)
+        else:
+            for k, field in enumerate(self._fields()):
+                yield field, self._child(k)
+
+    def decode(self) -> Any:
+        """Fully decodes the subtree under this view."""
+        token = _string_table.set(self._strings)
+        try:
+            return self._layout.decode(self._buf, self._offset)[0]
+        finally:
+            _string_table.reset(token)
+
+
+class PayloadBatchView:
+    """
+    Column access over a columnar PAYLOAD_BATCH blob. `column(*path)` decodes a
+    single field for every payload in the batch, stepping over all other
+    columns by their byte lengths.
+    """
+
+    __slots__ = ("_buf", "_strings", "_offset", "n_groups", "n_payloads", "_columns")
+
+    def __init__(self, buf: memoryview, offset: int, strings: List[str] | None = None):
+        self._buf = buf
+        self._strings = strings
+        self._offset = offset
+        self.n_groups, self.n_payloads, self._columns, _ = payload_batch_header(buf, offset + 1)
+
+    def __len__(self) -> int:
+        return self.n_payloads
+
+    def _decode_column(self, i: int, n_items: int) -> List[Any]:
+        token = _string_table.set(self._strings)
+        try:
+            return column_from_bytes(self._buf, i, n_items)[0]
+        finally:
+            _string_table.reset(token)
+
+    def _payloads_column(self) -> int:
+        i = self._columns
+        for _ in range(2):  # batch ids, sizes
+            i = _read_column_header(self._buf, i)[2]
+        return i
+
+    def batch_ids(self) -> List[Any]:
+        return self._decode_column(self._columns, self.n_groups)
+
+    def sizes(self) -> List[int]:
+        return self._decode_column(_read_column_header(self._buf, self._columns)[2], self.n_groups)
+
+    def column(self, *path: Any) -> List[Any]:
+        """
+        Returns the value at `path` (e.g. "world_state", "environment_states",
+        "question") for every payload, in batch order.
+        """
+        b = self._buf
+        i = self._payloads_column()
+        for depth, key in enumerate(path):
+            kind, data, _ = _read_column_header(b, i)
+            if kind in _COLUMN_FIELDS:
+                fields = _COLUMN_FIELDS[kind]
+                if key not in fields:
+                    raise KeyError(key)
+                i = data
+                for _ in range(fields.index(key)):
+                    i = _read_column_header(b, i)[2]
+            elif kind == ColumnKind.STRUCT:
+                n_keys, i = _read_varint(b, data)
+                keys = []
+                token = _string_table.set(self._strings)
+                try:
+                    for _ in range(n_keys):
+                        k, i = _from_bytes_v2(b, i)
+                        keys.append(k)
+                finally:
+                    _string_table.reset(token)
+                if key not in keys:
+                    raise KeyError(key)
+                for _ in range(keys.index(key)):
+                    i = _read_column_header(b, i)[2]
+            elif kind in (ColumnKind.OBJECT, ColumnKind.NONE):
+                # Heterogeneous values were stored whole; finish the lookup per value.
+                return [_lookup(x, path[depth:]) for x in self._decode_column(i, self.n_payloads)]
+            else:
+                raise KeyError(key)
+        return self._decode_column(i, self.n_payloads)
+
+    def decode(self) -> Dict[Any, List[Payload]]:
+        """Decodes the whole batch back into a {batch_id: [Payload, ...]} dict."""
+        token = _string_table.set(self._strings)
+        try:
+            return payload_batch_from_bytes_v2(self._buf, self._offset + 1)[0]
+        finally:
+            _string_table.reset(token)
+
+
+def _lookup(value: Any, path: Tuple[Any, ...]) -> Any:
+    for key in path:
+        if value is None:
+            return None
+        value = value[key]
+    return value
+
+
+def view(b: bytes | bytearray | memoryview) -> GameTreeView | PayloadBatchView | List[Any]:
+    """
+    Returns a lazy view over the top-level container of an encoded blob, or the
+    decoded list if it is a packed numeric array.
+    """
+    buf = b if isinstance(b, memoryview) else memoryview(b)
+    buf = buf.cast("B")
+    if is_compressed(buf):
+        buf = memoryview(decompress(buf))
+    if wire_version(buf) == WIRE_V2:
+        strings, i = None, 1
+        if has_string_table(buf):
+            strings, i = string_table_from_bytes(buf, 1)
+        if buf[i] == ObjType.PAYLOAD_BATCH:
+            return PayloadBatchView(buf, i, strings)
+        if buf[i] in _PACKED_TYPES:
+            return _DESERIALIZATION_METHOD_V2[buf[i]](buf, i + 1)[0]
+        return GameTreeView(buf, i, _V2Layout, strings)
+    return GameTreeView(buf, 0, _V1Layout)
+
+
+def iter_payloads(b: bytes | bytearray | memoryview) -> Iterator[GameTreeView | Payload]:
+    """
+    Yields each payload of a `{batch_id: [Payload, ...]}` blob: as a lazy view,
+    or decoded for columnar batches (read those with `column()` instead).
+    """
+    root = view(b)
+    if isinstance(root, PayloadBatchView):
+        for payloads in root.decode().values():
+            yield from payloads
+        return
+    for _, payloads in root.items():
+        yield from payloads
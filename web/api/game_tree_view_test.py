@@ -0,0 +1,112 @@
+import pytest
+
+from .game_tree import WIRE_V1, WIRE_V2, to_bytes
+from .game_tree_test import make_payload_dict
+from .game_tree_view import GameTreeView, PayloadBatchView, iter_payloads, view
+
+
+@pytest.fixture(params=[(WIRE_V1, False), (WIRE_V2, False), (WIRE_V2, True)])
+def encoded(request):
+    version, intern_strings = request.param
+    return to_bytes(make_payload_dict(), version=version, intern_strings=intern_strings)
+
+
+def test_view_selected_fields(encoded):
+    """Test pulling individual fields out of an encoded blob"""
+    root = view(encoded)
+    assert len(root) == 2
+    assert root.keys() == ["batch_0", "batch_1"]
+
+    payload = root["batch_0"][0]
+    environment_states = payload["world_state"]["environment_states"]
+    assert environment_states["question"] == "What is 2+2?"
+    assert environment_states["metadata"]["source_dataset"] == "basic_arithmetic"
+    assert payload["actions"][1] == "ünïcødé"
+    assert payload["world_state"]["opponent_states"] is None
+    assert payload["metadata"]["big"] == 2**70
+
+
+def test_view_containers_are_lazy(encoded):
+    """Test that nested containers come back as views rather than decoded objects"""
+    payload = view(encoded)["batch_0"][0]
+    assert isinstance(payload, GameTreeView)
+    assert isinstance(payload["actions"], GameTreeView)
+    assert list(payload["actions"]) == make_payload_dict()["batch_0"][0].actions
+
+
+def test_view_missing_keys(encoded):
+    """Test mapping semantics for missing keys"""
+    root = view(encoded)
+    with pytest.raises(KeyError):
+        root["missing"]
+    assert root.get("missing", "default") == "default"
+    with pytest.raises(KeyError):
+        root["batch_0"][0]["not_a_field"]
+
+
+def test_view_decode_matches_from_bytes(encoded):
+    """Test that decoding a view gives the same subtree as a full decode"""
+    expected = make_payload_dict()
+    root = view(encoded)
+    assert root.decode() == expected
+    assert root["batch_0"][0].decode() == expected["batch_0"][0]
+    assert dict(root["batch_0"][0]["metadata"].items())["neg"] == -12345
+
+
+def test_iter_payloads(encoded):
+    """Test iterating the payloads of a batch_id -> payload list blob"""
+    payloads = list(iter_payloads(encoded))
+    assert len(payloads) == 1
+    assert payloads[0]["actions"][0] == "<think>easy</think><answer>4</answer>"
+
+
+def test_view_over_scalar():
+    """Test that views can only be taken over containers"""
+    with pytest.raises(RuntimeError, match="scalar"):
+        view(to_bytes("just a string"))
+
+
+def test_view_skips_packed_arrays():
+    """Test that views step over packed arrays to reach later fields"""
+    obj = {"rewards": [0.5, 1.5], "counts": [1, 2**20], "flags": [True], "after": "x"}
+    root = view(to_bytes(obj, version=WIRE_V2))
+    assert root["after"] == "x"
+    assert root["counts"] == [1, 2**20]
+
+
+@pytest.mark.parametrize("obj", [[0.5, 1.5], [1, -2, 3], [True, False]])
+def test_view_over_packed_array(obj):
+    """Test that a top-level packed array reads back like it does in either version"""
+    assert view(to_bytes(obj, version=WIRE_V2)) == obj
+    assert list(view(to_bytes(obj, version=WIRE_V1))) == obj
+
+
+@pytest.mark.parametrize("intern_strings", [False, True])
+def test_payload_batch_columns(intern_strings):
+    """Test reading single fields across a columnar payload batch"""
+    from .game_tree_test import make_batch
+
+    obj = make_batch()
+    root = view(to_bytes(obj, version=WIRE_V2, intern_strings=intern_strings, columnar=True))
+    assert isinstance(root, PayloadBatchView)
+    assert len(root) == 6
+    assert root.batch_ids() == ["batch_0", "batch_1", "batch_2"]
+    assert root.sizes() == [4, 0, 2]
+    assert root.column("world_state", "environment_states", "question") == [f"What is {k}+{k}?" for k in range(6)]
+    assert root.column("world_state", "environment_states", "metadata", "source_dataset") == ["basic_arithmetic"] * 6
+    assert root.column("actions")[5][1] == "ünïcødé"
+    assert root.column("metadata", "rewards") == [[0.0, 1.0]] * 6
+    with pytest.raises(KeyError):
+        root.column("world_state", "missing")
+    assert root.decode() == obj
+    assert len(list(iter_payloads(root._buf))) == 6
+
+
+def test_payload_batch_column_fallback():
+    """Test that column lookups finish per value through heterogeneous columns"""
+    from .game_tree_test import make_batch
+
+    obj = make_batch(2)
+    obj["batch_0"][1].metadata = {"rewards": [1.0], "other": 1}
+    root = view(to_bytes(obj, version=WIRE_V2, columnar=True))
+    assert root.column("metadata", "rewards") == [[0.0, 1.0], [1.0]]
@@ -2,18 +2,31 @@ import multiprocessing
 
 import hivemind
 
+from .broadcast import Broadcaster
+from .decode_pool import DecodePool
+from .dht_cache import CachedDHT
+from .snapshot import SnapshotStore
+
 # DHT singletons for the client
-# Initialized in main and used in the API handlers.
-dht: hivemind.DHT | None = None
+# Initialized in main and used in the API handlers. Reads go through a shared cache.
+dht: CachedDHT | None = None
+# Optional process pool the gossip publisher decodes peer blobs on.
+decode_pool: DecodePool | None = None
+# Streams gossip and leaderboard updates to connected clients.
+broadcaster = Broadcaster()
+# Latest gossip and leaderboard, kept by the publishers and served by the API.
+snapshots = SnapshotStore(broadcaster=broadcaster)
 
 
 def setup_global_dht(initial_peers, coordinator, logger, kinesis_client):
     global dht
-    dht = hivemind.DHT(
-        start=True,
-        startup_timeout=120,
-        initial_peers=initial_peers,
-        cache_nearest=2,
-        cache_size=2000,
-        client_mode=True,
+    dht = CachedDHT(
+        hivemind.DHT(
+            start=True,
+            startup_timeout=120,
+            initial_peers=initial_peers,
+            cache_nearest=2,
+            cache_size=2000,
+            client_mode=True,
+        )
     )
@@ -0,0 +1,144 @@
+import heapq
+import itertools
+import math
+import random
+from typing import Any, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Heap entries are [key, seq, peer_id, item, alive]. Entries removed from one
+# heap are only marked dead and dropped lazily from the other.
+_KEY, _SEQ, _PEER, _ITEM, _ALIVE = range(5)
+
+
+class FairReservoirSampler(Generic[T]):
+    """
+    Streams items from many peers into a fixed budget of slots, using weighted
+    reservoir sampling (Efraimidis-Spirakis): each item gets the key
+    log(u) / weight and the largest keys are kept. Giving each of a peer's
+    items the weight 1 / (its item count) makes every peer equally likely to
+    be picked however much it publishes; `per_peer_cap` additionally bounds
+    how many slots a single peer can hold.
+
+    Memory is O(budget) regardless of how many items are offered.
+    """
+
+    def __init__(self, budget: int = 200, per_peer_cap: Optional[int] = None, rng: Optional[random.Random] = None):
+        if budget < 1:
+            raise ValueError("budget must be positive")
+        if per_peer_cap is not None and per_peer_cap < 1:
+            raise ValueError("per_peer_cap must be positive")
+        self.budget = budget
+        self.per_peer_cap = per_peer_cap
+        self._rng = rng or random.Random()
+        self._seq = itertools.count()
+        self._heap: List[list] = []
+        self._peer_heaps: Dict[Any, List[list]] = {}
+        self._peer_sizes: Dict[Any, int] = {}
+        self._size = 0
+        self._stale = 0
+        self.offered = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _live_min(heap: List[list]) -> Optional[list]:
+        while heap and not heap[0][_ALIVE]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _kill(self, entry: list) -> None:
+        entry[_ALIVE] = False
+        entry[_ITEM] = None
+        peer_id = entry[_PEER]
+        self._size -= 1
+        self._stale += 1
+        self._peer_sizes[peer_id] -= 1
+        if not self._peer_sizes[peer_id]:
+            del self._peer_sizes[peer_id]
+            self._peer_heaps.pop(peer_id, None)
+
+    def _compact(self) -> None:
+        # Dead entries deep in the heaps are only dropped here, keeping memory O(budget).
+        self._heap = [e for e in self._heap if e[_ALIVE]]
+        heapq.heapify(self._heap)
+        for peer_id, heap in self._peer_heaps.items():
+            heap[:] = [e for e in heap if e[_ALIVE]]
+            heapq.heapify(heap)
+        self._stale = 0
+
+    def offer(self, peer_id: Any, item: T, weight: float = 1.0) -> bool:
+        """Offers one item; returns whether it currently holds a slot."""
+        self.offered += 1
+        if weight <= 0:
+            return False
+        # 1 - random() is in (0, 1], so the log is finite. Keys are compared in
+        # log space so that tiny weights do not underflow to zero.
+        key = math.log(1.0 - self._rng.random()) / weight
+
+        own = self._peer_heaps.get(peer_id) if self.per_peer_cap is not None else None
+        if own is not None and self._peer_sizes[peer_id] >= self.per_peer_cap:
+            # The peer is at its cap: the item can only replace the peer's own weakest.
+            victim = self._live_min(own)
+            if key <= victim[_KEY]:
+                return False
+            self._kill(victim)
+        elif self._size >= self.budget:
+            victim = self._live_min(self._heap)
+            if key <= victim[_KEY]:
+                return False
+            self._kill(victim)
+
+        entry = [key, next(self._seq), peer_id, item, True]
+        heapq.heappush(self._heap, entry)
+        if self.per_peer_cap is not None:
+            heapq.heappush(self._peer_heaps.setdefault(peer_id, []), entry)
+        self._size += 1
+        self._peer_sizes[peer_id] = self._peer_sizes.get(peer_id, 0) + 1
+        if self._stale >= self.budget:
+            self._compact()
+        return True
+
+    def offer_all(self, peer_id: Any, items: List[T]) -> None:
+        """Offers all of one peer's items, weighted so that the peer counts once in total."""
+        if items:
+            weight = 1.0 / len(items)
+            for item in items:
+                self.offer(peer_id, item, weight)
+
+    def offer_stream(self, peer_id: Any, items: Iterable[T]) -> int:
+        """
+        Like offer_all, for items that can only be iterated once. While counting
+        them, a uniform sample of as many items as the peer could hold is kept
+        (plain reservoir sampling), and only those are offered, each with
+        weight 1 / count. Memory is O(budget) however many items the peer has.
+        Returns the item count.
+        """
+        limit = self.budget if self.per_peer_cap is None else min(self.budget, self.per_peer_cap)
+        kept: List[T] = []
+        count = 0
+        for item in items:
+            count += 1
+            if len(kept) < limit:
+                kept.append(item)
+            else:
+                j = self._rng.randrange(count)
+                if j < limit:
+                    kept[j] = item
+        if kept:
+            weight = 1.0 / count
+            for item in kept:
+                self.offer(peer_id, item, weight)
+            # The items dropped above were offered too, they just never stood a chance.
+            self.offered += count - len(kept)
+        return count
+
+    def sample(self) -> List[Tuple[Any, T]]:
+        """Returns the kept (peer_id, item) pairs in random order."""
+        out = [(e[_PEER], e[_ITEM]) for e in self._heap if e[_ALIVE]]
+        self._rng.shuffle(out)
+        return out
+
+    def peer_counts(self) -> Dict[Any, int]:
+        return dict(self._peer_sizes)
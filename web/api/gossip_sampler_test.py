@@ -0,0 +1,75 @@
+import random
+from collections import Counter
+
+import pytest
+
+from .gossip_sampler import FairReservoirSampler
+
+
+def test_keeps_everything_under_budget():
+    """Test that all items are kept while they fit in the budget"""
+    sampler = FairReservoirSampler(budget=10, rng=random.Random(0))
+    sampler.offer_all("a", [1, 2, 3])
+    sampler.offer_all("b", [4])
+    assert sorted(item for _, item in sampler.sample()) == [1, 2, 3, 4]
+    assert sampler.peer_counts() == {"a": 3, "b": 1}
+
+
+def test_budget_and_memory_are_bounded():
+    """Test that the sampler never holds more than O(budget) entries"""
+    sampler = FairReservoirSampler(budget=20, per_peer_cap=5, rng=random.Random(1))
+    for peer in range(500):
+        sampler.offer_all(peer, list(range(peer % 50 + 1)))
+        assert len(sampler) <= 20
+        assert len(sampler._heap) <= 40
+        assert sum(len(h) for h in sampler._peer_heaps.values()) <= 40
+    assert len(sampler.sample()) == 20
+    assert sampler.offered == sum(peer % 50 + 1 for peer in range(500))
+
+
+def test_chatty_peer_does_not_dominate():
+    """Test that per-peer weighting gives each peer a similar share of the slots"""
+    counts = Counter()
+    for seed in range(200):
+        sampler = FairReservoirSampler(budget=10, rng=random.Random(seed))
+        sampler.offer_all("chatty", list(range(1000)))
+        for peer in range(9):
+            sampler.offer_all(f"quiet_{peer}", list(range(3)))
+        counts.update(peer for peer, _ in sampler.sample())
+    # Each of the 10 peers should get about 1 slot in 10 on average.
+    assert counts["chatty"] / 200 < 2
+
+
+def test_per_peer_cap():
+    """Test that no peer holds more slots than its cap"""
+    sampler = FairReservoirSampler(budget=50, per_peer_cap=3, rng=random.Random(2))
+    for item in range(100):
+        sampler.offer("a", item)
+    sampler.offer_all("b", list(range(100)))
+    assert sampler.peer_counts() == {"a": 3, "b": 3}
+
+
+def test_invalid_arguments():
+    """Test argument validation"""
+    with pytest.raises(ValueError):
+        FairReservoirSampler(budget=0)
+    with pytest.raises(ValueError):
+        FairReservoirSampler(per_peer_cap=0)
+    assert not FairReservoirSampler().offer("a", 1, weight=0)
+
+
+def test_offer_stream_keeps_one_peer_sample():
+    """Test that a streamed peer is counted in full but only holds a per-peer sample in memory"""
+    sampler = FairReservoirSampler(budget=10, per_peer_cap=3, rng=random.Random(0))
+    assert sampler.offer_stream("chatty", iter(range(1000))) == 1000
+    assert sampler.offer_stream("quiet", iter([1, 2])) == 2
+    assert sampler.offer_stream("empty", iter([])) == 0
+    assert sampler.peer_counts() == {"chatty": 3, "quiet": 2}
+    assert sampler.offered == 1002
+    # The chatty peer's picks are spread over its whole stream, not just its first items.
+    picks = Counter()
+    for seed in range(200):
+        sampler = FairReservoirSampler(budget=10, per_peer_cap=3, rng=random.Random(seed))
+        sampler.offer_stream("chatty", iter(range(1000)))
+        picks.update(item // 500 for _, item in sampler.sample())
+    assert picks[0] > 200 and picks[1] > 200
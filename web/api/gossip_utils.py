@@ -2,10 +2,19 @@ import re
 
 TAGGED_PATTERN_TEMPLATE = r"<{0}>\n*(.*?)\n*</{0}>"
 
+# Compiled once for the tags the stage messages read.
+_TAGGED_PATTERNS = {
+    tag: re.compile(TAGGED_PATTERN_TEMPLATE.format(tag))
+    for tag in ("explain", "identify", "summarize_feedback", "majority")
+}
+
 
 def _extract_tagged(text, tag):
-    matches = re.findall(TAGGED_PATTERN_TEMPLATE.format(tag), text)
-    return matches[0]
+    pattern = _TAGGED_PATTERNS.get(tag) or re.compile(TAGGED_PATTERN_TEMPLATE.format(tag))
+    match = pattern.search(text)
+    if match is None:
+        raise IndexError(f"no <{tag}> tag found")
+    return match.group(1)
 
 
 def stage1_message(node_key: str, question: str, ts, outputs: dict):
@@ -31,3 +40,11 @@ def stage3_message(node_key: str, question: str, ts, outputs: dict):
         return f"{summarize_feedback}...Majority: {majority}"
     except (ValueError, KeyError, IndexError):
         return stage1_message(node_key, question, ts, outputs)
+
+
+STAGE_MESSAGES = (stage1_message, stage2_message, stage3_message)
+
+
+def stage_message(stage: int, node_key: str, question: str, ts, outputs: dict):
+    """Renders a node's outputs with the formatter for its (0-based) stage."""
+    return STAGE_MESSAGES[min(stage, len(STAGE_MESSAGES) - 1)](node_key, question, ts, outputs)
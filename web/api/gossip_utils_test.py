@@ -0,0 +1,30 @@
+from .gossip_utils import stage1_message, stage2_message, stage3_message, stage_message
+
+
+def test_stage2_message():
+    outputs = {
+        "answer": "4",
+        "agent_opinion": {"node": "<explain>\nBecause 2+2=4.\n</explain> <identify>student 1</identify>"},
+    }
+    assert stage2_message("node", "What is 2+2?", 0, outputs) == "Because 2+2=4....Identify: student 1"
+
+
+def test_stage3_message():
+    outputs = {
+        "answer": "4",
+        "final_agent_decision": {"node": "<summarize_feedback>All agree</summarize_feedback><majority>4</majority>"},
+    }
+    assert stage3_message("node", "What is 2+2?", 0, outputs) == "All agree...Majority: 4"
+
+
+def test_missing_tags_fall_back_to_answer():
+    outputs = {"answer": "4", "agent_opinion": {"node": "<explain>no identify</explain>"}}
+    assert stage2_message("node", "What is 2+2?", 0, outputs) == "What is 2+2?...Answer: 4"
+    assert stage3_message("other", "What is 2+2?", 0, outputs) == "What is 2+2?...Answer: 4"
+
+
+def test_stage_message_dispatch():
+    outputs = {"answer": "4"}
+    assert stage_message(0, "node", "Q", 0, outputs) == stage1_message("node", "Q", 0, outputs)
+    # Later stages reuse the last formatter, which falls back to the answer.
+    assert stage_message(5, "node", "Q", 0, outputs) == "Q...Answer: 4"
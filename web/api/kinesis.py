@@ -1,12 +1,16 @@
+import functools
 import json
 import logging
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
 
 import boto3
 from botocore.exceptions import ClientError
 from pydantic import BaseModel, Field, field_serializer
 
+from .kinesis_producer import MAX_RECORD_BYTES, BatchedKinesisProducer, record_size
+from .spool import DiskSpool, SpooledRecord, SpoolDrainer
+
 
 class KinesisError(Exception):
     """Base exception for Kinesis operations"""
@@ -49,21 +53,69 @@ class GossipMessage(BaseModel):
     data: List[GossipMessageData]
 
 
+class LeaderboardEntry(BaseModel):
+    """A single peer's standing on the rewards leaderboard"""
+
+    peer_id: str = Field(..., alias="peerId")
+    peer_name: str = Field(..., alias="peerName")
+    rank: int
+    score: float
+
+
+class LeaderboardMessage(BaseModel):
+    """Message type for rewards leaderboard snapshots"""
+
+    type: Literal["leaderboard"] = "leaderboard"
+    round: int
+    stage: int
+    timestamp: datetime
+    data: List[LeaderboardEntry]
+
+    @field_serializer("timestamp")
+    def serialize_timestamp(self, dt: datetime, _info):
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
 class Kinesis:
-    def __init__(self, stream_name: str = ""):
+    def __init__(
+        self,
+        stream_name: str = "",
+        batched: bool = False,
+        client=None,
+        spool: Optional[DiskSpool] = None,
+        **producer_kwargs,
+    ):
+        """
+        Args:
+            stream_name: The stream to publish to; empty for a no-op client
+            batched: Buffer records and send them with put_records from a
+                background thread, one record per peer, instead of a blocking
+                put_record per message
+            client: Kinesis API client to use instead of a boto3 client, e.g. a local stub
+            spool: Write records to this on-disk spool, which is drained to the
+                stream in order and survives Kinesis outages and restarts.
+                Without a stream name the spool is the sink.
+            producer_kwargs: Passed on to BatchedKinesisProducer
+        """
         self.stream_name = stream_name
         self.logger = logging.getLogger(__name__)
+        self.producer = None
+        self.spool = spool
+        self.drainer = None
 
         # If no stream name is provided, use no-op implementation
         if not stream_name:
             self.logger.info(
-                "No Kinesis stream name provided, using no-op implementation"
+                "No Kinesis stream name provided, using "
+                + (f"file sink in {spool.directory}" if spool else "no-op implementation")
             )
             self.kinesis = None
             return
 
         # Initialize Kinesis client if stream name is provided
-        self.kinesis = boto3.client("kinesis", region_name="us-west-2")
+        self.kinesis = client or boto3.client("kinesis", region_name="us-west-2")
 
         # Verify stream exists
         try:
@@ -75,13 +127,63 @@ class Kinesis:
             )
             raise KinesisError(f"Stream {stream_name} not found or not accessible")
 
-    def _put_record(self, data: Dict[str, Any], partition_key: str) -> None:
-        """Put a record to Kinesis stream"""
+        if batched or spool:
+            self.producer = BatchedKinesisProducer(self.kinesis, stream_name, **producer_kwargs)
+        if spool:
+            self.drainer = SpoolDrainer(spool, self._send_spooled)
+            self.drainer.start()
+
+    def close(self, timeout: Optional[float] = 10) -> None:
+        """Sends any buffered records and stops the background producer; spooled records stay on disk."""
+        if self.drainer:
+            self.drainer.stop(timeout)
+        if self.producer:
+            self.producer.close(timeout)
+        if self.spool:
+            self.spool.close()
+
+    def stats(self) -> Dict[str, Any] | None:
+        if not self.producer and not self.spool:
+            return None
+        stats = self.producer.stats() if self.producer else {}
+        if self.spool:
+            stats["spool"] = self.spool.stats()
+        if self.drainer:
+            stats["drainer"] = self.drainer.stats()
+        return stats
+
+    def _send_spooled(self, records: List[SpooledRecord]) -> None:
+        failed = self.producer.send([(data, key) for key, data in records])
+        if failed:
+            raise KinesisError(f"{len(failed)} of {len(records)} spooled records failed")
+
+    def _buffer(self, data: bytes, partition_key: str, on_delivered: Optional[Callable[[], Any]] = None) -> None:
+        if self.spool:
+            size = record_size(data, partition_key)
+            if size > MAX_RECORD_BYTES:
+                raise ValueError(f"Record of {size} bytes exceeds the {MAX_RECORD_BYTES} byte limit")
+            self.spool.append(data, partition_key)
+            # Once spooled, the drainer sends the record however long it takes.
+            if on_delivered is not None:
+                on_delivered()
+        else:
+            self.producer.put(data, partition_key, on_delivered)
+
+    @staticmethod
+    def _encode(data: Dict[str, Any]) -> bytes:
+        return json.dumps(data, cls=DateTimeEncoder).encode()
+
+    def _put_record(
+        self, data: Dict[str, Any], partition_key: str, on_delivered: Optional[Callable[[], Any]] = None
+    ) -> None:
+        """Put a record to Kinesis stream, calling `on_delivered` once it is sent"""
         # No-op if no stream name was provided
-        if not self.kinesis:
+        if not self.kinesis and not self.spool:
             self.logger.debug(
                 f"No-op: received record {data} with partition key {partition_key}"
             )
+            if on_delivered is not None:
+                on_delivered()
             return
 
         try:
@@ -89,6 +191,11 @@ class Kinesis:
                 f"Preparing to put record to Kinesis stream: {self.stream_name}"
             )
             self.logger.debug(f"Partition key: {partition_key}")
+
+            if self.producer or self.spool:
+                self._buffer(self._encode(data), partition_key, on_delivered)
+                return
+
             self.logger.debug(f"Data: {json.dumps(data, cls=DateTimeEncoder)}")
 
             response = self.kinesis.put_record(
@@ -102,6 +209,8 @@ class Kinesis:
                 f"SequenceNumber: {response.get('SequenceNumber')}, "
                 f"ShardId: {response.get('ShardId')}"
             )
+            if on_delivered is not None:
+                on_delivered()
         except ClientError as e:
             self.logger.error(
                 f"Failed to put record to Kinesis: {str(e)}", exc_info=True
@@ -113,15 +222,73 @@ class Kinesis:
             )
             raise KinesisError(f"Unexpected error putting record to Kinesis: {str(e)}")
 
-    def put_gossip(self, data: GossipMessage) -> None:
-        """Put gossip data to Kinesis stream"""
+    def put_gossip(
+        self,
+        data: GossipMessage,
+        on_delivered: Optional[Callable[[List[GossipMessageData]], Any]] = None,
+    ) -> None:
+        """
+        Put gossip data to Kinesis stream. `on_delivered` is called with the
+        messages of each record once it is sent or spooled; when batched, that
+        happens later, on the producer thread, and not at all for dropped records.
+        """
         try:
             self.logger.info("Preparing to put gossip data to Kinesis")
             self.logger.debug(
                 f"Gossip data: {json.dumps(data.model_dump(by_alias=True), cls=DateTimeEncoder)}"
             )
-            self._put_record(data.model_dump(by_alias=True), "swarm-gossip")
+            if self.producer or self.spool:
+                self._put_gossip_by_peer(data, on_delivered)
+            else:
+                self._put_record(
+                    data.model_dump(by_alias=True),
+                    "swarm-gossip",
+                    functools.partial(on_delivered, data.data) if on_delivered else None,
+                )
             self.logger.info("Successfully put gossip data to Kinesis")
         except Exception as e:
             self.logger.error(f"Failed to put gossip data: {str(e)}", exc_info=True)
-            raise KinesisError(f"Failed to put gossip data: {str(e)}")
\ No newline at end of file
+            raise KinesisError(f"Failed to put gossip data: {str(e)}")
+
+    def _put_gossip_by_peer(
+        self,
+        data: GossipMessage,
+        on_delivered: Optional[Callable[[List[GossipMessageData]], Any]] = None,
+    ) -> None:
+        """Buffers one gossip record per peer, partitioned by peer id so records spread across shards."""
+        by_peer: Dict[str, List[GossipMessageData]] = {}
+        for item in data.data:
+            by_peer.setdefault(item.peer_id, []).append(item)
+
+        for peer_id, items in by_peer.items():
+            for record, record_items in self._split_gossip(peer_id, items):
+                try:
+                    self._buffer(
+                        record, peer_id, functools.partial(on_delivered, record_items) if on_delivered else None
+                    )
+                except ValueError as e:
+                    # A single oversized message; skip it rather than the whole batch.
+                    self.logger.error(f"Dropping gossip record for {peer_id}: {str(e)}")
+
+    def _split_gossip(
+        self, peer_id: str, items: List[GossipMessageData]
+    ) -> List[Tuple[bytes, List[GossipMessageData]]]:
+        """
+        Encodes a peer's gossip, halving it into several records until each fits
+        the record limit. Returns each record with the messages it holds.
+        """
+        record = self._encode(GossipMessage(data=items).model_dump(by_alias=True))
+        if record_size(record, peer_id) <= MAX_RECORD_BYTES or len(items) == 1:
+            return [(record, items)]
+        middle = len(items) // 2
+        return self._split_gossip(peer_id, items[:middle]) + self._split_gossip(peer_id, items[middle:])
+
+    def put_leaderboard(self, data: LeaderboardMessage) -> None:
+        """Put a leaderboard snapshot to Kinesis stream"""
+        try:
+            self.logger.info("Preparing to put leaderboard data to Kinesis")
+            self._put_record(data.model_dump(by_alias=True), "swarm-leaderboard")
+            self.logger.info("Successfully put leaderboard data to Kinesis")
+        except Exception as e:
+            self.logger.error(f"Failed to put leaderboard data: {str(e)}", exc_info=True)
+            raise KinesisError(f"Failed to put leaderboard data: {str(e)}")
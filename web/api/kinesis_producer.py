@@ -0,0 +1,243 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Kinesis limits: the data blob plus partition key of a record counts towards both.
+MAX_RECORD_BYTES = 1024 * 1024
+MAX_BATCH_RECORDS = 500
+MAX_BATCH_BYTES = 5 * 1024 * 1024
+MAX_PARTITION_KEY_LENGTH = 256
+
+# (data, partition key, size, delivery callback)
+Record = Tuple[bytes, str, int, Optional[Callable[[], Any]]]
+
+
+def record_size(data: bytes, partition_key: str) -> int:
+    return len(data) + len(partition_key.encode())
+
+
+class BatchedKinesisProducer:
+    """
+    Buffers records and sends them with `put_records` from a background thread,
+    in batches within the Kinesis request limits. A batch is sent once it is
+    full or `flush_interval_seconds` after its first record was buffered.
+
+    Only the entries a `put_records` call reports as failed are retried, with
+    exponential backoff and full jitter; entries still failing after
+    `max_attempts` are dropped and counted. Records are also dropped when the
+    buffer holds `max_buffered_bytes`, so a stalled stream never blocks callers.
+    A record's delivery callback runs on the background thread once the stream
+    has accepted it, and never for a dropped record.
+    """
+
+    def __init__(
+        self,
+        client,
+        stream_name: str,
+        max_batch_records: int = MAX_BATCH_RECORDS,
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+        flush_interval_seconds: float = 0.5,
+        max_buffered_bytes: int = 64 * 1024 * 1024,
+        max_attempts: int = 5,
+        base_backoff_seconds: float = 0.1,
+        max_backoff_seconds: float = 5.0,
+        rng: Optional[random.Random] = None,
+        sleep: Callable[[float], Any] = time.sleep,
+    ):
+        if not 0 < max_batch_records <= MAX_BATCH_RECORDS:
+            raise ValueError(f"max_batch_records must be between 1 and {MAX_BATCH_RECORDS}")
+        if not 0 < max_batch_bytes <= MAX_BATCH_BYTES:
+            raise ValueError(f"max_batch_bytes must be between 1 and {MAX_BATCH_BYTES}")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be positive")
+        self.client = client
+        self.stream_name = stream_name
+        self.max_batch_records = max_batch_records
+        self.max_batch_bytes = max_batch_bytes
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_buffered_bytes = max_buffered_bytes
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._rng = rng or random.Random()
+        self._sleep = sleep
+        self.logger = logging.getLogger(__name__)
+
+        self._cond = threading.Condition()
+        self._buffer: Deque[Record] = deque()
+        self._buffered_bytes = 0
+        self._oldest_at: Optional[float] = None
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closing = False
+
+        self._sent = 0
+        self._retried = 0
+        self._failed = 0
+        self._dropped = 0
+        self._batches = 0
+
+        # Started by the first put, so a producer only used through send() has no thread.
+        self._thread: Optional[threading.Thread] = None
+
+    def put(self, data: bytes, partition_key: str, on_delivered: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Buffers one record, calling `on_delivered` once it is sent. Raises
+        ValueError if it can never be sent.
+        """
+        if not 0 < len(partition_key) <= MAX_PARTITION_KEY_LENGTH:
+            raise ValueError(f"Partition key must be 1 to {MAX_PARTITION_KEY_LENGTH} characters")
+        size = record_size(data, partition_key)
+        if size > MAX_RECORD_BYTES:
+            raise ValueError(f"Record of {size} bytes exceeds the {MAX_RECORD_BYTES} byte limit")
+
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("Producer is closed")
+            if self._buffered_bytes + size > self.max_buffered_bytes:
+                self._dropped += 1
+                self.logger.warning(f"Kinesis buffer full, dropping record for {partition_key}")
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            if not self._buffer:
+                self._oldest_at = time.monotonic()
+            self._buffer.append((data, partition_key, size, on_delivered))
+            self._buffered_bytes += size
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Sends everything buffered so far; returns whether it finished within `timeout`."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: not self._buffer and not self._in_flight, timeout)
+            self._flush_requested = False
+            return done
+
+    def close(self, timeout: Optional[float] = 10) -> None:
+        """Sends what is buffered and stops the background thread."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _ready(self) -> bool:
+        if not self._buffer:
+            return False
+        if self._closing or self._flush_requested:
+            return True
+        if len(self._buffer) >= self.max_batch_records or self._buffered_bytes >= self.max_batch_bytes:
+            return True
+        return time.monotonic() - self._oldest_at >= self.flush_interval_seconds
+
+    def _take_batch(self) -> List[Record]:
+        batch = []
+        batch_bytes = 0
+        while self._buffer and len(batch) < self.max_batch_records:
+            size = self._buffer[0][2]
+            if batch and batch_bytes + size > self.max_batch_bytes:
+                break
+            batch.append(self._buffer.popleft())
+            batch_bytes += size
+        self._buffered_bytes -= batch_bytes
+        self._oldest_at = time.monotonic() if self._buffer else None
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._ready():
+                    if self._closing and not self._buffer:
+                        return
+                    timeout = None
+                    if self._buffer:
+                        timeout = max(self._oldest_at + self.flush_interval_seconds - time.monotonic(), 0)
+                    self._cond.wait(timeout)
+                batch = self._take_batch()
+                self._in_flight = len(batch)
+            try:
+                self._send(batch)
+            except Exception as e:
+                # Never let the thread die; the batch is lost.
+                self.logger.error(f"Unexpected error sending Kinesis batch: {str(e)}", exc_info=True)
+                with self._cond:
+                    self._failed += len(batch)
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform over [0, capped exponential backoff].
+        cap = min(self.max_backoff_seconds, self.base_backoff_seconds * 2**attempt)
+        return self._rng.uniform(0, cap)
+
+    def send(self, records: List[Tuple[bytes, str]]) -> List[Tuple[bytes, str]]:
+        """
+        Sends one batch on the calling thread, bypassing the buffer, and
+        returns the records that still failed after all attempts.
+        """
+        batch = [(data, key, record_size(data, key), None) for data, key in records]
+        return [(data, key) for data, key, *_ in self._put_with_retries(batch)]
+
+    def _send(self, batch: List[Record]) -> None:
+        pending = self._put_with_retries(batch)
+        if pending:
+            self.logger.error(f"Dropping {len(pending)} Kinesis records after {self.max_attempts} attempts")
+            with self._cond:
+                self._failed += len(pending)
+        failed = {id(record) for record in pending}
+        for record in batch:
+            on_delivered = record[3]
+            if on_delivered is None or id(record) in failed:
+                continue
+            try:
+                on_delivered()
+            except Exception as e:
+                self.logger.error(f"Kinesis delivery callback failed: {str(e)}", exc_info=True)
+
+    def _put_with_retries(self, batch: List[Record]) -> List[Record]:
+        pending = batch
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self._sleep(self._backoff(attempt - 1))
+                with self._cond:
+                    self._retried += len(pending)
+            try:
+                response = self.client.put_records(
+                    StreamName=self.stream_name,
+                    Records=[{"Data": data, "PartitionKey": key} for data, key, *_ in pending],
+                )
+                results = response["Records"]
+                failed = [record for record, result in zip(pending, results) if result.get("ErrorCode")]
+            except Exception as e:
+                # The whole request failed, e.g. throttled or a network error.
+                self.logger.warning(f"put_records failed: {str(e)}")
+                failed = pending
+            with self._cond:
+                self._sent += len(pending) - len(failed)
+                if len(failed) < len(pending):
+                    self._batches += 1
+            if not failed:
+                return []
+            pending = failed
+        return pending
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "buffered": len(self._buffer),
+                "bufferedBytes": self._buffered_bytes,
+                "sent": self._sent,
+                "batches": self._batches,
+                "retried": self._retried,
+                "failed": self._failed,
+                "dropped": self._dropped,
+            }
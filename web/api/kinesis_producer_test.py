@@ -0,0 +1,195 @@
+import json
+import random
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from .kinesis import GossipMessage, GossipMessageData, Kinesis
+from .kinesis_producer import MAX_BATCH_BYTES, MAX_RECORD_BYTES, BatchedKinesisProducer
+
+
+class LocalKinesisStub:
+    """In-process stand-in for the Kinesis API's describe_stream and put_records."""
+
+    def __init__(self, fail=lambda attempt, record: False):
+        self.fail = fail
+        self.requests = []
+        self.records = []
+        self.lock = threading.Lock()
+
+    def describe_stream(self, StreamName):
+        return {"StreamDescription": {"StreamName": StreamName, "StreamStatus": "ACTIVE"}}
+
+    def put_records(self, StreamName, Records):
+        assert len(Records) <= 500
+        assert sum(len(r["Data"]) + len(r["PartitionKey"]) for r in Records) <= MAX_BATCH_BYTES
+        with self.lock:
+            attempt = len(self.requests)
+            self.requests.append(Records)
+            results = []
+            for record in Records:
+                if self.fail(attempt, record):
+                    results.append({"ErrorCode": "ProvisionedThroughputExceededException"})
+                else:
+                    self.records.append(record)
+                    results.append({"SequenceNumber": str(len(self.records)), "ShardId": "shard-0"})
+        return {"FailedRecordCount": sum("ErrorCode" in r for r in results), "Records": results}
+
+
+def make_producer(stub, **kwargs):
+    kwargs.setdefault("sleep", lambda _: None)
+    return BatchedKinesisProducer(stub, "test-stream", flush_interval_seconds=60, rng=random.Random(0), **kwargs)
+
+
+def test_batches_respect_record_count():
+    stub = LocalKinesisStub()
+    producer = make_producer(stub)
+    for i in range(1200):
+        producer.put(b"x", f"peer{i % 7}")
+    assert producer.flush(timeout=5)
+    assert [len(r) for r in stub.requests] == [500, 500, 200]
+    assert producer.stats()["sent"] == 1200
+    producer.close()
+
+
+def test_batches_respect_byte_limit():
+    stub = LocalKinesisStub()
+    producer = make_producer(stub)
+    record = b"x" * (MAX_RECORD_BYTES - 10)
+    for _ in range(12):
+        producer.put(record, "peer")
+    assert producer.flush(timeout=5)
+    assert [len(r) for r in stub.requests] == [5, 5, 2]
+    producer.close()
+
+
+def test_sends_after_flush_interval():
+    stub = LocalKinesisStub()
+    producer = BatchedKinesisProducer(stub, "test-stream", flush_interval_seconds=0.05)
+    producer.put(b"x", "peer")
+    for _ in range(100):
+        if stub.records:
+            break
+        threading.Event().wait(0.02)
+    assert len(stub.records) == 1
+    producer.close()
+
+
+def test_retries_only_failed_entries():
+    # Odd records fail on the first attempt only.
+    stub = LocalKinesisStub(fail=lambda attempt, record: attempt == 0 and int(record["Data"]) % 2)
+    delays = []
+    producer = make_producer(stub, sleep=delays.append, base_backoff_seconds=0.1)
+    for i in range(10):
+        producer.put(str(i).encode(), f"peer{i}")
+    assert producer.flush(timeout=5)
+
+    assert [len(r) for r in stub.requests] == [10, 5]
+    assert [r["Data"] for r in stub.requests[1]] == [b"1", b"3", b"5", b"7", b"9"]
+    assert len(delays) == 1 and 0 <= delays[0] <= 0.1
+    stats = producer.stats()
+    assert (stats["sent"], stats["retried"], stats["failed"]) == (10, 5, 0)
+    producer.close()
+
+
+def test_gives_up_after_max_attempts():
+    stub = LocalKinesisStub(fail=lambda attempt, record: record["PartitionKey"] == "bad")
+    delays = []
+    producer = make_producer(stub, sleep=delays.append, max_attempts=4, base_backoff_seconds=1, max_backoff_seconds=3)
+    producer.put(b"ok", "good")
+    producer.put(b"nope", "bad")
+    assert producer.flush(timeout=5)
+
+    assert len(stub.requests) == 4
+    assert [r["PartitionKey"] for r in stub.records] == ["good"]
+    # Backoff caps grow as 1, 2, 3 (capped); each delay is jittered below its cap.
+    assert all(0 <= d <= cap for d, cap in zip(delays, [1, 2, 3]))
+    assert producer.stats()["failed"] == 1
+    producer.close()
+
+
+def test_retries_failed_requests():
+    class FlakyStub(LocalKinesisStub):
+        calls = 0
+
+        def put_records(self, StreamName, Records):
+            self.calls += 1
+            if self.calls == 1:
+                raise ConnectionError("connection reset")
+            return super().put_records(StreamName, Records)
+
+    stub = FlakyStub()
+    producer = make_producer(stub)
+    producer.put(b"x", "peer")
+    assert producer.flush(timeout=5)
+    assert len(stub.records) == 1
+    producer.close()
+
+
+def test_rejects_and_drops_records():
+    stub = LocalKinesisStub()
+    producer = make_producer(stub, max_buffered_bytes=100)
+    with pytest.raises(ValueError):
+        producer.put(b"x" * MAX_RECORD_BYTES, "peer")
+    with pytest.raises(ValueError):
+        producer.put(b"x", "")
+
+    producer.put(b"x" * 90, "peer")
+    producer.put(b"x" * 90, "peer")
+    assert producer.stats()["dropped"] == 1
+    producer.close()
+    assert len(stub.records) == 1
+    with pytest.raises(RuntimeError):
+        producer.put(b"x", "peer")
+
+
+def test_batched_put_gossip_partitions_by_peer():
+    stub = LocalKinesisStub()
+    kinesis = Kinesis("test-stream", batched=True, client=stub, flush_interval_seconds=60)
+    now = datetime(2024, 3, 21, tzinfo=timezone.utc)
+    data = [
+        GossipMessageData(id=f"msg{i}", peerId=f"peer{i % 3}", peerName="Peer", message="hi", timestamp=now)
+        for i in range(9)
+    ]
+    kinesis.put_gossip(GossipMessage(data=data))
+    kinesis.close()
+
+    assert sorted(r["PartitionKey"] for r in stub.records) == ["peer0", "peer1", "peer2"]
+    for record in stub.records:
+        message = json.loads(record["Data"])
+        assert message["type"] == "gossip"
+        assert {d["peerId"] for d in message["data"]} == {record["PartitionKey"]}
+        assert len(message["data"]) == 3
+
+
+def test_batched_put_gossip_reports_delivered_messages():
+    stub = LocalKinesisStub(fail=lambda attempt, record: record["PartitionKey"] == "peer1")
+    kinesis = Kinesis("test-stream", batched=True, client=stub, flush_interval_seconds=60, max_attempts=2)
+    now = datetime(2024, 3, 21, tzinfo=timezone.utc)
+    data = [
+        GossipMessageData(id=f"msg{i}", peerId=f"peer{i % 3}", peerName="Peer", message="hi", timestamp=now)
+        for i in range(6)
+    ]
+    delivered = []
+    kinesis.put_gossip(GossipMessage(data=data), on_delivered=lambda items: delivered.extend(d.id for d in items))
+    # Nothing is delivered until the producer sends it.
+    assert delivered == []
+    kinesis.close()
+
+    # peer1's record failed every attempt, so its messages are not reported.
+    assert sorted(delivered) == ["msg0", "msg2", "msg3", "msg5"]
+
+
+def test_batched_put_gossip_splits_large_records():
+    stub = LocalKinesisStub()
+    kinesis = Kinesis("test-stream", batched=True, client=stub, flush_interval_seconds=60)
+    now = datetime(2024, 3, 21, tzinfo=timezone.utc)
+    big = "x" * (MAX_RECORD_BYTES // 3)
+    data = [GossipMessageData(id=f"msg{i}", peerId="peer", peerName="Peer", message=big, timestamp=now) for i in range(5)]
+    kinesis.put_gossip(GossipMessage(data=data))
+    kinesis.close()
+
+    ids = [d["id"] for r in stub.records for d in json.loads(r["Data"])["data"]]
+    assert ids == [f"msg{i}" for i in range(5)]
+    assert len(stub.records) > 1
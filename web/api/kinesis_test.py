@@ -10,6 +10,8 @@ from .kinesis import (
     GossipMessageData,
     Kinesis,
     KinesisError,
+    LeaderboardEntry,
+    LeaderboardMessage,
 )
 
 # Hardcoded UTC time for testing
@@ -132,3 +134,22 @@ def test_kinesis_no_op_put_gossip(kinesis_instance, mock_kinesis_client):
 
     # Verify the client was not called
     mock_kinesis_client.put_record.assert_not_called()
+
+
+def test_put_leaderboard(kinesis_instance, mock_kinesis_client):
+    """Test putting a leaderboard snapshot to Kinesis"""
+    message = LeaderboardMessage(
+        round=3,
+        stage=1,
+        timestamp=TEST_TIME,
+        data=[LeaderboardEntry(peerId="peer1", peerName="Peer 1", rank=1, score=2.5)],
+    )
+    kinesis_instance.put_leaderboard(message)
+
+    call_args = mock_kinesis_client.put_record.call_args[1]
+    assert call_args["PartitionKey"] == "swarm-leaderboard"
+    data = json.loads(call_args["Data"])
+    assert data["type"] == "leaderboard"
+    assert (data["round"], data["stage"]) == (3, 1)
+    assert data["timestamp"] == "2024-03-21T12:34:56.789000Z"
+    assert data["data"] == [{"peerId": "peer1", "peerName": "Peer 1", "rank": 1, "score": 2.5}]
@@ -0,0 +1,92 @@
+import heapq
+import itertools
+from typing import Any, Dict, Hashable, List, Set, Tuple
+
+
+class TopKLeaderboard:
+    """
+    Keeps the `k` highest scores of a changing set of peers. Scores are updated
+    one peer at a time and the top `k` are maintained incrementally across two
+    heaps: a min-heap of the top `k` and a max-heap of everyone else.
+
+    An update costs O(log k) while the peer stays in the top, or O(log n)
+    otherwise. Superseded heap entries are skipped lazily and compacted away.
+    """
+
+    def __init__(self, k: int = 10):
+        if k < 1:
+            raise ValueError("k must be positive")
+        self.k = k
+        self._scores: Dict[Hashable, float] = {}
+        # Bumped whenever a peer's score changes or it moves between heaps, so
+        # that older entries for the peer can be recognized as stale.
+        self._versions: Dict[Hashable, int] = {}
+        self._counter = itertools.count()
+        self._in_top: Set[Hashable] = set()
+        self._top: List[Tuple[float, int, Hashable]] = []  # min-heap: (score, version, peer)
+        self._rest: List[Tuple[float, int, Hashable]] = []  # max-heap: (-score, version, peer)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def score(self, peer: Hashable) -> float | None:
+        return self._scores.get(peer)
+
+    def _live(self, heap: List[Tuple[float, int, Hashable]], in_top: bool) -> Tuple[float, int, Hashable] | None:
+        while heap:
+            _, version, peer = heap[0]
+            if self._versions.get(peer) == version and (peer in self._in_top) == in_top:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _push(self, peer: Hashable, to_top: bool) -> None:
+        version = next(self._counter)
+        self._versions[peer] = version
+        score = self._scores[peer]
+        if to_top:
+            self._in_top.add(peer)
+            heapq.heappush(self._top, (score, version, peer))
+        else:
+            self._in_top.discard(peer)
+            heapq.heappush(self._rest, (-score, version, peer))
+
+    def update(self, peer: Hashable, score: float) -> None:
+        """Sets a peer's score, adding the peer if it is new."""
+        if self._scores.get(peer) == score:
+            return
+        self._scores[peer] = score
+        self._push(peer, to_top=peer in self._in_top or len(self._in_top) < self.k)
+        self._rebalance()
+        if len(self._top) + len(self._rest) > 2 * len(self._scores) + self.k:
+            self._compact()
+
+    def _rebalance(self) -> None:
+        while True:
+            worst_top = self._live(self._top, in_top=True)
+            best_rest = self._live(self._rest, in_top=False)
+            if best_rest is None:
+                return
+            if worst_top is not None and len(self._in_top) >= self.k:
+                if -best_rest[0] <= worst_top[0]:
+                    return
+                heapq.heappop(self._rest)
+                heapq.heappop(self._top)
+                self._push(best_rest[2], to_top=True)
+                self._push(worst_top[2], to_top=False)
+            else:
+                heapq.heappop(self._rest)
+                self._push(best_rest[2], to_top=True)
+
+    def _compact(self) -> None:
+        self._top = [e for e in self._top if self._versions[e[2]] == e[1] and e[2] in self._in_top]
+        self._rest = [e for e in self._rest if self._versions[e[2]] == e[1] and e[2] not in self._in_top]
+        heapq.heapify(self._top)
+        heapq.heapify(self._rest)
+
+    def top(self) -> List[Tuple[Hashable, float]]:
+        """The top `k` (peer, score) pairs, highest score first."""
+        return sorted(((peer, self._scores[peer]) for peer in self._in_top), key=lambda x: (-x[1], str(x[0])))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"peers": len(self._scores), "k": self.k, "heapEntries": len(self._top) + len(self._rest)}
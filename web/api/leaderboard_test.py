@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from .leaderboard import TopKLeaderboard
+
+
+def test_top_k():
+    """Test that the leaderboard keeps the k best scores in order"""
+    board = TopKLeaderboard(k=3)
+    for peer, score in [("a", 1.0), ("b", 5.0), ("c", 3.0), ("d", 4.0)]:
+        board.update(peer, score)
+    assert board.top() == [("b", 5.0), ("d", 4.0), ("c", 3.0)]
+
+    board.update("a", 10.0)  # Climbs in from outside the top.
+    assert board.top() == [("a", 10.0), ("b", 5.0), ("d", 4.0)]
+    board.update("b", 0.5)  # Falls out, letting the best of the rest back in.
+    assert board.top() == [("a", 10.0), ("d", 4.0), ("c", 3.0)]
+    assert len(board) == 4
+    assert board.score("b") == 0.5
+
+
+def test_matches_full_sort():
+    """Test random incremental updates against recomputing from scratch"""
+    rng = random.Random(0)
+    board = TopKLeaderboard(k=5)
+    scores = {}
+    for _ in range(2000):
+        peer = rng.randrange(40)
+        scores[peer] = scores.get(peer, 0.0) + rng.uniform(-1, 3)
+        board.update(peer, scores[peer])
+        expected = sorted(scores.values(), reverse=True)[:5]
+        assert [score for _, score in board.top()] == expected
+    # Superseded entries are compacted away.
+    assert board.stats()["heapEntries"] <= 2 * len(scores) + 5
+
+
+def test_invalid_k():
+    """Test argument validation"""
+    with pytest.raises(ValueError):
+        TopKLeaderboard(k=0)
@@ -0,0 +1,90 @@
+import random
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+
+class AdaptivePollSchedule:
+    """
+    Decides how long a publisher waits between polls: `min_interval_seconds`
+    right after the coordinator reports a round/stage change, then growing by
+    `backoff` each poll that sees no change, up to `max_staleness_seconds`.
+    Data lands soon after round boundaries while idle rounds are polled rarely.
+
+    Backoff only spaces out the polls, which fetch and decode from the DHT.
+    Between them the coordinator is asked for the round/stage every
+    `round_check_seconds`, and a change triggers a poll at once, so a new round
+    is noticed within that interval however far the schedule has backed off.
+    Checks fall on multiples of `round_check_seconds` of the monotonic clock,
+    so publishers sharing a SharedRoundAndStage check at the same moments and
+    share one coordinator call.
+    """
+
+    def __init__(
+        self,
+        min_interval_seconds: float = 15,
+        max_staleness_seconds: float = 300,
+        backoff: float = 2.0,
+        jitter: float = 0.1,
+        round_check_seconds: float = 15,
+        rng: Optional[random.Random] = None,
+    ):
+        if not 0 < min_interval_seconds <= max_staleness_seconds:
+            raise ValueError("Poll intervals must satisfy 0 < min_interval_seconds <= max_staleness_seconds")
+        if round_check_seconds <= 0:
+            raise ValueError("round_check_seconds must be positive")
+        if backoff < 1:
+            raise ValueError("backoff must be at least 1")
+        self.min_interval_seconds = min_interval_seconds
+        self.max_staleness_seconds = max_staleness_seconds
+        self.backoff = backoff
+        self.jitter = jitter
+        self.round_check_seconds = round_check_seconds
+        self._rng = rng or random.Random()
+        self.interval_seconds = min_interval_seconds
+
+    def next_check_delay(self, now: float) -> float:
+        """Returns the time from `now` (monotonic) until the next round/stage check."""
+        return self.round_check_seconds - now % self.round_check_seconds
+
+    def next_delay(self, changed: bool) -> float:
+        """Returns the delay before the next poll, given whether the last one saw a change."""
+        if changed:
+            self.interval_seconds = self.min_interval_seconds
+        else:
+            self.interval_seconds = min(self.interval_seconds * self.backoff, self.max_staleness_seconds)
+        # Jittered downwards only, so the staleness cap holds.
+        return self.interval_seconds * (1 - self.jitter * self._rng.random())
+
+
+class SharedRoundAndStage:
+    """
+    Wraps a coordinator so that the publishers it is passed to share its
+    round/stage: the chain is asked at most once every `max_age_seconds`, and
+    calls in between get the last answer. Keep `max_age_seconds` below the
+    schedules' `round_check_seconds`, so every aligned check sees a fresh answer.
+    Other attributes are those of the wrapped coordinator.
+    """
+
+    def __init__(self, coordinator, max_age_seconds: float = 5, clock: Callable[[], float] = time.monotonic):
+        if max_age_seconds < 0:
+            raise ValueError("max_age_seconds must not be negative")
+        self.coordinator = coordinator
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._round_and_stage: Optional[Tuple[int, int]] = None
+        self._fetched_at = 0.0
+        self.fetches = 0
+
+    def get_round_and_stage(self) -> Tuple[int, int]:
+        # Held across the call, so concurrent callers wait for one answer instead of each asking.
+        with self._lock:
+            if self._round_and_stage is None or self._clock() - self._fetched_at >= self.max_age_seconds:
+                self._round_and_stage = tuple(self.coordinator.get_round_and_stage())
+                self._fetched_at = self._clock()
+                self.fetches += 1
+            return self._round_and_stage
+
+    def __getattr__(self, name):
+        return getattr(self.coordinator, name)
@@ -0,0 +1,59 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from .poll_schedule import AdaptivePollSchedule, SharedRoundAndStage
+
+
+def test_backoff_and_reset():
+    """Test exponential backoff while idle, capped at the maximum staleness"""
+    schedule = AdaptivePollSchedule(min_interval_seconds=10, max_staleness_seconds=100, jitter=0)
+    assert schedule.next_delay(changed=True) == 10
+    assert [schedule.next_delay(changed=False) for _ in range(5)] == [20, 40, 80, 100, 100]
+    assert schedule.next_delay(changed=True) == 10
+
+
+def test_jitter_stays_under_cap():
+    """Test that jitter never pushes a delay past the staleness cap"""
+    schedule = AdaptivePollSchedule(min_interval_seconds=10, max_staleness_seconds=100, jitter=0.5)
+    delays = [schedule.next_delay(changed=False) for _ in range(50)]
+    assert all(50 <= d <= 100 for d in delays[5:])
+
+
+def test_invalid_arguments():
+    """Test argument validation"""
+    with pytest.raises(ValueError):
+        AdaptivePollSchedule(min_interval_seconds=10, max_staleness_seconds=5)
+    with pytest.raises(ValueError):
+        AdaptivePollSchedule(backoff=0.5)
+    with pytest.raises(ValueError):
+        AdaptivePollSchedule(round_check_seconds=0)
+
+
+def test_round_checks_are_aligned():
+    """Test that round/stage checks fall on multiples of the check interval"""
+    schedule = AdaptivePollSchedule(round_check_seconds=15)
+    assert schedule.next_check_delay(100.0) == 5
+    assert schedule.next_check_delay(105.0) == 15
+
+
+def test_shared_round_and_stage():
+    """Test that the coordinator is asked at most once per max age, and failures are not cached"""
+    now = [0.0]
+    coordinator = MagicMock()
+    coordinator.get_round_and_stage.return_value = [1, 0]
+    shared = SharedRoundAndStage(coordinator, max_age_seconds=5, clock=lambda: now[0])
+    assert [shared.get_round_and_stage() for _ in range(3)] == [(1, 0)] * 3
+
+    coordinator.get_round_and_stage.return_value = [1, 1]
+    now[0] = 4.9
+    assert shared.get_round_and_stage() == (1, 0)
+    now[0] = 5.0
+    assert shared.get_round_and_stage() == (1, 1)
+    assert coordinator.get_round_and_stage.call_count == shared.fetches == 2
+
+    coordinator.get_round_and_stage.side_effect = RuntimeError("unreachable")
+    now[0] = 10.0
+    with pytest.raises(RuntimeError):
+        shared.get_round_and_stage()
+    assert shared.get_bootnodes is coordinator.get_bootnodes
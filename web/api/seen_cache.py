@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable
+
+
+class SeenCache:
+    """
+    Bounded set of recently published keys. Entries expire `ttl_seconds` after
+    they were last added, and the oldest are evicted once `max_entries` is
+    reached. Entries are kept in expiry order, so expired ones are dropped from
+    the front as new ones are added.
+
+    Safe to use from several threads.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        ttl_seconds: float = 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> expiry time, soonest to expire first.
+        self._entries: OrderedDict[Hashable, float] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Like `seen`, but without counting a hit or miss."""
+        with self._lock:
+            expiry = self._entries.get(key)
+            return expiry is not None and expiry > self._clock()
+
+    def seen(self, key: Hashable) -> bool:
+        """Returns whether `key` was added and has not expired, counting a hit or miss."""
+        with self._lock:
+            expiry = self._entries.get(key)
+            if expiry is not None and expiry <= self._clock():
+                del self._entries[key]
+                expiry = None
+            if expiry is None:
+                self.misses += 1
+                return False
+            self.hits += 1
+            return True
+
+    def add(self, key: Hashable) -> None:
+        with self._lock:
+            self._add(key, self._clock())
+
+    def add_all(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            now = self._clock()
+            for key in keys:
+                self._add(key, now)
+
+    def _add(self, key: Hashable, now: float) -> None:
+        self._entries[key] = now + self.ttl_seconds
+        self._entries.move_to_end(key)
+        while self._entries and next(iter(self._entries.values())) <= now:
+            self._entries.popitem(last=False)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,73 @@
+import threading
+
+from .seen_cache import SeenCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_seen_and_hit_rate():
+    """Test membership and hit/miss accounting"""
+    cache = SeenCache()
+    assert not cache.seen("a")
+    cache.add("a")
+    assert cache.seen("a")
+    assert cache.seen("a")
+    assert cache.stats() == {"entries": 1, "hits": 2, "misses": 1, "evictions": 0, "hitRate": 0.6667}
+
+
+def test_ttl_expiry():
+    """Test that entries expire, and expired entries are dropped as new ones arrive"""
+    clock = FakeClock()
+    cache = SeenCache(ttl_seconds=10, clock=clock)
+    cache.add_all(["a", "b"])
+    clock.now = 5
+    cache.add("c")
+    clock.now = 10
+    assert not cache.seen("a")
+    assert cache.seen("c")
+    cache.add("d")
+    assert len(cache) == 2  # "b" expired and was dropped from the front
+
+
+def test_max_entries():
+    """Test that the oldest entries are evicted beyond the size bound"""
+    cache = SeenCache(max_entries=3)
+    cache.add_all(range(5))
+    assert len(cache) == 3
+    assert not cache.seen(0) and not cache.seen(1)
+    assert cache.seen(4)
+    assert cache.evictions == 2
+    # Re-adding refreshes an entry's position.
+    cache.add(2)
+    cache.add(5)
+    assert cache.seen(2) and not cache.seen(3)
+
+
+def test_concurrent_use():
+    """Test that lookups, which drop expired entries, can run alongside adds on other threads"""
+    cache = SeenCache(max_entries=500, ttl_seconds=0.0005)
+    errors = []
+
+    def run(offset):
+        try:
+            for i in range(5000):
+                cache.add_all(range(offset + i % 50, offset + i % 50 + 5))
+                cache.seen(offset + (i * 7) % 50)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(k * 10,)) for k in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 4 * 5000
+    assert stats["entries"] <= 500
@@ -1,11 +1,13 @@
 import argparse
+import asyncio
 import logging
 import os
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pythonjsonlogger import jsonlogger
 
 from hivemind_exp.chain_utils import ModalSwarmCoordinator, setup_web3
@@ -13,8 +15,12 @@ from hivemind_exp.dht_utils import *
 from hivemind_exp.name_utils import *
 
 from . import global_dht
-from .dht_pub import GossipDHTPublisher
+from .decode_pool import DecodePool
+from .dht_pub import AsyncGossipDHTPublisher, AsyncRewardsDHTPublisher, OutputsDHTPublisher
 from .kinesis import Kinesis
+from .poll_schedule import AdaptivePollSchedule, SharedRoundAndStage
+from .snapshot import GOSSIP, LEADERBOARD, Snapshot
+from .spool import DiskSpool
 
 
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
@@ -40,7 +46,26 @@ root_logger.setLevel(logging.INFO)
 # Get the module logger
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Publishers run on uvicorn's event loop: started once it is up and stopped with it.
+publishers = []
+# Set in main; flushed on shutdown once the publishers have stopped.
+kinesis_client: Kinesis | None = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for publisher in publishers:
+        publisher.start()
+    yield
+    # Wait for final publishes before closing what they publish through.
+    await asyncio.gather(*(publisher.aclose() for publisher in publishers))
+    if global_dht.decode_pool:
+        global_dht.decode_pool.shutdown()
+    if kinesis_client:
+        kinesis_client.close()
+
+
+app = FastAPI(lifespan=lifespan)
 port = os.getenv("SWARM_UI_PORT", "8000")
 
 try:
@@ -49,6 +74,27 @@ except ValueError:
     logger.warning(f"invalid port {port}. Defaulting to 8000")
     port = 8000
 
+# Worker processes for decoding peer gossip; 0 decodes on the publisher thread.
+decode_workers = os.getenv("SWARM_UI_DECODE_WORKERS", "0")
+# Seconds a gossip poll may spend decoding; unset means no limit.
+poll_budget_seconds = os.getenv("SWARM_UI_POLL_BUDGET_SECONDS")
+
+try:
+    decode_workers = int(decode_workers)
+    poll_budget_seconds = float(poll_budget_seconds) if poll_budget_seconds else None
+except ValueError:
+    logger.warning(
+        f"invalid decode settings {decode_workers}, {poll_budget_seconds}. Defaulting to no pool or budget"
+    )
+    decode_workers = 0
+    poll_budget_seconds = None
+
+# Buffer Kinesis records and send them in batches from a background thread. Off by
+# default: batched records use a different layout and partition keys.
+kinesis_batched = os.getenv("SWARM_UI_KINESIS_BATCHED", "0") == "1"
+# Directory of an on-disk spool that holds records until Kinesis accepts them; unset means none.
+spool_dir = os.getenv("SWARM_UI_SPOOL_DIR")
+
 config = uvicorn.Config(
     app,
     host="0.0.0.0",
@@ -73,22 +119,85 @@ async def internal_server_error_handler(request: Request, exc: Exception):
     )
 
 
+# How far past its maximum staleness a publisher's last poll may be, to allow for slow polls.
+STALENESS_GRACE = timedelta(minutes=2)
+
+
 @app.get("/api/healthz")
 async def get_health():
-    lpt = global_dht.dht_cache.get_last_polled()
-    if lpt is None:
-        raise HTTPException(status_code=500, detail="dht never polled")
-
-    diff = datetime.now() - lpt
-    if diff > timedelta(minutes=5):
-        raise HTTPException(status_code=500, detail="dht last poll exceeded 5 minutes")
+    now = datetime.now(timezone.utc)
+    diff = timedelta(0)
+    for publisher in publishers:
+        if not publisher.required_for_health:
+            continue
+        lpt = publisher.get_last_polled()
+        if lpt is None:
+            raise HTTPException(status_code=500, detail=f"{publisher.class_name} never polled")
+
+        max_staleness = timedelta(seconds=publisher.max_staleness_seconds) + STALENESS_GRACE
+        if now - lpt > max_staleness:
+            raise HTTPException(
+                status_code=500,
+                detail=f"{publisher.class_name} last poll exceeded {max_staleness.total_seconds():.0f} seconds",
+            )
+        diff = max(diff, now - lpt)
 
     return {
         "message": "OK",
         "lastPolled": diff,
+        "decodePool": global_dht.decode_pool.stats() if global_dht.decode_pool else None,
+        "dhtCache": global_dht.dht.stats() if global_dht.dht else None,
+        "dhtLatency": dht_latency.snapshot(),
+        "publishers": {p.class_name: p.stats() for p in publishers},
+        "kinesis": kinesis_client.stats() if kinesis_client else None,
+        "snapshots": global_dht.snapshots.stats(),
+        "stream": global_dht.broadcaster.stats(),
     }
 
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison.
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def snapshot_response(request: Request, snapshot: Snapshot | None) -> Response:
+    """Serves a pre-serialized snapshot, honoring If-None-Match and gzip Accept-Encoding."""
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Not published yet")
+
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(snapshot.gzip_body, media_type="application/json", headers=headers)
+    return Response(snapshot.body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/gossip")
+async def get_gossip(request: Request):
+    return snapshot_response(request, global_dht.snapshots.get(GOSSIP))
+
+
+@app.get("/api/leaderboard")
+async def get_leaderboard(request: Request):
+    return snapshot_response(request, global_dht.snapshots.get(LEADERBOARD))
+
+
+@app.get("/api/stream")
+async def stream_updates(request: Request):
+    """Server-sent events: new gossip and leaderboard changes as each poll publishes them."""
+    return StreamingResponse(
+        global_dht.broadcaster.stream(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        # Proxies must not buffer the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 def parse_arguments():
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -98,6 +207,7 @@ def parse_arguments():
 
 
 def main(args):
+    global kinesis_client
     contract_addr = os.getenv("CONTRACT_ADDRESS")
 
     if contract_addr is None:
@@ -112,20 +222,61 @@ def main(args):
     logger.info(f"initializing DHT with peers {initial_peers}")
 
     kinesis_stream = os.getenv("KINESIS_STREAM", "")
-    kinesis_client = Kinesis(kinesis_stream)
+    spool = DiskSpool(spool_dir) if spool_dir else None
+    kinesis_client = Kinesis(kinesis_stream, batched=kinesis_batched, spool=spool)
 
     global_dht.setup_global_dht(initial_peers, coordinator, logger, kinesis_client)
 
+    if decode_workers > 0:
+        logger.info(f"starting gossip decode pool with {decode_workers} workers")
+        global_dht.decode_pool = DecodePool(max_workers=decode_workers)
+
+    # The publishers check the round/stage on the same 15s boundaries and share
+    # one coordinator call per check, rather than each asking the chain.
+    round_and_stage = SharedRoundAndStage(coordinator, max_age_seconds=5)
+
     # Start publishing to kinesis. This will eventually replace the populate_cache thread.
     logger.info("Starting gossip publisher")
-    gossip_publisher = GossipDHTPublisher(
+    gossip_publisher = AsyncGossipDHTPublisher(
         dht=global_dht.dht,
         kinesis_client=kinesis_client,
         logger=logger,
-        coordinator=coordinator,
+        coordinator=round_and_stage,
         poll_interval_seconds=150,  # 2.5 minute
+        # Poll every 15s after a round/stage change, backing off to every 5 minutes;
+        # the round/stage itself is checked every 15s, so a change is never missed for longer.
+        poll_schedule=AdaptivePollSchedule(min_interval_seconds=15, max_staleness_seconds=300),
+        snapshots=global_dht.snapshots,
+        decode_pool=global_dht.decode_pool,
+        poll_time_budget_seconds=poll_budget_seconds,
+    )
+    publishers.append(gossip_publisher)
+
+    logger.info("Starting rewards publisher")
+    rewards_publisher = AsyncRewardsDHTPublisher(
+        dht=global_dht.dht,
+        kinesis_client=kinesis_client,
+        logger=logger,
+        coordinator=round_and_stage,
+        poll_schedule=AdaptivePollSchedule(min_interval_seconds=15, max_staleness_seconds=300),
+        snapshots=global_dht.snapshots,
+    )
+    # Not every swarm publishes rewards, so their absence does not fail the health check.
+    rewards_publisher.required_for_health = False
+    publishers.append(rewards_publisher)
+
+    logger.info("Starting outputs publisher")
+    outputs_publisher = OutputsDHTPublisher(
+        dht=global_dht.dht,
+        kinesis_client=kinesis_client,
+        logger=logger,
+        coordinator=round_and_stage,
+        poll_schedule=AdaptivePollSchedule(min_interval_seconds=15, max_staleness_seconds=300),
+        snapshots=global_dht.snapshots,
     )
-    gossip_publisher.start()
+    # Outputs are only published by nodes that also publish rewards.
+    outputs_publisher.required_for_health = False
+    publishers.append(outputs_publisher)
 
     logger.info(f"initializing server on port {port}")
     server.run()
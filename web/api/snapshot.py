@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .broadcast import Broadcaster
+from .kinesis import DateTimeEncoder, GossipMessage, GossipMessageData, LeaderboardMessage
+
+GOSSIP = "gossip"
+LEADERBOARD = "leaderboard"
+
+
+class Snapshot(NamedTuple):
+    """A JSON document serialized once, ready to be served as-is."""
+
+    body: bytes
+    gzip_body: bytes
+    # Weak, since the plain and gzip bodies share it.
+    etag: str
+    updated_at: datetime
+
+
+def make_snapshot(data: Any) -> Snapshot:
+    body = json.dumps(data, cls=DateTimeEncoder, separators=(",", ":")).encode()
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return Snapshot(
+        body=body,
+        # mtime=0 keeps the compressed bytes a function of the content alone.
+        gzip_body=gzip.compress(body, compresslevel=6, mtime=0),
+        etag=f'W/"{digest}"',
+        updated_at=datetime.now(timezone.utc),
+    )
+
+
+def leaderboard_delta(previous: Optional[LeaderboardMessage], current: LeaderboardMessage) -> Dict[str, Any]:
+    """The entries of `current` that are new or changed since `previous`, and the peers that left it."""
+    before = {e.peer_id: e for e in previous.data} if previous else {}
+    changed = [e for e in current.data if before.get(e.peer_id) != e]
+    current_peers = {e.peer_id for e in current.data}
+    delta = current.model_dump(by_alias=True, mode="json", exclude={"data"})
+    delta["data"] = [e.model_dump(by_alias=True, mode="json") for e in changed]
+    delta["removed"] = [peer_id for peer_id in before if peer_id not in current_peers]
+    return delta
+
+
+class SnapshotStore:
+    """
+    Latest gossip and leaderboard, as publishers last saw them, for the API to
+    serve without touching the DHT. Each update re-serializes its snapshot once,
+    so serving it costs no encoding work per request.
+
+    The gossip snapshot holds the `max_gossip` newest messages across polls and
+    publishers. With a `broadcaster`, each update is also streamed to clients
+    as a delta: the new gossip messages, or the leaderboard entries that changed.
+    """
+
+    def __init__(self, max_gossip: int = 200, broadcaster: Optional[Broadcaster] = None):
+        self.max_gossip = max_gossip
+        self.broadcaster = broadcaster
+        self._lock = threading.Lock()
+        self._gossip: Dict[str, GossipMessageData] = {}
+        self._leaderboard: Optional[LeaderboardMessage] = None
+        self._snapshots: Dict[str, Snapshot] = {}
+
+    def get(self, name: str) -> Optional[Snapshot]:
+        return self._snapshots.get(name)
+
+    def update_gossip(self, messages: List[GossipMessageData]) -> None:
+        if not messages:
+            return
+        with self._lock:
+            new = [m for m in messages if m.id not in self._gossip]
+            for message in messages:
+                self._gossip[message.id] = message
+            newest = sorted(self._gossip.values(), key=lambda m: m.timestamp, reverse=True)[: self.max_gossip]
+            self._gossip = {m.id: m for m in newest}
+            message = GossipMessage(data=newest)
+            self._snapshots[GOSSIP] = make_snapshot(message.model_dump(by_alias=True, mode="json"))
+        if self.broadcaster is not None and new:
+            self.broadcaster.publish(GOSSIP, GossipMessage(data=new).model_dump(by_alias=True, mode="json"))
+
+    def update_leaderboard(self, message: LeaderboardMessage) -> None:
+        snapshot = make_snapshot(message.model_dump(by_alias=True, mode="json"))
+        with self._lock:
+            previous, self._leaderboard = self._leaderboard, message
+            self._snapshots[LEADERBOARD] = snapshot
+        if self.broadcaster is not None:
+            delta = leaderboard_delta(previous, message)
+            if delta["data"] or delta["removed"]:
+                self.broadcaster.publish(LEADERBOARD, delta)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {"etag": s.etag, "bytes": len(s.body), "gzipBytes": len(s.gzip_body), "updatedAt": s.updated_at}
+            for name, s in list(self._snapshots.items())
+        }
@@ -0,0 +1,84 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from .kinesis import GossipMessageData, LeaderboardEntry, LeaderboardMessage
+from .snapshot import GOSSIP, LEADERBOARD, SnapshotStore, make_snapshot
+
+TEST_TIME = datetime(2024, 3, 21, 12, 34, 56, tzinfo=timezone.utc)
+
+
+def gossip(i, peer="peer1"):
+    return GossipMessageData(
+        id=f"msg{i}", peerId=peer, peerName="Peer", message=f"message {i}", timestamp=TEST_TIME + timedelta(seconds=i)
+    )
+
+
+def test_make_snapshot():
+    snapshot = make_snapshot({"b": [1, 2], "a": "x" * 1000})
+    assert json.loads(snapshot.body) == {"b": [1, 2], "a": "x" * 1000}
+    assert gzip.decompress(snapshot.gzip_body) == snapshot.body
+    assert len(snapshot.gzip_body) < len(snapshot.body)
+    # Equal content, equal bytes and tag.
+    again = make_snapshot({"b": [1, 2], "a": "x" * 1000})
+    assert (again.etag, again.gzip_body) == (snapshot.etag, snapshot.gzip_body)
+    assert make_snapshot({"b": [1]}).etag != snapshot.etag
+
+
+def test_gossip_keeps_newest_messages():
+    store = SnapshotStore(max_gossip=3)
+    assert store.get(GOSSIP) is None
+    store.update_gossip([gossip(0), gossip(1)])
+    store.update_gossip([gossip(3), gossip(2), gossip(1)])
+
+    data = json.loads(store.get(GOSSIP).body)
+    assert data["type"] == "gossip"
+    assert [m["id"] for m in data["data"]] == ["msg3", "msg2", "msg1"]
+    assert data["data"][0]["timestamp"] == "2024-03-21T12:34:59.000000Z"
+
+
+def test_leaderboard_snapshot():
+    store = SnapshotStore()
+    store.update_leaderboard(
+        LeaderboardMessage(
+            round=1, stage=0, timestamp=TEST_TIME, data=[LeaderboardEntry(peerId="p", peerName="P", rank=1, score=2.0)]
+        )
+    )
+    data = json.loads(store.get(LEADERBOARD).body)
+    assert data["data"] == [{"peerId": "p", "peerName": "P", "rank": 1, "score": 2.0}]
+    assert set(store.stats()) == {LEADERBOARD}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from . import global_dht, server
+
+    monkeypatch.setattr(global_dht, "snapshots", SnapshotStore())
+    return TestClient(server.app), global_dht.snapshots
+
+
+def test_endpoints_serve_snapshots_with_etags(client):
+    client, store = client
+    assert client.get("/api/gossip").status_code == 404
+
+    store.update_gossip([gossip(0)])
+    response = client.get("/api/gossip", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["data"][0]["id"] == "msg0"
+    etag = response.headers["etag"]
+
+    assert client.get("/api/gossip", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/gossip", headers={"If-None-Match": etag.removeprefix("W/")}).status_code == 304
+
+    plain = client.get("/api/gossip", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.content == store.get(GOSSIP).body
+
+    store.update_gossip([gossip(1)])
+    assert client.get("/api/gossip", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/api/leaderboard").status_code == 404
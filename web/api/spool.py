@@ -0,0 +1,344 @@
+import logging
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+# Frame header: length of the key and data, CRC32 of the key and data, key length.
+_HEADER = struct.Struct(">IIH")
+SEGMENT_SUFFIX = ".seg"
+CURSOR_FILE = "cursor"
+
+# (partition key, data)
+SpooledRecord = Tuple[str, bytes]
+# (segment number, byte offset)
+Position = Tuple[int, int]
+
+
+class DiskSpool:
+    """
+    Append-only on-disk queue of (partition key, data) records, kept as
+    numbered segment files of length-prefixed, checksummed frames. Appends are
+    fsynced in batches of `fsync_batch_records` or every `fsync_interval_seconds`.
+
+    Readers `peek` records from a persisted cursor and `ack` them once they are
+    delivered, so delivery is at-least-once: records peeked but not acked before
+    a crash are read again. Fully read segments are deleted. When the spool
+    exceeds `max_bytes`, or a segment was last written more than
+    `max_age_seconds` ago, the oldest segments are evicted whether read or not.
+
+    A spool without a reader is a plain file-backed sink.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 16 * 1024 * 1024,
+        max_bytes: int = 1024 * 1024 * 1024,
+        max_age_seconds: float = 7 * 24 * 3600,
+        fsync_batch_records: int = 64,
+        fsync_interval_seconds: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        if not 0 < segment_max_bytes <= max_bytes:
+            raise ValueError("Spool sizes must satisfy 0 < segment_max_bytes <= max_bytes")
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.fsync_batch_records = fsync_batch_records
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self._clock = clock
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        # segment number -> [size in bytes, last write time], oldest segment first.
+        self._segments: Dict[int, List[float]] = {}
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(SEGMENT_SUFFIX):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                self._segments[int(name[: -len(SEGMENT_SUFFIX)])] = [stat.st_size, stat.st_mtime]
+        self._segments = dict(sorted(self._segments.items()))
+        self._cursor = self._load_cursor()
+        self._peeked: List[Position] = []
+
+        # Always append to a fresh segment: the last one may end in a torn frame.
+        self._active = max(self._segments, default=0) + 1
+        self._file: BinaryIO = self._open_segment(self._active)
+        if self._cursor[0] not in self._segments:
+            self._cursor = (self._active, 0)
+        self._unsynced = 0
+        self._last_sync = self._clock()
+        self._closed = False
+
+        self._appended = 0
+        self._acked = 0
+        self._evicted_segments = 0
+        self._evicted_bytes = 0
+        self._corrupt_segments = 0
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:020d}{SEGMENT_SUFFIX}")
+
+    def _open_segment(self, segment: int) -> BinaryIO:
+        self._segments[segment] = [0, self._clock()]
+        return open(self._path(segment), "ab")
+
+    def _load_cursor(self) -> Position:
+        first = next(iter(self._segments), 0)
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE)) as f:
+                segment, offset = (int(x) for x in f.read().split())
+        except (OSError, ValueError):
+            return first, 0
+        if segment not in self._segments:
+            return first, 0
+        return segment, offset
+
+    def _save_cursor(self) -> None:
+        # Not fsynced: losing the latest cursor only means records are replayed.
+        path = os.path.join(self.directory, CURSOR_FILE)
+        with open(path + ".tmp", "w") as f:
+            f.write(f"{self._cursor[0]} {self._cursor[1]}")
+        os.replace(path + ".tmp", path)
+
+    def append(self, data: bytes, partition_key: str) -> None:
+        key = partition_key.encode()
+        body = key + data
+        frame = _HEADER.pack(len(body), zlib.crc32(body), len(key)) + body
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Spool is closed")
+            if self._segments[self._active][0] and self._segments[self._active][0] + len(frame) > self.segment_max_bytes:
+                self._roll()
+            self._file.write(frame)
+            self._segments[self._active][0] += len(frame)
+            self._segments[self._active][1] = self._clock()
+            self._appended += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_batch_records:
+                self._sync()
+            else:
+                self._maybe_sync()
+            self._evict()
+
+    def sync(self) -> None:
+        """Flushes and fsyncs everything appended so far."""
+        with self._lock:
+            if not self._closed:
+                self._sync()
+
+    def _sync(self) -> None:
+        if self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = self._clock()
+
+    def _maybe_sync(self) -> None:
+        if self._unsynced and self._clock() - self._last_sync >= self.fsync_interval_seconds:
+            self._sync()
+
+    def _roll(self) -> None:
+        self._sync()
+        self._file.close()
+        self._active += 1
+        self._file = self._open_segment(self._active)
+
+    def _delete(self, segment: int) -> None:
+        del self._segments[segment]
+        try:
+            os.remove(self._path(segment))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        now = self._clock()
+        total = sum(size for size, _ in self._segments.values())
+        for segment in list(self._segments):
+            if segment == self._active:
+                break
+            size, last_write = self._segments[segment]
+            if total <= self.max_bytes and now - last_write <= self.max_age_seconds:
+                break
+            total -= size
+            self._delete(segment)
+            if segment >= self._cursor[0]:
+                # Unread data is lost; read on from the next segment.
+                self._evicted_segments += 1
+                self._evicted_bytes += size - (self._cursor[1] if segment == self._cursor[0] else 0)
+                self._cursor = (next(iter(self._segments)), 0)
+                self._peeked = []
+                self.logger.warning(f"Evicted unread spool segment {segment} ({size} bytes)")
+
+    def peek(self, max_records: int = 500, max_bytes: int = 5 * 1024 * 1024) -> List[SpooledRecord]:
+        """
+        Returns up to `max_records` records (and at least one, if any) from the
+        cursor, in order, without consuming them.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Spool is closed")
+            self._maybe_sync()
+            self._evict()
+            # Make buffered appends visible to the reader.
+            self._file.flush()
+            records: List[SpooledRecord] = []
+            self._peeked = []
+            segment, offset = self._cursor
+            total = 0
+            while segment in self._segments and len(records) < max_records:
+                torn_at = None
+                with open(self._path(segment), "rb") as f:
+                    f.seek(offset)
+                    while len(records) < max_records:
+                        header = f.read(_HEADER.size)
+                        frame = None
+                        if len(header) == _HEADER.size:
+                            length, crc, key_length = _HEADER.unpack(header)
+                            # A garbage header can claim any length; never read past the segment.
+                            if length <= self._segments[segment][0] - offset - _HEADER.size:
+                                body = f.read(length)
+                                frame = body if len(body) == length and zlib.crc32(body) == crc else None
+                        if frame is None:
+                            if header and segment != self._active:
+                                # A torn write from a crash; the rest of the segment is unreadable.
+                                torn_at = offset
+                            break
+                        if records and total + len(frame) > max_bytes:
+                            return records
+                        records.append((frame[:key_length].decode(), frame[key_length:]))
+                        total += len(frame)
+                        offset = f.tell()
+                        self._peeked.append((segment, offset))
+                if torn_at is not None:
+                    # Cut the tail off, so it is counted once and the segment drains like any other.
+                    self._corrupt_segments += 1
+                    self.logger.warning(f"Dropping corrupt tail of spool segment {segment}")
+                    os.truncate(self._path(segment), torn_at)
+                    self._segments[segment][0] = torn_at
+                if len(records) >= max_records or segment == self._active:
+                    break
+                segment = next((s for s in self._segments if s > segment), segment)
+                offset = 0
+            return records
+
+    def ack(self, count: int) -> None:
+        """Consumes the first `count` records of the last peek."""
+        with self._lock:
+            # Fewer remain if the peeked segments were evicted meanwhile.
+            count = min(count, len(self._peeked))
+            if count <= 0:
+                return
+            self._cursor = self._peeked[count - 1]
+            self._peeked = self._peeked[count:]
+            self._acked += count
+            for segment in list(self._segments):
+                if segment >= self._cursor[0]:
+                    break
+                self._delete(segment)
+            self._save_cursor()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._closed:
+                self._sync()
+                self._file.close()
+                self._closed = True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(size for size, _ in self._segments.values())
+            read = sum(size for segment, (size, _) in self._segments.items() if segment < self._cursor[0])
+            return {
+                "segments": len(self._segments),
+                "bytes": total,
+                "unreadBytes": total - read - self._cursor[1],
+                "appended": self._appended,
+                "acked": self._acked,
+                "evictedSegments": self._evicted_segments,
+                "evictedBytes": self._evicted_bytes,
+                "corruptSegments": self._corrupt_segments,
+            }
+
+
+class SpoolDrainer:
+    """
+    Replays a spool into a sink from a background thread, in order. `send`
+    must deliver a whole batch or raise; a failed batch is retried, with
+    capped exponential backoff and full jitter, until the sink recovers.
+    """
+
+    def __init__(
+        self,
+        spool: DiskSpool,
+        send: Callable[[List[SpooledRecord]], Any],
+        batch_records: int = 500,
+        batch_bytes: int = 5 * 1024 * 1024,
+        poll_interval_seconds: float = 0.5,
+        base_backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+        rng: Optional[random.Random] = None,
+    ):
+        self.spool = spool
+        self.send = send
+        self.batch_records = batch_records
+        self.batch_bytes = batch_bytes
+        self.poll_interval_seconds = poll_interval_seconds
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._rng = rng or random.Random()
+        self.logger = logging.getLogger(__name__)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failures = 0
+        self.drained = 0
+        self.failed_attempts = 0
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10) -> None:
+        if not self._thread:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def drain_once(self) -> int:
+        """Sends one batch; returns how many records were delivered. Raises if the sink fails."""
+        records = self.spool.peek(self.batch_records, self.batch_bytes)
+        if records:
+            self.send(records)
+            self.spool.ack(len(records))
+            self.drained += len(records)
+        return len(records)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                if not self.drain_once():
+                    self._stop_event.wait(self.poll_interval_seconds)
+                self._failures = 0
+            except Exception as e:
+                self._failures += 1
+                self.failed_attempts += 1
+                cap = min(self.max_backoff_seconds, self.base_backoff_seconds * 2 ** (self._failures - 1))
+                self.logger.warning(f"Spool sink failed, retrying: {str(e)}")
+                self._stop_event.wait(self._rng.uniform(0, cap))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "drained": self.drained,
+            "failedAttempts": self.failed_attempts,
+            "sinkHealthy": self._failures == 0,
+        }
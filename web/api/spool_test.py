@@ -0,0 +1,222 @@
+import json
+import os
+import struct
+import threading
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from .kinesis import GossipMessage, GossipMessageData, Kinesis
+from .kinesis_producer_test import LocalKinesisStub
+from .spool import SEGMENT_SUFFIX, DiskSpool, SpoolDrainer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+
+
+def test_peek_and_ack_in_order(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    for i in range(5):
+        spool.append(f"record {i}".encode(), f"peer{i}")
+
+    assert spool.peek(max_records=3) == [(f"peer{i}", f"record {i}".encode()) for i in range(3)]
+    # Peeking again without acking returns the same records.
+    assert spool.peek(max_records=3)[0] == ("peer0", b"record 0")
+    spool.ack(2)
+    assert [key for key, _ in spool.peek()] == ["peer2", "peer3", "peer4"]
+    spool.ack(3)
+    assert spool.peek() == []
+    assert spool.stats()["unreadBytes"] == 0
+
+
+def test_peek_respects_byte_limit(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    for _ in range(4):
+        spool.append(b"x" * 100, "k")
+    assert len(spool.peek(max_bytes=250)) == 2
+    # A single record larger than the limit is still returned.
+    assert len(spool.peek(max_bytes=10)) == 1
+
+
+def test_cursor_survives_restart(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    for i in range(4):
+        spool.append(str(i).encode(), "k")
+    spool.peek(max_records=2)
+    spool.ack(2)
+    spool.close()
+
+    spool = DiskSpool(str(tmp_path))
+    spool.append(b"4", "k")
+    assert [data for _, data in spool.peek()] == [b"2", b"3", b"4"]
+
+
+def test_segments_roll_and_are_deleted_once_read(tmp_path):
+    spool = DiskSpool(str(tmp_path), segment_max_bytes=100)
+    for i in range(10):
+        spool.append(b"x" * 30, str(i))  # Two 41-byte frames per segment.
+    assert len(segment_files(tmp_path)) == 5
+
+    records = spool.peek()
+    assert [key for key, _ in records] == [str(i) for i in range(10)]
+    spool.ack(7)
+    # Only the segment holding record 6 onwards and the active one remain.
+    assert len(segment_files(tmp_path)) == 2
+    assert [key for key, _ in spool.peek()] == ["7", "8", "9"]
+
+
+def test_evicts_oldest_when_over_size(tmp_path):
+    spool = DiskSpool(str(tmp_path), segment_max_bytes=100, max_bytes=300)
+    for i in range(20):
+        spool.append(b"x" * 40, str(i))
+
+    stats = spool.stats()
+    assert stats["bytes"] <= 300 + 100
+    assert stats["evictedSegments"] > 0
+    keys = [key for key, _ in spool.peek()]
+    # The newest records survive, in order.
+    assert keys == [str(i) for i in range(20 - len(keys), 20)]
+
+
+def test_evicts_segments_past_max_age(tmp_path):
+    clock = FakeClock()
+    spool = DiskSpool(str(tmp_path), segment_max_bytes=100, max_age_seconds=60, clock=clock)
+    spool.append(b"x" * 80, "old")
+    spool.append(b"x" * 80, "newer")  # Rolls to a new segment.
+    clock.now += 61
+    spool.append(b"x" * 80, "newest")
+
+    assert [key for key, _ in spool.peek()] == ["newest"]
+    assert spool.stats()["evictedSegments"] == 2
+
+
+def test_skips_torn_tail_after_crash(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    spool.append(b"complete", "k")
+    spool.close()
+    with open(tmp_path / segment_files(tmp_path)[0], "ab") as f:
+        f.write(b"\x00\x00\x01\x00partial")
+
+    spool = DiskSpool(str(tmp_path))
+    spool.append(b"after restart", "k")
+    for _ in range(4):
+        assert [data for _, data in spool.peek()] == [b"complete", b"after restart"]
+    assert spool.stats()["corruptSegments"] == 1
+    spool.ack(2)
+    assert spool.stats()["unreadBytes"] == 0
+
+
+def test_garbage_header_is_a_torn_frame(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    spool.append(b"complete", "k")
+    spool.close()
+    with open(tmp_path / segment_files(tmp_path)[0], "ab") as f:
+        f.write(struct.pack(">IIH", 0xFFFFFFFF, 0, 1) + b"garbage")
+
+    spool = DiskSpool(str(tmp_path))
+    # The claimed 4 GiB body is never read; the header is dropped as a torn tail.
+    assert [data for _, data in spool.peek()] == [b"complete"]
+    assert spool.stats()["corruptSegments"] == 1
+    assert os.path.getsize(tmp_path / segment_files(tmp_path)[0]) == struct.calcsize(">IIH") + len(b"kcomplete")
+
+
+def test_fsyncs_in_batches(tmp_path):
+    clock = FakeClock()
+    with patch("os.fsync") as fsync:
+        spool = DiskSpool(str(tmp_path), fsync_batch_records=10, fsync_interval_seconds=5, clock=clock)
+        for _ in range(25):
+            spool.append(b"x", "k")
+        assert fsync.call_count == 2
+        clock.now += 5
+        spool.append(b"x", "k")
+        assert fsync.call_count == 3
+        spool.close()
+        assert fsync.call_count == 3
+
+
+def test_drainer_replays_in_order_after_sink_recovers(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    delivered = []
+    healthy = False
+
+    def send(records):
+        if not healthy:
+            raise ConnectionError("sink down")
+        delivered.extend(records)
+
+    drainer = SpoolDrainer(spool, send, batch_records=3)
+    for i in range(7):
+        spool.append(str(i).encode(), "k")
+
+    with pytest.raises(ConnectionError):
+        drainer.drain_once()
+    assert delivered == []
+
+    healthy = True
+    while drainer.drain_once():
+        pass
+    assert [data for _, data in delivered] == [str(i).encode() for i in range(7)]
+    assert drainer.stats()["drained"] == 7
+
+
+def test_drainer_thread(tmp_path):
+    spool = DiskSpool(str(tmp_path))
+    delivered = []
+    done = threading.Event()
+
+    def send(records):
+        delivered.extend(records)
+        if len(delivered) == 3:
+            done.set()
+
+    drainer = SpoolDrainer(spool, send, poll_interval_seconds=0.01)
+    drainer.start()
+    for i in range(3):
+        spool.append(str(i).encode(), "k")
+    assert done.wait(5)
+    drainer.stop()
+    assert [data for _, data in delivered] == [b"0", b"1", b"2"]
+
+
+def gossip(n):
+    now = datetime(2024, 3, 21, tzinfo=timezone.utc)
+    data = [GossipMessageData(id=f"msg{i}", peerId=f"peer{i}", peerName="Peer", message="hi", timestamp=now) for i in range(n)]
+    return GossipMessage(data=data)
+
+
+def test_kinesis_spools_through_outage(tmp_path):
+    down = True
+    stub = LocalKinesisStub(fail=lambda attempt, record: down)
+    spool = DiskSpool(str(tmp_path))
+    kinesis = Kinesis("test-stream", client=stub, spool=spool, max_attempts=1)
+    kinesis.drainer.stop()  # Drained by hand below.
+
+    kinesis.put_gossip(gossip(3))
+    with pytest.raises(Exception):
+        kinesis.drainer.drain_once()
+    assert stub.records == []
+
+    down = False
+    kinesis.drainer.drain_once()
+    assert [r["PartitionKey"] for r in stub.records] == ["peer0", "peer1", "peer2"]
+    kinesis.close()
+
+
+def test_kinesis_file_sink(tmp_path):
+    kinesis = Kinesis("", spool=DiskSpool(str(tmp_path)))
+    kinesis.put_gossip(gossip(2))
+    kinesis.close()
+
+    records = DiskSpool(str(tmp_path)).peek()
+    assert [key for key, _ in records] == ["peer0", "peer1"]
+    assert json.loads(records[0][1])["data"][0]["id"] == "msg0"